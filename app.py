@@ -1,15 +1,180 @@
 import requests
+import argparse
 import csv
+import queue
+import re
+import threading
 import time
 import os
+from collections import Counter
+from contextlib import contextmanager
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
+from selenium.common.exceptions import TimeoutException
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 
+from arter import Artstabell
+from journal import Journal, art_nøkkel, fingeravtrykk
+from metrikk import Fremdrift, Metrikker
+from nettcache import NettCache
+from wikipediahenter import WikipediaHenter
+from nettverk import Vertspause, alternativ_norskflora_url, hent_med_forsøk, lag_sesjon, parallelt
+from skjema import kolonne
+
+# Kolonnene NorskFloraSeleniumHenter fyller inn
+RESULTAT_FELTER = ['bilde_url', 'norskflora_url', 'bilde_status']
+
+# Bilde-URL-er fra norskflora, både rett i HTML og JSON-escapet (https:\/\/bilder...)
+BILDE_URL_MØNSTER = re.compile(
+    r'https?:(?:\\?/){2}bilder\.norskflora\.no(?:\\?/)[^"\'\s<>()]+?\.(?:jpe?g|png|webp|gif)',
+    re.IGNORECASE
+)
+
+# Det Chrome ikke trenger for å finne bilde-URL-en: skrifter, CSS, bildeinnhold og
+# sporing. Blokkeres med CDP (Network.setBlockedURLs) i rask rendring. <img src> står
+# fortsatt i DOM-en selv om selve bildet ikke lastes ned
+BLOKKERTE_URLER = [
+    '*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot',
+    '*.css',
+    '*.jpg', '*.jpeg', '*.png', '*.gif', '*.webp', '*.avif', '*.svg', '*.ico',
+    '*.mp4', '*.webm',
+    '*google-analytics.com*', '*googletagmanager.com*', '*doubleclick.net*',
+    '*facebook.net*', '*hotjar.com*', '*plausible.io*',
+]
+
+# Én tur til nettleseren per forsøk: bildet i .slideshow (null uten slideshow) og
+# alle norskflora-bilder på siden
+FINN_BILDER_JS = """
+const slideshow = document.querySelector('.slideshow');
+const forste = slideshow ? slideshow.querySelector('img') : null;
+const bilder = [];
+for (const img of document.images) {
+    for (const src of [img.getAttribute('src'), img.getAttribute('data-src')]) {
+        if (src && src.includes('bilder.norskflora.no') && !bilder.includes(src)) bilder.push(src);
+    }
+}
+return {slideshow: slideshow ? (forste ? forste.src : '') : null, bilder: bilder};
+"""
+
+def finn_bilde_i_html(html):
+    """Finner første norskflora-bilde i HTML eller innebygd JSON, helst inne i .slideshow"""
+    start = html.find('slideshow')
+    
+    # Let etter slideshow først, deretter i hele dokumentet
+    for tekst in ([html[start:]] if start != -1 else []) + [html]:
+        treff = BILDE_URL_MØNSTER.search(tekst)
+        if treff:
+            return treff.group(0).replace('\\/', '/')
+    
+    return None
+
+class DriverPool:
+    """Langlivede Chrome-instanser som lånes ut og gjenbrukes over mange sider"""
+    
+    def __init__(self, chrome_options, størrelse=1, maks_sider=50, metrikker=None, oppsett=None):
+        self.chrome_options = chrome_options
+        # Kalles med hver nye driver, f.eks. for å sette opp CDP-blokkering
+        self.oppsett = oppsett
+        self.størrelse = størrelse
+        self.maks_sider = maks_sider
+        self.metrikker = metrikker or Metrikker()
+        self._ledige = queue.Queue()
+        self._sider = {}  # id(driver) -> antall sider lastet
+        self._aktive = []
+        self._lås = threading.Lock()
+    
+    def _start_driver(self):
+        print(f"   🤖 Starter Chrome...")
+        with self.metrikker.tid('driver_oppstart'):
+            driver = webdriver.Chrome(options=self.chrome_options)
+            if self.oppsett:
+                try:
+                    self.oppsett(driver)
+                except Exception:
+                    driver.quit()
+                    raise
+        with self._lås:
+            self._sider[id(driver)] = 0
+            self._aktive.append(driver)
+        return driver
+    
+    def _kast_driver(self, driver):
+        with self._lås:
+            self._sider.pop(id(driver), None)
+            if driver in self._aktive:
+                self._aktive.remove(driver)
+        try:
+            driver.quit()
+        except Exception:
+            pass
+    
+    def _hent_driver(self):
+        # Gjenbruk en ledig driver, start en ny hvis poolen ikke er full, ellers vent.
+        # Ventingen har timeout fordi en driver som krasjer aldri leveres tilbake.
+        while True:
+            try:
+                return self._ledige.get_nowait()
+            except queue.Empty:
+                pass
+            
+            with self._lås:
+                har_plass = len(self._aktive) < self.størrelse
+                if har_plass:
+                    # Hold av plassen før Chrome starter, så to tråder ikke begge starter
+                    self._aktive.append(None)
+            
+            if har_plass:
+                break
+            
+            try:
+                return self._ledige.get(timeout=1)
+            except queue.Empty:
+                continue
+        
+        try:
+            return self._start_driver()
+        finally:
+            with self._lås:
+                self._aktive.remove(None)
+    
+    @contextmanager
+    def lån(self):
+        """Låner ut en driver. Krasjer den, blir den kastet i stedet for levert tilbake"""
+        driver = self._hent_driver()
+        try:
+            yield driver
+        except Exception:
+            print(f"   ♻️ Driver krasjet - starter ny ved neste lån")
+            self._kast_driver(driver)
+            raise
+        
+        with self._lås:
+            self._sider[id(driver)] += 1
+            utslitt = self._sider[id(driver)] >= self.maks_sider
+        
+        if utslitt:
+            print(f"   ♻️ Driver har lastet {self.maks_sider} sider - resirkulerer")
+            self._kast_driver(driver)
+        else:
+            self._ledige.put(driver)
+    
+    def lukk(self):
+        """Avslutter alle Chrome-instanser"""
+        while True:
+            try:
+                self._ledige.get_nowait()
+            except queue.Empty:
+                break
+        with self._lås:
+            drivere = [d for d in self._aktive if d is not None]
+        for driver in drivere:
+            self._kast_driver(driver)
+
 class NorskFloraSeleniumHenter:
-    def __init__(self):
+    def __init__(self, antall_drivere=1, antall_arbeidere=None, pause=2.0, maks_sider=50, http_først=True,
+                 basis_url="https://norskflora.no", cache=None, metrikker=None, rask_rendring=True, vent=15):
         # Sett opp Chrome med headless mode
         self.chrome_options = Options()
         self.chrome_options.add_argument('--headless')  # Kjør uten GUI
@@ -17,6 +182,32 @@ class NorskFloraSeleniumHenter:
         self.chrome_options.add_argument('--disable-dev-shm-usage')
         self.chrome_options.add_argument('--disable-gpu')
         self.chrome_options.add_argument('--window-size=1920,1080')
+        
+        # Rask rendring: driver.get venter bare på DOMContentLoaded, og skrifter, CSS,
+        # bilder og sporing lastes ikke. Bilde-URL-en leses fra DOM-en uansett
+        self.rask_rendring = rask_rendring
+        self.vent = vent
+        if rask_rendring:
+            self.chrome_options.page_load_strategy = 'eager'
+        
+        # Tid per trinn, bilde_status og feiltyper (se metrikk.py)
+        self.metrikker = metrikker or Metrikker()
+        self.pool = DriverPool(self.chrome_options, størrelse=antall_drivere, maks_sider=maks_sider,
+                               metrikker=self.metrikker, oppsett=self._blokker_ressurser if rask_rendring else None)
+        self.antall_arbeidere = antall_arbeidere or antall_drivere
+        self.vertspause = Vertspause(pause)
+        self.basis_url = basis_url
+        
+        # Vanlige HTTP-kall prøves før Chrome, og vi teller hvilken vei hver rad ble løst
+        self.http_først = http_først
+        self.sesjon = lag_sesjon(self.antall_arbeidere)
+        self.treff = Counter()
+        self.cache = cache
+        self._treff_lås = threading.Lock()
+    
+    def lukk(self):
+        """Avslutter Chrome-instansene i poolen"""
+        self.pool.lukk()
     
     def parse_latinsk_navn(self, latinsk_navn):
         """Parser latinsk navn til slekt og art"""
@@ -29,176 +220,388 @@ class NorskFloraSeleniumHenter:
             return deler[0], deler[1]
         return None, None
     
-    def hent_bilde_selenium(self, slekt, art):
-        """Hent bilde med Selenium"""
-        driver = None
-        try:
-            print(f"   🤖 Starter Chrome...")
-            driver = webdriver.Chrome(options=self.chrome_options)
-            
-            plant_url = f"https://norskflora.no/plante/?sle={slekt}&art={art}"
-            print(f"   🔗 Laster: {plant_url}")
+    @staticmethod
+    def _blokker_ressurser(driver):
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': BLOKKERTE_URLER})
+    
+    def _tell(self, vei):
+        with self._treff_lås:
+            self.treff[vei] += 1
+    
+    def hent_bilde_http(self, slekt, art):
+        """Hent bilde med vanlige HTTP-kall, uten å rendre siden"""
+        plant_url = f"{self.basis_url}/plante/?sle={slekt}&art={art}"
+        
+        for url in (plant_url, alternativ_norskflora_url(plant_url)):
+            def nett(ekstra_headers, url=url):
+                with self.metrikker.tid('vertspause'):
+                    self.vertspause.vent(url)
+                return hent_med_forsøk(self.sesjon, url, forsøk=1, vertspause=self.vertspause,
+                                       headers=ekstra_headers, timeout=10, allow_redirects=True)
             
-            driver.get(plant_url)
+            try:
+                with self.metrikker.tid('http_henting'):
+                    response = self.cache.hent(url, nett) if self.cache else nett({})
+            except requests.exceptions.RequestException as e:
+                print(f"   ⚠️ HTTP feil for {url}: {e}")
+                self.metrikker.feil(e)
+                continue
             
-            # Vent på at siden laster (React trenger tid)
-            print(f"   ⏳ Venter på React...")
-            wait = WebDriverWait(driver, 15)
+            if response.status_code != 200:
+                self.metrikker.tell('http_status', str(response.status_code))
+                continue
             
-            # Vent på slideshow
-            try:
-                slideshow = wait.until(
-                    EC.presence_of_element_located((By.CLASS_NAME, "slideshow"))
-                )
-                print(f"   📸 Slideshow funnet!")
+            with self.metrikker.tid('parsing'):
+                bilde_url = finn_bilde_i_html(response.text)
+            if bilde_url:
+                print(f"   ⚡ Bilde hentet uten Chrome: {bilde_url}")
+                return bilde_url, plant_url
+        
+        return None, plant_url
+    
+    def hent_bilde(self, slekt, art):
+        """Prøver HTTP først og faller tilbake til Selenium bare når det trengs"""
+        if self.http_først:
+            bilde_url, side_url = self.hent_bilde_http(slekt, art)
+            if bilde_url:
+                self._tell('http')
+                return bilde_url, side_url
+            print(f"   🐢 Fant ikke bilde i HTML - prøver Selenium")
+        
+        bilde_url, side_url = self.hent_bilde_selenium(slekt, art)
+        self._tell('selenium' if bilde_url else 'ingen')
+        return bilde_url, side_url
+    
+    def hent_bilde_selenium(self, slekt, art):
+        """Hent bilde med Selenium"""
+        try:
+            with self.pool.lån() as driver:
+                plant_url = f"{self.basis_url}/plante/?sle={slekt}&art={art}"
+                print(f"   🔗 Laster: {plant_url}")
                 
-                # Finn img i slideshow
-                img = slideshow.find_element(By.TAG_NAME, "img")
-                bilde_url = img.get_attribute("src")
+                with self.metrikker.tid('vertspause'):
+                    self.vertspause.vent(plant_url)
+                start = time.monotonic()
+                try:
+                    with self.metrikker.tid('sidelast'):
+                        driver.get(plant_url)
+                except Exception as e:
+                    self.vertspause.tilbakemelding(plant_url, feil=e)
+                    raise
+                self.vertspause.tilbakemelding(plant_url, sekunder=time.monotonic() - start)
                 
-                if bilde_url and 'bilder.norskflora.no' in bilde_url:
-                    print(f"   ✅ Bilde hentet: {bilde_url}")
-                    return bilde_url, plant_url
-                else:
-                    print(f"   ❌ Ugyldig bilde-URL: {bilde_url}")
-                    
-            except Exception as slideshow_error:
-                print(f"   ⚠️ Slideshow ikke funnet: {slideshow_error}")
+                if self.rask_rendring:
+                    return self._finn_bilde_rask(driver), plant_url
                 
-                # Fallback: søk etter alle norskflora-bilder
-                print(f"   🔍 Søker etter alle bilder...")
-                imgs = driver.find_elements(By.TAG_NAME, "img")
+                # Vent på at siden laster (React trenger tid)
+                print(f"   ⏳ Venter på React...")
+                wait = WebDriverWait(driver, self.vent)
                 
-                for img in imgs:
-                    src = img.get_attribute("src")
-                    if src and 'bilder.norskflora.no' in src:
-                        print(f"   ✅ Fallback bilde: {src}")
-                        return src, plant_url
-            
-            print(f"   ❌ Ingen bilder funnet")
-            return None, plant_url
+                # Vent på slideshow
+                try:
+                    with self.metrikker.tid('slideshow_vent'):
+                        slideshow = wait.until(
+                            EC.presence_of_element_located((By.CLASS_NAME, "slideshow"))
+                        )
+                    print(f"   📸 Slideshow funnet!")
+                    
+                    # Finn img i slideshow
+                    img = slideshow.find_element(By.TAG_NAME, "img")
+                    bilde_url = img.get_attribute("src")
+                    
+                    if bilde_url and 'bilder.norskflora.no' in bilde_url:
+                        print(f"   ✅ Bilde hentet: {bilde_url}")
+                        return bilde_url, plant_url
+                    else:
+                        print(f"   ❌ Ugyldig bilde-URL: {bilde_url}")
+                        
+                except Exception as slideshow_error:
+                    print(f"   ⚠️ Slideshow ikke funnet: {slideshow_error}")
+                    self.metrikker.feil(slideshow_error)
+                    
+                    # Fallback: søk etter alle norskflora-bilder
+                    print(f"   🔍 Søker etter alle bilder...")
+                    imgs = driver.find_elements(By.TAG_NAME, "img")
+                    
+                    for img in imgs:
+                        src = img.get_attribute("src")
+                        if src and 'bilder.norskflora.no' in src:
+                            print(f"   ✅ Fallback bilde: {src}")
+                            return src, plant_url
+                
+                print(f"   ❌ Ingen bilder funnet")
+                return None, plant_url
             
         except Exception as e:
             print(f"   💥 Selenium feil: {e}")
+            self.metrikker.feil(e)
             return None, None
+    
+    def _finn_bilde_rask(self, driver):
+        """
+        Venter på .slideshow med ett execute_script per forsøk (hvert 0.1 s) i stedet
+        for find_element og get_attribute per bilde. Uten slideshow brukes det første
+        norskflora-bildet fra siste forsøk, uten en ekstra tur til nettleseren
+        """
+        print(f"   ⏳ Venter på React...")
+        siste = {}
+        
+        def slideshow_klar(driver):
+            siste.update(driver.execute_script(FINN_BILDER_JS) or {})
+            return siste.get('slideshow') is not None
+        
+        try:
+            with self.metrikker.tid('slideshow_vent'):
+                WebDriverWait(driver, self.vent, poll_frequency=0.1).until(slideshow_klar)
+            bilde_url = siste['slideshow']
+            if bilde_url and 'bilder.norskflora.no' in bilde_url:
+                print(f"   ✅ Bilde hentet: {bilde_url}")
+                return bilde_url
+            print(f"   ⚠️ Slideshow uten norskflora-bilde: {bilde_url!r}")
+        except TimeoutException as e:
+            print(f"   ⚠️ Slideshow ikke funnet etter {self.vent} s")
+            self.metrikker.feil(e)
+        
+        if siste.get('bilder'):
+            print(f"   ✅ Fallback bilde: {siste['bilder'][0]}")
+            return siste['bilder'][0]
+        print(f"   ❌ Ingen bilder funnet")
+        return None
+    
+    def behandle_rad(self, row, i, totalt, skjema='skript'):
+        """Fyller inn bilde_url, norskflora_url og bilde_status for én rad"""
+        norsk_navn = (row.get(kolonne(skjema, 'Norsk navn')) or '').strip()
+        latinsk_navn = (row.get(kolonne(skjema, 'Latinsk navn')) or '').strip()
+        
+        print(f"\n[{i}/{totalt}] {norsk_navn}")
+        
+        if not norsk_navn:
+            print(f"   ⚠️ Mangler norsk navn")
+            row['bilde_url'] = ''
+            row['norskflora_url'] = ''
+            row['bilde_status'] = 'MANGLER_NAVN'
+            return row
+        
+        if not latinsk_navn:
+            print(f"   ⚠️ Mangler latinsk navn")
+            row['bilde_url'] = ''
+            row['norskflora_url'] = ''
+            row['bilde_status'] = 'MANGLER_LATINSK'
+            return row
+        
+        slekt, art = self.parse_latinsk_navn(latinsk_navn)
+        
+        if not slekt or not art:
+            print(f"   ❌ Ugyldig latinsk: {latinsk_navn}")
+            row['bilde_url'] = ''
+            row['norskflora_url'] = ''
+            row['bilde_status'] = 'UGYLDIG_LATINSK'
+            return row
+        
+        print(f"   Søker: {slekt} {art}")
+        
+        bilde_url, side_url = self.hent_bilde(slekt, art)
+        
+        row['bilde_url'] = bilde_url or ''
+        row['norskflora_url'] = side_url or ''
+        row['bilde_status'] = 'FUNNET' if bilde_url else 'IKKE_FUNNET'
+        
+        if bilde_url:
+            print(f"   🎉 SUKSESS! ({norsk_navn})")
+        else:
+            print(f"   😞 INGEN BILDE ({norsk_navn})")
+        
+        return row
+    
+    def berik(self, rader, input_felter, journal=None, kjente=None, totalt='?', skjema='skript', behold_funnet=False):
+        """
+        Slår opp radene parallelt og gir (rad, fra_før) i input-rekkefølge, uten å
+        lese hele input-en først. Rader med kjent resultat for samme art og
+        fingeravtrykk gjenbrukes, og nye resultater journalføres hvis vi har en journal.
+        Med `behold_funnet` slås rader som allerede er FUNNET ikke opp på nytt.
+        """
+        kjente = kjente or {}
+        latin_kolonne = kolonne(skjema, 'Latinsk navn')
+        
+        def behandle(par):
+            i, row = par
+            nøkkel = art_nøkkel(row.get(latin_kolonne))
+            avtrykk = fingeravtrykk(row, input_felter)
+            kjent = kjente.get((nøkkel, avtrykk)) if nøkkel else None
             
-        finally:
-            if driver:
-                driver.quit()
+            if kjent:
+                row.update(kjent)
+                return row, True
+            if behold_funnet and row.get('bilde_status') == 'FUNNET':
+                return row, True
+            
+            with self.metrikker.tid('rad'):
+                row = self.behandle_rad(row, i, totalt, skjema)
+            if nøkkel and journal:
+                journal.skriv(nøkkel, avtrykk, {felt: row[felt] for felt in RESULTAT_FELTER})
+            return row, False
+        
+        return parallelt(behandle, enumerate(rader, 1), self.antall_arbeidere)
     
-    def behandle_csv_selenium(self, input_csv, output_csv):
-        """Behandler CSV med Selenium"""
+    def behandle_csv_selenium(self, input_csv, output_csv, gjenoppta=True, inkrementell=False):
+        """
+        Behandler CSV med Selenium.
+        
+        Hver ferdig rad journalføres i `<output_csv>.journal.jsonl`. Med `gjenoppta`
+        hoppes rader som allerede er FUNNET i journalen over, så en kjøring som
+        krasjet fortsetter der den slapp. Med `inkrementell` gjenbrukes også
+        resultatene i forrige output-fil for rader som ikke er endret siden da.
+        """
         print(f"📖 Leser CSV: {input_csv}")
         
-        with open(input_csv, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            fieldnames = reader.fieldnames
-            rows = list(reader)
+        rows = Artstabell.les(input_csv)
+        fieldnames = rows.kolonner
         
         print(f"📋 Fant {len(rows)} arter")
+        print(f"🧵 {self.antall_arbeidere} arbeidere, {self.pool.størrelse} Chrome-instanser")
         
-        nye_fieldnames = list(fieldnames) + ['bilde_url', 'norskflora_url', 'bilde_status']
+        input_felter = [f for f in fieldnames if f not in RESULTAT_FELTER]
+        nye_fieldnames = input_felter + RESULTAT_FELTER
         
-        suksess = 0
-        feil = 0
-        ingen_latin = 0
+        # Tidligere resultater: journalen fra en avbrutt kjøring, og forrige output-fil
+        journal = Journal(output_csv + '.journal.jsonl')
+        kjente = {}
+        if inkrementell and os.path.exists(output_csv):
+            for gammel in Artstabell.les(output_csv):
+                nøkkel = (art_nøkkel(gammel.get('Latinsk navn')), fingeravtrykk(gammel, input_felter))
+                kjente[nøkkel] = {felt: gammel.get(felt, '') for felt in RESULTAT_FELTER}
+        if gjenoppta:
+            for nøkkel, oppføring in journal.les().items():
+                if oppføring['rad'].get('bilde_status') == 'FUNNET' or inkrementell:
+                    kjente[nøkkel] = oppføring['rad']
         
-        with open(output_csv, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=nye_fieldnames)
-            writer.writeheader()
-            
-            for i, row in enumerate(rows, 1):
-                print(f"\n{'='*60}")
-                print(f"[{i}/{len(rows)}] ", end="")
-                
-                norsk_navn = row.get('Norsk navn', '').strip()
-                latinsk_navn = row.get('Latinsk navn', '').strip()
-                
-                print(f"{norsk_navn}")
-                
-                if not norsk_navn:
-                    print(f"   ⚠️ Mangler norsk navn")
-                    row['bilde_url'] = ''
-                    row['norskflora_url'] = ''
-                    row['bilde_status'] = 'MANGLER_NAVN'
-                    writer.writerow(row)
-                    continue
-                
-                if not latinsk_navn:
-                    print(f"   ⚠️ Mangler latinsk navn")
-                    ingen_latin += 1
-                    row['bilde_url'] = ''
-                    row['norskflora_url'] = ''
-                    row['bilde_status'] = 'MANGLER_LATINSK'
-                    writer.writerow(row)
-                    continue
+        if kjente:
+            print(f"📒 {len(kjente)} arter har resultat fra før")
+        
+        gjenbrukt = 0
+        
+        # Skriv til en midlertidig fil så forrige output står urørt til kjøringen er ferdig
+        tmp_csv = output_csv + '.tmp'
+        fremdrift = Fremdrift(len(rows))
+        
+        try:
+            with open(tmp_csv, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.DictWriter(f, fieldnames=nye_fieldnames, extrasaction='ignore')
+                writer.writeheader()
                 
-                slekt, art = self.parse_latinsk_navn(latinsk_navn)
+                # Radene kommer tilbake i input-rekkefølge selv om de blir ferdige i annen rekkefølge
+                ferdige = self.berik(rows, input_felter, journal=journal, kjente=kjente, totalt=len(rows))
                 
-                if not slekt or not art:
-                    print(f"   ❌ Ugyldig latinsk: {latinsk_navn}")
-                    feil += 1
-                    row['bilde_url'] = ''
-                    row['norskflora_url'] = ''
-                    row['bilde_status'] = 'UGYLDIG_LATINSK'
+                for row, fra_før in ferdige:
+                    gjenbrukt += fra_før
+                    status = row['bilde_status']
+                    self.metrikker.tell('bilde_status', status)
+                    self.metrikker.tell('rader', 'gjenbrukt' if fra_før else 'slått_opp')
+                    fremdrift.steg()
+                    
                     writer.writerow(row)
-                    continue
-                
-                print(f"   Søker: {slekt} {art}")
-                
-                # Hent bilde med Selenium
-                bilde_url, side_url = self.hent_bilde_selenium(slekt, art)
-                
-                row['bilde_url'] = bilde_url or ''
-                row['norskflora_url'] = side_url or ''
-                row['bilde_status'] = 'FUNNET' if bilde_url else 'IKKE_FUNNET'
-                
-                if bilde_url:
-                    suksess += 1
-                    print(f"   🎉 SUKSESS!")
-                else:
-                    feil += 1
-                    print(f"   😞 INGEN BILDE")
-                
-                writer.writerow(row)
-                
-                # Pause mellom forespørsler
-                time.sleep(2)
+        finally:
+            journal.lukk()
+        
+        os.replace(tmp_csv, output_csv)
+        
+        # Output-filen har nå alt, og er grunnlaget for neste inkrementelle kjøring
+        journal.fjern()
+        
+        # Radene er endret på plass, så tabellens statusindeks har tellingen
+        telling = rows.telling('bilde_status')
+        suksess = telling.get('FUNNET', 0)
+        feil = telling.get('IKKE_FUNNET', 0) + telling.get('UGYLDIG_LATINSK', 0)
+        ingen_latin = telling.get('MANGLER_LATINSK', 0)
         
         print(f"\n{'='*60}")
         print(f"🎉 FERDIG!")
         print(f"✅ {suksess} bilder hentet")
         print(f"❌ {feil} uten bilder")
         print(f"⚠️ {ingen_latin} mangler latinsk")
+        print(f"📒 {gjenbrukt} gjenbrukt fra forrige kjøring, {len(rows) - gjenbrukt} slått opp")
+        if self.cache:
+            print(self.cache.sammendrag())
+        print(self.vertspause.sammendrag())
+        print(f"⚡ {self.treff['http']} løst med HTTP, 🤖 {self.treff['selenium']} med Selenium, 😞 {self.treff['ingen']} av ingen")
+        print(self.metrikker.sammendrag())
         print(f"📁 Lagret: {output_csv}")
         
         return suksess, feil
 
 def main():
-    scraper = NorskFloraSeleniumHenter()
+    parser = argparse.ArgumentParser(description="Henter bilder fra norskflora.no med Chrome headless")
+    parser.add_argument('input', nargs='?', default="midlertidig.csv", help="CSV med 'Norsk navn' og 'Latinsk navn'")
+    parser.add_argument('output', nargs='?', default="blomster_norskflora.csv", help="Hvor resultatet skrives")
+    parser.add_argument('--drivere', type=int, default=1, help="Antall Chrome-instanser i poolen")
+    parser.add_argument('--arbeidere', type=int, default=None, help="Antall parallelle arbeidere (standard: samme som --drivere)")
+    parser.add_argument('--pause', type=float, default=2.0, help="Minste antall sekunder mellom forespørsler til samme vert")
+    parser.add_argument('--maks-sider', type=int, default=50, help="Resirkuler en Chrome-instans etter så mange sider")
+    parser.add_argument('--kun-selenium', action='store_true', help="Hopp over HTTP-forsøket og rendre alle sider i Chrome")
+    parser.add_argument('--full-rendring', action='store_true', help="Last hele siden med CSS, skrifter og bilder i Chrome")
+    parser.add_argument('--inkrementell', action='store_true', help="Slå bare opp arter som er nye eller endret siden forrige output")
+    parser.add_argument('--start-paa-nytt', action='store_true', help="Ignorer journalen fra en avbrutt kjøring")
+    parser.add_argument('--cache', default='.nettcache.sqlite3', help="Fil for HTTP-cachen")
+    parser.add_argument('--ingen-cache', action='store_true', help="Hent alle sider fra nettet")
+    parser.add_argument('--cache-ttl', type=float, default=24, help="Timer før en side i cachen revalideres")
+    parser.add_argument('--cache-maks-mb', type=float, default=200, help="Største størrelse på cachen")
+    parser.add_argument('--wikipedia', action='store_true', help="Fyll Wikipedia-kolonnene i output etterpå")
+    parser.add_argument('--metrikker', help="Skriv målingene hit: .prom gir Prometheus-textfile, ellers JSONL")
+    args = parser.parse_args()
+    
+    scraper = NorskFloraSeleniumHenter(
+        antall_drivere=args.drivere,
+        antall_arbeidere=args.arbeidere,
+        pause=args.pause,
+        maks_sider=args.maks_sider,
+        http_først=not args.kun_selenium,
+        rask_rendring=not args.full_rendring,
+        cache=None if args.ingen_cache else NettCache(
+            args.cache, ttl=args.cache_ttl * 3600, maks_bytes=int(args.cache_maks_mb * 1024 * 1024)
+        ),
+    )
     
     print("🤖 Norsk Flora Selenium Scraper")
     print("=" * 50)
-    print("Bruker Chrome headless for å laste React-appen")
+    print("Prøver vanlig HTTP først, Chrome headless bare når React-appen må rendres")
     print()
     
-    input_fil = "midlertidig.csv"
-    output_fil = "blomster_norskflora.csv"
+    input_fil = args.input
+    output_fil = args.output
     
     if not os.path.exists(input_fil):
         print(f"❌ Finner ikke: {input_fil}")
         return
     
-    # Test først med én art
-    print("🧪 Testing med Geum urbanum...")
-    bilde_url, side_url = scraper.hent_bilde_selenium("Geum", "urbanum")
-    
-    if bilde_url:
-        print(f"✅ Test OK! Starter full prosessering...")
-        time.sleep(2)
-        scraper.behandle_csv_selenium(input_fil, output_fil)
-    else:
-        print(f"❌ Test feilet - sjekk Selenium setup")
+    try:
+        # Test først med én art
+        print("🧪 Testing med Geum urbanum...")
+        bilde_url, side_url = scraper.hent_bilde("Geum", "urbanum")
+        
+        if bilde_url:
+            print(f"✅ Test OK! Starter full prosessering...")
+            scraper.behandle_csv_selenium(
+                input_fil, output_fil,
+                gjenoppta=not args.start_paa_nytt,
+                inkrementell=args.inkrementell,
+            )
+            
+            if args.wikipedia:
+                # Samme sesjon, vertspause og cache som norskflora-henteren
+                print("\n📚 Wikipedia-beriking")
+                wikipedia = WikipediaHenter(
+                    cache=scraper.cache, sesjon=scraper.sesjon, vertspause=scraper.vertspause,
+                    antall_arbeidere=scraper.antall_arbeidere,
+                )
+                wikipedia.behandle_csv(output_fil, output_fil)
+        else:
+            print(f"❌ Test feilet - sjekk Selenium setup")
+    finally:
+        scraper.lukk()
+        if args.metrikker:
+            scraper.metrikker.skriv(args.metrikker)
+            print(f"📈 Målinger skrevet til {args.metrikker}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -5,6 +5,7 @@ import Image from 'next/image';
 import Link from 'next/link';
 import UtvalgModal from '@/components/UtvalgModal';
 import { loadBlomsterData } from '@/lib/blomsterData';
+import { bildeProps } from '@/lib/bildespeil';
 import { genererQuiz, beregnKarakter } from '@/lib/quizTypes';
 import { lesFravalgte, skrivFravalgte, brukbareBlomster, MIN_FOR_QUIZ } from '@/lib/utvalg';
 import type { BlomsterData } from '@/lib/types';
@@ -438,7 +439,7 @@ export default function TestDegSelv() {
             >
               <Image
                 key={`quiz-${gjeldendespørsmål}-${aktivtBildeIndex}`}
-                src={aktivtBilde}
+                {...bildeProps(gjeldende.blomst, aktivtBilde)}
                 alt="Gjett blomsten"
                 fill
                 className={`transition-opacity duration-500 ${
@@ -446,7 +447,6 @@ export default function TestDegSelv() {
                 }`}
                 style={{ objectFit: 'contain' }}
                 onLoad={() => setBildeLastet(true)}
-                unoptimized
                 priority
               />
             </div>
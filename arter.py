@@ -0,0 +1,223 @@
+"""
+Felles artsmodell for skriptene: én Art per rad og en Artstabell med indekser.
+
+En rad fra csv.DictReader er et dict med alle kolonnenavnene som nøkler. Art
+har i stedet en fast plass (__slots__) per kjent felt, og familie, type og
+statusene interneres, så 2000 arter med samme 40 familier deler strengene.
+Art oppfører seg som et dict, så row['bilde_status'] = ..., row.get(...) og
+csv.DictWriter virker som før - med navnene fra begge skjemaene:
+
+    tabell = Artstabell.les('midlertidig.csv')
+    art = tabell.finn('Ulmus glabra')
+    art['bilde_status'] = 'FUNNET'           # indeksene følger med
+    tabell.med_status('FUNNET')              # [Art, ...] uten å gå gjennom alle
+    tabell.skriv('blomster.csv', skjema='app')
+"""
+import csv
+import sys
+import threading
+from collections.abc import MutableMapping
+
+from csvfil import skriv_atomisk
+from journal import art_nøkkel
+from skjema import SKJEMAER, SKRIPT_TIL_APP, finn_skjema
+
+# Én plass per felt i app-skjemaet; skriptskjemaet bruker de samme plassene
+FELTER = tuple(SKJEMAER['app'])
+PLASS = {felt: felt for felt in FELTER}
+PLASS.update(SKRIPT_TIL_APP)
+
+# Få forskjellige verdier som går igjen i tusenvis av rader
+INTERNERTE = {'familie', 'type', 'bilde_status', 'wikipedia_status'}
+
+# Felt som har en indeks i Artstabell
+INDEKSERTE = {'latinsk_navn', 'familie', 'bilde_status'}
+
+class Art(MutableMapping):
+    """
+    Én art. Felt som ikke er satt er None og finnes ikke som nøkkel, akkurat
+    som en kolonne som mangler i et dict. Ukjente kolonner havner i _ekstra.
+    """
+    __slots__ = FELTER + ('_ekstra', '_kolonner', '_tabell', '_nr')
+
+    def __init__(self, verdier=(), kolonner=()):
+        for felt in FELTER:
+            setattr(self, felt, None)
+        self._ekstra = None
+        # Delt med resten av tabellen, så nøklene kommer i header-rekkefølge uten å koste noe per rad
+        self._kolonner = kolonner
+        self._tabell = None
+        self._nr = None
+        if verdier:
+            self.update(verdier)
+
+    def __getitem__(self, nøkkel):
+        plass = PLASS.get(nøkkel)
+        if plass is None:
+            if self._ekstra is None:
+                raise KeyError(nøkkel)
+            return self._ekstra[nøkkel]
+        verdi = getattr(self, plass)
+        if verdi is None:
+            raise KeyError(nøkkel)
+        return verdi
+
+    def __setitem__(self, nøkkel, verdi):
+        plass = PLASS.get(nøkkel)
+        if plass is None:
+            if self._ekstra is None:
+                self._ekstra = {}
+            self._ekstra[nøkkel] = verdi
+            return
+        if plass in INTERNERTE and isinstance(verdi, str):
+            verdi = sys.intern(verdi)
+        if plass in INDEKSERTE and self._tabell is not None:
+            self._tabell._flytt(self, plass, getattr(self, plass), verdi)
+        setattr(self, plass, verdi)
+
+    def __delitem__(self, nøkkel):
+        self[nøkkel]
+        if PLASS.get(nøkkel) is None:
+            del self._ekstra[nøkkel]
+        else:
+            self[nøkkel] = None
+
+    def __iter__(self):
+        sett = set()
+        for nøkkel in self._kolonner:
+            plass = PLASS.get(nøkkel)
+            if (getattr(self, plass) if plass else (self._ekstra or {}).get(nøkkel)) is not None:
+                sett.add(plass or nøkkel)
+                yield nøkkel
+        # Felt som er satt etter innlesingen og ikke står i headeren
+        for felt in FELTER:
+            if felt not in sett and getattr(self, felt) is not None:
+                yield felt
+        for nøkkel in self._ekstra or ():
+            if nøkkel not in sett:
+                yield nøkkel
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return f"Art({self.latinsk_navn!r}, {self.norsk_navn!r})"
+
+    def som_dict(self):
+        return dict(self.items())
+
+class Artstabell:
+    """
+    Alle artene i en CSV, i fil-rekkefølge, med indekser etter latinsk navn,
+    familie og bilde_status. Indeksene oppdateres når et felt settes på en
+    Art i tabellen, også fra flere tråder.
+    """
+
+    def __init__(self, kolonner=()):
+        self.kolonner = list(kolonner)
+        self.skjema = finn_skjema(self.kolonner)
+        self.arter = []
+        self._lås = threading.Lock()
+        self._latin = {}
+        # {verdi: {nr: Art}} - dict i stedet for liste så en flytting er O(1)
+        self._grupper = {'familie': {}, 'bilde_status': {}}
+
+    def legg_til(self, verdier):
+        art = verdier if isinstance(verdier, Art) else Art(verdier, self.kolonner)
+        art._kolonner = self.kolonner
+        with self._lås:
+            art._nr = len(self.arter)
+            art._tabell = self
+            self.arter.append(art)
+            self._indekser(art)
+        return art
+
+    def _indekser(self, art):
+        nøkkel = art_nøkkel(art.latinsk_navn)
+        if nøkkel:
+            # Første forekomst vinner, som i Navneindeks
+            self._latin.setdefault(nøkkel, art)
+        for felt, grupper in self._grupper.items():
+            grupper.setdefault(getattr(art, felt) or '', {})[art._nr] = art
+
+    def _flytt(self, art, felt, gammel, ny):
+        with self._lås:
+            if felt == 'latinsk_navn':
+                gammel_nøkkel = art_nøkkel(gammel)
+                if self._latin.get(gammel_nøkkel) is art:
+                    del self._latin[gammel_nøkkel]
+                if art_nøkkel(ny):
+                    self._latin.setdefault(art_nøkkel(ny), art)
+                return
+            grupper = self._grupper[felt]
+            grupper.get(gammel or '', {}).pop(art._nr, None)
+            grupper.setdefault(ny or '', {})[art._nr] = art
+
+    def __iter__(self):
+        return iter(self.arter)
+
+    def __len__(self):
+        return len(self.arter)
+
+    def __getitem__(self, nr):
+        return self.arter[nr]
+
+    def finn(self, latinsk_navn):
+        """Arten med dette latinske navnet (uten hensyn til store bokstaver og mellomrom), eller None"""
+        return self._latin.get(art_nøkkel(latinsk_navn))
+
+    def _gruppe(self, felt, verdi):
+        with self._lås:
+            gruppe = self._grupper[felt].get(verdi or '', {})
+            return [gruppe[nr] for nr in sorted(gruppe)]
+
+    def i_familie(self, familie):
+        return self._gruppe('familie', familie)
+
+    def med_status(self, bilde_status):
+        return self._gruppe('bilde_status', bilde_status)
+
+    def telling(self, felt):
+        """{verdi: antall} for 'familie' eller 'bilde_status', uten å gå gjennom radene"""
+        with self._lås:
+            return {verdi: len(gruppe) for verdi, gruppe in self._grupper[felt].items() if gruppe}
+
+    def legg_til_kolonner(self, felter):
+        for felt in felter:
+            if felt not in self.kolonner:
+                self.kolonner.append(felt)
+
+    @classmethod
+    def les(cls, csv_fil):
+        """Leser en CSV i skript- eller app-skjemaet"""
+        overskytende = []
+        with open(csv_fil, 'r', encoding='utf-8', newline='') as f:
+            reader = csv.reader(f)
+            tabell = cls(next(reader, []))
+            kolonner = tabell.kolonner
+            for verdier in reader:
+                # Som DictReader: tomme linjer hoppes over, manglende kolonner finnes ikke, tomme felt er ''
+                if not any(verdier):
+                    continue
+                if any(verdier[len(kolonner):]):
+                    overskytende.append(reader.line_num)
+                tabell.legg_til(zip(kolonner, verdier))
+        if overskytende:
+            # DictReader ville lagt dem under nøkkelen None; her har de ingen kolonne å høre til
+            linjer = ', '.join(map(str, overskytende[:10])) + (' ...' if len(overskytende) > 10 else '')
+            print(f"⚠️ {csv_fil}: {len(overskytende)} rader har verdier utenfor headeren, de er droppet "
+                  f"(linje {linjer})", file=sys.stderr)
+        return tabell
+
+    def skriv(self, csv_fil, skjema=None, kolonner=None):
+        """
+        Skriver tabellen atomisk. Med `skjema` får kolonnene navnene i det
+        skjemaet, ellers skrives de som de ble lest (pluss kolonner som er lagt til)
+        """
+        kolonner = list(kolonner or self.kolonner)
+        if skjema == 'app':
+            kolonner = [SKRIPT_TIL_APP.get(k, k) for k in kolonner]
+        elif skjema == 'skript':
+            til_skript = {app: skript for skript, app in SKRIPT_TIL_APP.items()}
+            kolonner = [til_skript.get(k, k) for k in kolonner]
+        return skriv_atomisk(csv_fil, kolonner, ({k: art.get(k) or '' for k in kolonner} for art in self.arter))
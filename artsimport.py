@@ -0,0 +1,333 @@
+"""
+Import av store artslister (sjekklister fra Artsdatabanken, GBIF o.l.) til
+skriptskjemaet, så nye arter kan gå videre til berikingen:
+
+    python3 artsimport.py sjekkliste.zip -o nye_arter.csv
+    python3 plantepugger.py -i nye_arter.csv normalize enrich-norskflora
+
+Input er en CSV/TSV eller et Darwin Core-arkiv (DwC-A, .zip med meta.xml).
+Filen leses én rad om gangen og skrives etter hvert, så en liste med 10 000+
+taksa holdes aldri i minnet. Bare norske navn fra DwC-arkivets
+VernacularName-utvidelse leses inn først, siden de må kobles på kjernefilen.
+
+Radene filtreres til karplanter på artsnivå med gyldig navn og et norsk navn,
+og arter som finnes fra før (--mot, sammenlignet på latinsk navn som i
+journal.py) eller som kommer to ganger i listen, hoppes over. Familie og Type
+settes fra slekten i eksisterende data når den finnes der, ellers fra tabellene
+under - og til slutt det latinske familienavnet og Urt/staude.
+"""
+import argparse
+import csv
+import io
+import os
+import xml.etree.ElementTree as ET
+import zipfile
+from collections import Counter, defaultdict
+
+from csvfil import les_rader, skriv_atomisk
+from journal import art_nøkkel
+from skjema import SKJEMAER, finn_skjema, kolonne
+
+# Kolonnene importen fyller; resten av skriptskjemaet fylles av berikingen
+KOLONNER = SKJEMAER['skript'][:4]
+
+# Kolonnenavn i kjente eksporter (små bokstaver) -> feltet de betyr her.
+# DwC-termer, GBIF-eksport og Artsdatabankens artsnavnebase
+ALIASER = {
+    'taxonid': 'id', 'id': 'id', 'coreid': 'id', 'pk_latinsknavnid': 'id',
+    'scientificname': 'navn', 'validscientificname': 'navn', 'vitenskapelig navn': 'navn',
+    'latinsk navn': 'navn', 'latinsk_navn': 'navn',
+    'canonicalname': 'kanonisk',
+    'genus': 'slekt', 'slekt': 'slekt',
+    'specificepithet': 'epitet', 'art': 'epitet',
+    'vernacularname': 'norsk', 'popularname': 'norsk', 'populærnavnbokmål': 'norsk',
+    'populærnavn': 'norsk', 'norsk navn': 'norsk', 'norsk_navn': 'norsk',
+    'language': 'språk', 'ispreferredname': 'foretrukket',
+    'family': 'familie', 'familie': 'familie',
+    'class': 'klasse', 'klasse': 'klasse',
+    'phylum': 'rekke', 'rekke': 'rekke',
+    'kingdom': 'rike', 'rike': 'rike',
+    'taxonrank': 'rang', 'rang': 'rang', 'rank': 'rang', 'taksonnivå': 'rang',
+    'taxonomicstatus': 'status', 'hovedstatus': 'status', 'status': 'status',
+}
+
+# Karplanter, med klassene både GBIF og Artsdatabanken bruker
+KARPLANTEKLASSER = {
+    'magnoliopsida', 'liliopsida', 'polypodiopsida', 'lycopodiopsida', 'pinopsida',
+    'gnetopsida', 'cycadopsida', 'ginkgoopsida', 'equisetopsida',
+}
+KARPLANTEREKKER = {'tracheophyta', 'karplanter'}
+
+ARTSRANGER = {'species', 'art', ''}
+GYLDIGE = {'accepted', 'valid', 'gyldig', 'doubtful', ''}
+NORSKE_SPRÅK = ('nb', 'no', 'nob', 'nor', 'nn', 'nno')
+
+# Norske familienavn slik de står i datasettet
+FAMILIER = {
+    'Adoxaceae': 'Moskusurtfamilien', 'Amaranthaceae': 'Amarantfamilien', 'Amaryllidaceae': 'Løkfamilien',
+    'Apiaceae': 'Skjermplantefamilien', 'Asparagaceae': 'Aspargesfamilien', 'Asteraceae': 'Kurvplantefamilien',
+    'Betulaceae': 'Bjørkefamilien', 'Boraginaceae': 'Rubladfamilien', 'Brassicaceae': 'Korsblomstfamilien',
+    'Campanulaceae': 'Klokkefamilien', 'Caprifoliaceae': 'Kaprifolfamilien', 'Caryophyllaceae': 'Nellikfamilien',
+    'Crassulaceae': 'Bergknappfamilien', 'Cupressaceae': 'Sypressfamilien', 'Cyperaceae': 'Starrfamilien',
+    'Droseraceae': 'Soldoggfamilien', 'Equisetaceae': 'Snellefamilien', 'Ericaceae': 'Lyngfamilien',
+    'Euphorbiaceae': 'Vortemelkfamilien', 'Fabaceae': 'Erteblomstfamilien', 'Fagaceae': 'Bøkefamilien',
+    'Gentianaceae': 'Søterotfamilien', 'Geraniaceae': 'Storkenebbfamilien', 'Hypericaceae': 'Perikumfamilien',
+    'Iridaceae': 'Sverdliljefamilien', 'Juncaceae': 'Sivfamilien', 'Lamiaceae': 'Leppeblomstfamilien',
+    'Lentibulariaceae': 'Blærerotfamilien', 'Lycopodiaceae': 'Kråkefotfamilien', 'Malvaceae': 'Kattostfamilien',
+    'Menyanthaceae': 'Bukkebladfamilien', 'Oleaceae': 'Oljetrefamilien', 'Onagraceae': 'Mjølkefamilien',
+    'Orchidaceae': 'Orkidéfamilien', 'Orobanchaceae': 'Snylterotfamilien', 'Oxalidaceae': 'Gjøkesyrefamilien',
+    'Papaveraceae': 'Valmuefamilien', 'Pinaceae': 'Furufamilien', 'Plantaginaceae': 'Kjempefamilien',
+    'Poaceae': 'Grasfamilien', 'Polygonaceae': 'Slireknefamilien', 'Potamogetonaceae': 'Tjønnaksfamilien',
+    'Primulaceae': 'Nøkleblomfamilien', 'Ranunculaceae': 'Soleiefamilien', 'Rosaceae': 'Rosefamilien',
+    'Rubiaceae': 'Maurefamilien', 'Salicaceae': 'Vierfamilien', 'Sapindaceae': 'Såpebærfamilien',
+    'Saxifragaceae': 'Sildrefamilien', 'Taxaceae': 'Barlindfamilien', 'Ulmaceae': 'Almefamilien',
+    'Urticaceae': 'Neslefamilien', 'Violaceae': 'Fiolfamilien',
+}
+
+TYPE_FOR_FAMILIE = {
+    'Poaceae': 'Gressplante', 'Cyperaceae': 'Gressplante', 'Juncaceae': 'Gressplante',
+    'Ericaceae': 'Lyngplante', 'Lycopodiaceae': 'Kråkefotplante',
+    'Betulaceae': 'Tre/busk', 'Fagaceae': 'Tre/busk', 'Salicaceae': 'Tre/busk', 'Pinaceae': 'Tre/busk',
+    'Cupressaceae': 'Tre/busk', 'Taxaceae': 'Tre/busk', 'Ulmaceae': 'Tre/busk', 'Oleaceae': 'Tre/busk',
+    'Sapindaceae': 'Tre/busk', 'Adoxaceae': 'Tre/busk',
+}
+TYPE_FOR_KLASSE = {'polypodiopsida': 'Bregne', 'equisetopsida': 'Bregne', 'lycopodiopsida': 'Kråkefotplante',
+                   'pinopsida': 'Tre/busk'}
+STANDARD_TYPE = 'Urt/staude'
+
+def felt(rad, navn):
+    return (rad.get(navn) or '').strip()
+
+def artsnavn(rad):
+    """Binomialet uten autor: 'Ulmus glabra Huds.' -> 'Ulmus glabra', hybrider beholder ×"""
+    if felt(rad, 'kanonisk'):
+        return felt(rad, 'kanonisk')
+    if felt(rad, 'slekt') and felt(rad, 'epitet') and not felt(rad, 'navn'):
+        return f"{felt(rad, 'slekt')} {felt(rad, 'epitet')}"
+    ord_ = felt(rad, 'navn').split()
+    if len(ord_) >= 3 and ord_[1] in ('×', 'x'):
+        return ' '.join([ord_[0], '×', ord_[2]])
+    return ' '.join(ord_[:2])
+
+def er_karplante(rad):
+    """Sant for karplanter. Lister uten klasse eller rekke regnes som karplantelister"""
+    rike = felt(rad, 'rike').lower()
+    if rike and rike not in ('plantae', 'planter'):
+        return False
+    rekke, klasse = felt(rad, 'rekke').lower(), felt(rad, 'klasse').lower()
+    if rekke or klasse:
+        return rekke in KARPLANTEREKKER or klasse in KARPLANTEKLASSER
+    return True
+
+def oversett_kolonner(header):
+    """Header-rad -> liste med feltnavn (None for kolonner vi ikke bruker)"""
+    return [ALIASER.get(navn.strip().lower().lstrip('\ufeff')) for navn in header]
+
+def _rader(reader, felter):
+    for verdier in reader:
+        yield {f: v for f, v in zip(felter, verdier) if f}
+
+def _tekst(fil, encoding='utf-8'):
+    return io.TextIOWrapper(fil, encoding=encoding, errors='replace', newline='')
+
+def les_csv(sti):
+    """Strømmer rader fra en CSV/TSV med feltnavn fra ALIASER. Skilletegnet gjettes fra første linje"""
+    with open(sti, 'r', encoding='utf-8-sig', errors='replace', newline='') as f:
+        første = f.readline()
+        skille = max('\t;,', key=første.count)
+        f.seek(0)
+        reader = csv.reader(f, delimiter=skille)
+        yield from _rader(reader, oversett_kolonner(next(reader, [])))
+
+class DwcArkiv:
+    """Et Darwin Core-arkiv: kjernefilen (taksa) og VernacularName-utvidelsen fra meta.xml"""
+
+    def __init__(self, sti):
+        self.sti = sti
+        with zipfile.ZipFile(sti) as z:
+            rot = ET.fromstring(z.read('meta.xml'))
+        self.kjerne = None
+        self.navn = None
+        for element in rot:
+            tag = element.tag.rsplit('}', 1)[-1]
+            rad_type = element.get('rowType', '')
+            if tag == 'core':
+                self.kjerne = self._fil(element)
+            elif tag == 'extension' and rad_type.endswith('VernacularName'):
+                self.navn = self._fil(element)
+        if self.kjerne is None:
+            raise ValueError(f"{sti}: meta.xml har ingen core")
+
+    @staticmethod
+    def _fil(element):
+        def attr(navn, standard):
+            return element.get(navn, standard).encode().decode('unicode_escape')
+
+        felter = {}
+        for barn in element:
+            tag = barn.tag.rsplit('}', 1)[-1]
+            if tag in ('id', 'coreid'):
+                felter[int(barn.get('index'))] = 'id'
+            elif tag == 'field' and barn.get('index') is not None:
+                term = barn.get('term', '').rsplit('/', 1)[-1].lower()
+                if ALIASER.get(term):
+                    # id-kolonnen vinner over et taxonID-felt på samme plass
+                    felter.setdefault(int(barn.get('index')), ALIASER[term])
+        plassering = next(barn for barn in element.iter() if barn.tag.rsplit('}', 1)[-1] == 'location')
+        return {
+            'fil': plassering.text.strip(),
+            'skille': attr('fieldsTerminatedBy', ','),
+            'sitat': attr('fieldsEnclosedBy', '"'),
+            'hopp': int(element.get('ignoreHeaderLines', '0')),
+            'encoding': element.get('encoding', 'utf-8'),
+            'felter': [felter.get(i) for i in range(max(felter) + 1)] if felter else [],
+        }
+
+    def _les(self, fil):
+        with zipfile.ZipFile(self.sti) as z, z.open(fil['fil']) as rå:
+            tekst = _tekst(rå, fil['encoding'])
+            if fil['sitat']:
+                reader = csv.reader(tekst, delimiter=fil['skille'], quotechar=fil['sitat'])
+            else:
+                reader = csv.reader(tekst, delimiter=fil['skille'], quoting=csv.QUOTE_NONE)
+            for _ in range(fil['hopp']):
+                next(reader, None)
+            yield from _rader(reader, fil['felter'])
+
+    def norske_navn(self):
+        """{takson-id: norsk navn}. Foretrukne bokmålsnavn vinner over andre"""
+        navn = {}
+        beste = {}
+        if self.navn is None:
+            return navn
+        for rad in self._les(self.navn):
+            id_, norsk, språk = felt(rad, 'id'), felt(rad, 'norsk'), felt(rad, 'språk').lower()
+            if not norsk or (språk and språk not in NORSKE_SPRÅK):
+                continue
+            rangering = (felt(rad, 'foretrukket').lower() in ('true', '1', 'ja'), språk in ('nb', 'nob', 'no', 'nor'))
+            if id_ not in beste or rangering > beste[id_]:
+                navn[id_] = norsk
+                beste[id_] = rangering
+        return navn
+
+    def rader(self):
+        navn = self.norske_navn()
+        for rad in self._les(self.kjerne):
+            if not felt(rad, 'norsk') and felt(rad, 'id') in navn:
+                rad['norsk'] = navn[felt(rad, 'id')]
+            yield rad
+
+def les_liste(sti):
+    if zipfile.is_zipfile(sti):
+        return DwcArkiv(sti).rader()
+    return les_csv(sti)
+
+class Eksisterende:
+    """
+    Artene vi har fra før: et sett med art_nøkkel for duplikatsjekken, og
+    (familie, type) per slekt, så nye arter i kjente slekter får det samme som naboene.
+    """
+
+    def __init__(self):
+        self.nøkler = set()
+        self.slekter = defaultdict(Counter)
+
+    def les(self, sti):
+        rader = les_rader(sti)
+        skjema = finn_skjema(next(rader))
+        latinsk, familie, type_ = (kolonne(skjema, f) for f in ('Latinsk navn', 'Familie', 'Type'))
+        for row in rader:
+            nøkkel = art_nøkkel(row.get(latinsk))
+            if not nøkkel:
+                continue
+            self.nøkler.add(nøkkel)
+            verdier = ((row.get(familie) or '').strip(), (row.get(type_) or '').strip())
+            if verdier[0]:
+                self.slekter[nøkkel.split()[0]][verdier] += 1
+
+    def slekt(self, nøkkel):
+        """(familie, type) flest arter i slekten har, så en feilført rad ikke bestemmer for resten"""
+        telling = self.slekter.get(nøkkel.split()[0])
+        return telling.most_common(1)[0][0] if telling else ('', '')
+
+    def __contains__(self, nøkkel):
+        return nøkkel in self.nøkler
+
+def importer(rader, eksisterende, telling):
+    """Filtrerer og oversetter radene. Gir nye rader i skriptskjemaet etter hvert"""
+    sett = set()
+    for rad in rader:
+        telling['lest'] += 1
+        if not er_karplante(rad):
+            telling['ikke karplante'] += 1
+            continue
+        if felt(rad, 'rang').lower() not in ARTSRANGER or felt(rad, 'status').lower() not in GYLDIGE:
+            telling['ikke gyldig art'] += 1
+            continue
+        latinsk = artsnavn(rad)
+        nøkkel = art_nøkkel(latinsk)
+        if len(nøkkel.split()) < 2:
+            telling['ikke gyldig art'] += 1
+            continue
+        norsk = felt(rad, 'norsk')
+        if not norsk:
+            telling['uten norsk navn'] += 1
+            continue
+        if nøkkel in eksisterende:
+            telling['finnes fra før'] += 1
+            continue
+        if nøkkel in sett:
+            telling['duplikat'] += 1
+            continue
+        sett.add(nøkkel)
+
+        latinsk_familie = felt(rad, 'familie')
+        kjent_familie, kjent_type = eksisterende.slekt(nøkkel)
+        type_ = (kjent_type or TYPE_FOR_FAMILIE.get(latinsk_familie)
+                 or TYPE_FOR_KLASSE.get(felt(rad, 'klasse').lower()) or STANDARD_TYPE)
+        telling['ny'] += 1
+        yield {
+            'Norsk navn': norsk[:1].upper() + norsk[1:],
+            'Latinsk navn': latinsk,
+            'Familie': kjent_familie or FAMILIER.get(latinsk_familie, latinsk_familie),
+            'Type': type_,
+        }
+
+def main():
+    parser = argparse.ArgumentParser(description="Importerer nye karplanter fra en stor artsliste (CSV/TSV eller DwC-A)")
+    parser.add_argument('liste', help="CSV/TSV eller Darwin Core-arkiv (.zip)")
+    parser.add_argument('-o', '--output', default='nye_arter.csv', help="Nye arter i skriptskjemaet")
+    parser.add_argument('--mot', nargs='*', default=['midlertidig.csv', 'public/data/blomster.csv'],
+                        help="CSV-er med artene vi har fra før")
+    parser.add_argument('--maks', type=int, default=None, help="Ta med høyst så mange nye arter")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.liste):
+        print(f"❌ Finner ikke: {args.liste}")
+        raise SystemExit(1)
+
+    eksisterende = Eksisterende()
+    for sti in args.mot:
+        if os.path.exists(sti):
+            eksisterende.les(sti)
+    print(f"📚 {len(eksisterende.nøkler)} arter fra før, {len(eksisterende.slekter)} kjente slekter")
+
+    telling = Counter()
+    try:
+        nye = importer(les_liste(args.liste), eksisterende, telling)
+        if args.maks is not None:
+            nye = (row for _, row in zip(range(args.maks), nye))
+        antall = skriv_atomisk(args.output, KOLONNER, nye)
+    except (ValueError, KeyError, zipfile.BadZipFile) as e:
+        print(f"❌ Kunne ikke lese {args.liste}: {e}")
+        raise SystemExit(1)
+
+    print(f"📊 {telling['lest']} taksa lest: {telling['ny']} nye, {telling['finnes fra før']} fra før, {telling['duplikat']} duplikater, "
+          f"{telling['uten norsk navn']} uten norsk navn, {telling['ikke karplante']} ikke karplanter, "
+          f"{telling['ikke gyldig art']} synonymer/andre nivåer")
+    print(f"📁 Lagret {antall} nye arter: {args.output}")
+    if antall:
+        print(f"   Neste: python3 plantepugger.py -i {args.output} normalize enrich-norskflora")
+
+if __name__ == "__main__":
+    main()
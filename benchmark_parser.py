@@ -0,0 +1,148 @@
+import argparse
+import csv
+import glob
+import os
+import statistics
+import time
+
+from overskrift import BACKENDS, finn_overskrift
+from sidearkiv import STANDARD_STI, Sidearkiv
+
+def lag_eksempelside(norsk_navn, latinsk_navn, med_klasse=True, fyll=40):
+    """
+    Lager en norskflora-lignende side: tung <head> med innebygd JSON, logo-h1,
+    meny, overskriftsrad, slideshow og en lang artsbeskrivelse. Brukes når det
+    ikke finnes arkiverte eller lagrede sider.
+    """
+    slekt, art = (latinsk_navn.split() + ['', ''])[:2]
+    h1_klasse = ' class="planteoverskrift"' if med_klasse else ''
+    json_data = ','.join(
+        f'{{"id":{i},"navn":"art{i}","bilde":"https:\\/\\/bilder.norskflora.no\\/800px\\/b{i}.jpg"}}'
+        for i in range(fyll * 5)
+    )
+    beskrivelse = ''.join(
+        f'<p class="beskrivelse">Avsnitt {i} om {norsk_navn} ({latinsk_navn}). '
+        f'Vokser i eng, veikant og skogkant. <a href="/ord/{i}">ordforklaring</a></p>'
+        for i in range(fyll)
+    )
+    meny = ''.join(f'<li><a href="/meny/{i}">Meny {i}</a></li>' for i in range(fyll))
+    return f'''<!DOCTYPE html>
+<html lang="no"><head>
+<meta charset="utf-8"><title>{norsk_navn} - norskflora.no</title>
+<link rel="stylesheet" href="/static/app.css"><script src="/static/app.js"></script>
+<script id="__DATA__" type="application/json">[{json_data}]</script>
+</head><body>
+<header><h1 class="logo">norskflora.no</h1><nav><h1>Meny</h1><ul>{meny}</ul></nav></header>
+<main>
+<div class="overskriftsrad"><h1{h1_klasse}>{norsk_navn}</h1>
+<a class="botnavn" href="/plante/?sle={slekt}&amp;art={art}">{latinsk_navn}</a></div>
+<div class="slideshow"><img src="https://bilder.norskflora.no/orig/{slekt.lower()}-{art}.jpg" alt="{norsk_navn}"></div>
+{beskrivelse}
+</main>
+<footer><p>Støtt norskflora.no</p></footer>
+</body></html>'''
+
+def les_sider(mappe):
+    sider = {}
+    for sti in sorted(glob.glob(os.path.join(mappe, '*.html'))):
+        with open(sti, 'rb') as f:
+            sider[os.path.basename(sti)] = f.read()
+    return sider
+
+def les_arkiv(sti):
+    """Den siste versjonen av hver side i sidearkivet, med URL-en som navn"""
+    if not os.path.exists(sti):
+        return {}
+    arkiv = Sidearkiv(sti)
+    try:
+        return {url: arkiv.innhold(hash_) for url, hash_, _ in arkiv.siste_versjoner()}
+    finally:
+        arkiv.lukk()
+
+def syntetiske_sider(csv_fil='public/data/blomster.csv', antall=50):
+    sider = {}
+    with open(csv_fil, 'r', encoding='utf-8') as f:
+        for i, row in enumerate(csv.DictReader(f)):
+            if i >= antall:
+                break
+            # Hver femte side uten klassen, så reservemetodene også blir målt
+            html = lag_eksempelside(row['norsk_navn'], row['latinsk_navn'], med_klasse=i % 5 != 0)
+            sider[f"syntetisk_{i:03d}.html"] = html.encode('utf-8')
+    return sider
+
+def ta_opp(csv_fil, arkiv_sti, antall, url_kolonne='norskflora_url'):
+    """Laster ned ekte sider for de første artene i CSV-en og legger dem i sidearkivet"""
+    from litenapp import hent_side
+    from nettverk import Vertspause, lag_sesjon
+
+    sesjon = lag_sesjon(1)
+    vertspause = Vertspause(1.0)
+    arkiv = Sidearkiv(arkiv_sti)
+
+    with open(csv_fil, 'r', encoding='utf-8') as f:
+        rows = [r for r in csv.DictReader(f) if r.get(url_kolonne)][:antall]
+
+    try:
+        for row in rows:
+            url = row[url_kolonne].strip()
+            try:
+                response = hent_side(url, sesjon=sesjon, vertspause=vertspause)
+            except Exception as e:
+                print(f"   ❌ {url}: {e}")
+                continue
+            arkiv.lagre(url, response)
+            print(f"   💾 {url} ({len(response.content)} bytes)")
+    finally:
+        arkiv.lukk()
+
+def mål(backend, sider, runder):
+    """Gir tid per side i millisekunder for hver runde, og resultatet per side"""
+    tider = []
+    resultater = {}
+    for _ in range(runder):
+        start = time.perf_counter()
+        for navn, html in sider.items():
+            resultater[navn] = finn_overskrift(html, backend, vis=False)
+        tider.append((time.perf_counter() - start) * 1000 / len(sider))
+    return tider, resultater
+
+def main():
+    parser = argparse.ArgumentParser(description="Måler parsetid per side for hver parser-backend")
+    parser.add_argument('--arkiv', default=STANDARD_STI, help="Sidearkivet (fra sidearkiv.py) som sidene leses fra")
+    parser.add_argument('--sider', help="Mappe med lagrede .html-sider, brukes i stedet for arkivet")
+    parser.add_argument('--runder', type=int, default=5)
+    parser.add_argument('--ta-opp', metavar='CSV', help="Last ned sider for artene i CSV-en til --arkiv først")
+    parser.add_argument('--antall', type=int, default=30, help="Antall sider som tas opp")
+    args = parser.parse_args()
+
+    if args.ta_opp:
+        print(f"📥 Tar opp sider fra {args.ta_opp} til {args.arkiv}")
+        ta_opp(args.ta_opp, args.arkiv, args.antall)
+
+    kilde = args.sider or args.arkiv
+    sider = les_sider(args.sider) if args.sider else les_arkiv(args.arkiv)
+    if not sider:
+        print(f"⚠️ Ingen lagrede sider i {kilde} - bruker syntetiske norskflora-sider")
+        sider = syntetiske_sider()
+
+    snitt_kb = sum(len(h) for h in sider.values()) / len(sider) / 1024
+    print(f"📄 {len(sider)} sider, snitt {snitt_kb:.0f} KB, {args.runder} runder")
+    print()
+    print(f"{'backend':<12} {'median ms/side':>15} {'beste ms/side':>14}  avvik")
+
+    # html.parser er den opprinnelige implementasjonen og regnes som fasit
+    _, fasit = mål('html.parser', sider, 1)
+
+    for backend in BACKENDS:
+        try:
+            tider, resultater = mål(backend, sider, args.runder)
+        except ImportError as e:
+            print(f"{backend:<12} {'-':>15} {'-':>14}  ikke installert ({e.name})")
+            continue
+
+        ulike = [navn for navn in sider if resultater[navn] != fasit[navn]]
+        avvik = f"{len(ulike)} ulike" if ulike else "ingen"
+        print(f"{backend:<12} {statistics.median(tider):>15.3f} {min(tider):>14.3f}  {avvik}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,625 @@
+"""
+Måler skrapene og linksjekken mot opptak av norskflora.no og Wikipedia.
+
+    python3 benchmark_skraping.py --ta-opp          # last ned svarene én gang
+    python3 benchmark_skraping.py --lagre-baseline  # mål og lagre som fasit
+    python3 benchmark_skraping.py --streng          # mål, sammenlign og feil ved regresjoner
+
+Opptakene spilles av fra en lokal HTTP-server i en egen prosess, med en fast
+forsinkelse per svar som ligner nettet. Mangler et opptak, lager serveren en
+syntetisk side (se benchmark_parser.lag_eksempelside) eller et syntetisk
+API-svar. Uten --ta-opp er målingene altså syntetiske: de måler skrapenes og
+linksjekkens egen kostnad, ikke ekte norskflora-markup.
+
+For hver rørledning og hvert antall samtidige måles rader per sekund,
+CPU-tid per rad, p50/p95 for latens per rad og høyeste minnebruk
+(tracemalloc). Hver måling er medianen av --runder kjøringer og sammenlignes
+med baseline: verre enn både den relative grensen og støygulvet i GRENSER er
+en regresjon. Tidene avhenger av maskinen, så opptak og baseline ligger ikke
+i repoet, og regresjoner gir bare kode 1 med --streng. Før målingene
+kontrolleres det at sjekk_csv_linker_parallelt gir samme rapport som den
+sekvensielle linksjekken, holder seg innenfor antall samtidige og ikke
+etterlater tråder.
+
+Med --med-chrome måles også Chrome-rendringen alene, med full sidelast
+(selenium_full) og med rask rendring (selenium_rask, se app.py). Serveren
+leverer da CSS, skrift og bakgrunnsbilde til sidene som en ekte side ville.
+"""
+import argparse
+import csv
+import hashlib
+import json
+import multiprocessing
+import os
+import socket
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import urllib.parse
+from contextlib import redirect_stderr, redirect_stdout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from benchmark_parser import lag_eksempelside
+
+STANDARD_MAPPE = "fixtures/opptak"
+STANDARD_BASELINE = "fixtures/benchmark_baseline.json"
+
+# Når en måling regnes som verre: (relativ grense, støygulv i målingens enhet).
+# Begge må overskrides. Alle er "lavere er bedre"; rader/s sammenlignes som ms per rad.
+# Veggtid varierer mer mellom kjøringer enn CPU-tid, så den har rausere grenser
+GRENSER = {
+    'ms_per_rad': (0.35, 1.0),
+    'cpu_ms_per_rad': (0.25, 0.2),
+    'p50_ms': (0.35, 2.0),
+    'p95_ms': (0.5, 5.0),
+    'topp_minne_kb': (0.2, 256),
+}
+
+def opptaksnøkkel(sti):
+    """Filnavnet et svar lagres under, ut fra sti og query slik serveren ser dem"""
+    return hashlib.sha1(sti.encode('utf-8')).hexdigest()[:16]
+
+def les_arter(csv_fil, antall):
+    """De første `antall` radene med norsk navn, latinsk navn og norskflora-URL"""
+    arter = []
+    with open(csv_fil, 'r', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            norsk = (row.get('norsk_navn') or row.get('Norsk navn') or '').strip()
+            latinsk = (row.get('latinsk_navn') or row.get('Latinsk navn') or '').strip()
+            url = (row.get('norskflora_url') or '').strip()
+            if norsk and len(latinsk.split()) >= 2 and url:
+                arter.append({'norsk': norsk, 'latinsk': latinsk, 'url': url})
+            if len(arter) >= antall:
+                break
+    return arter
+
+class Opptak:
+    """Svarene fra et opptak: index.json med status og headere, og innholdet i egne filer"""
+
+    def __init__(self, mappe):
+        self.mappe = mappe
+        self.index_sti = os.path.join(mappe, 'index.json')
+        self.index = {}
+        if os.path.exists(self.index_sti):
+            with open(self.index_sti, 'r', encoding='utf-8') as f:
+                self.index = json.load(f)
+
+    def lagre_svar(self, response, *args, **kwargs):
+        """Response-hook for requests: lagrer hvert svar, også redirects, under stien det ble hentet fra"""
+        sti = response.request.path_url
+        nøkkel = opptaksnøkkel(sti)
+        with open(os.path.join(self.mappe, f"{nøkkel}.bin"), 'wb') as f:
+            f.write(response.content)
+        self.index[sti] = {
+            'fil': f"{nøkkel}.bin",
+            'status': response.status_code,
+            'content_type': response.headers.get('Content-Type', ''),
+            'location': response.headers.get('Location', ''),
+        }
+
+    def skriv(self):
+        with open(self.index_sti + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(self.index, f, ensure_ascii=False, indent=1, sort_keys=True)
+        os.replace(self.index_sti + '.tmp', self.index_sti)
+
+def ta_opp(csv_fil, mappe, antall):
+    """Henter norskflora-sidene og Wikipedia-svarene for de første artene og lagrer dem"""
+    from litenapp import hent_side
+    from nettverk import Vertspause, lag_sesjon
+    from wikipediahenter import WikipediaHenter
+
+    os.makedirs(mappe, exist_ok=True)
+    opptak = Opptak(mappe)
+    sesjon = lag_sesjon(1)
+    sesjon.hooks['response'].append(opptak.lagre_svar)
+    vertspause = Vertspause(1.0)
+
+    arter = les_arter(csv_fil, antall)
+    for art in arter:
+        try:
+            hent_side(art['url'], sesjon=sesjon, vertspause=vertspause)
+        except Exception as e:
+            print(f"   ❌ {art['url']}: {e}")
+            continue
+        print(f"   💾 {art['latinsk']}")
+
+    henter = WikipediaHenter(antall_arbeidere=1, pause=1.0, sesjon=sesjon)
+    henter.finn_artikler([art['latinsk'] for art in arter])
+    print(f"   💾 {henter.forespørsler} Wikipedia-svar")
+
+    opptak.skriv()
+    print(f"📼 {len(opptak.index)} svar i {opptak.index_sti}")
+
+# Ressursene de syntetiske sidene laster i Chrome: /static/app.css drar med seg en
+# skrift og et bakgrunnsbilde. (content type, innhold)
+STATISKE = {
+    '/static/app.css': ('text/css', b"@font-face { font-family: Flora; src: url(/static/flora.woff2); }\n"
+                                    b"body { font-family: Flora; background: url(/static/bakgrunn.jpg); }\n"),
+    '/static/app.js': ('application/javascript', b"window.floraLastet = true;\n"),
+    '/static/flora.woff2': ('font/woff2', b'wOF2' + bytes(80 * 1024)),
+    '/static/bakgrunn.jpg': ('image/jpeg', b'\xff\xd8\xff' + bytes(300 * 1024)),
+}
+
+def syntetisk_wikipedia(query):
+    """MediaWiki-svar der hver tittel finnes og har et bilde"""
+    titler = query.get('titles', [''])[0].split('|')
+    sider = []
+    for tittel in titler:
+        filnavn = tittel.replace(' ', '_')
+        sider.append({
+            'title': tittel,
+            'fullurl': f"https://en.wikipedia.org/wiki/{filnavn}",
+            'original': {'source': f"https://upload.wikimedia.org/wikipedia/commons/0/00/{filnavn}.jpg"},
+            'pageimage': f"{filnavn}.jpg",
+        })
+    return json.dumps({'query': {'pages': sider}}).encode('utf-8')
+
+def kjør_server(port, mappe, forsinkelse, norske_navn):
+    """Avspillingsserveren. Kjøres i en egen prosess, så den ikke tar CPU eller minne fra målingene"""
+    opptak = Opptak(mappe)
+    vert = f"http://127.0.0.1:{port}"
+
+    class Avspiller(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        content_type = 'text/html; charset=utf-8'
+        # Headere og innhold skrives hver for seg; uten dette venter keep-alive-klienter på forsinket ACK
+        disable_nagle_algorithm = True
+
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            time.sleep(forsinkelse)
+            oppføring = opptak.index.get(self.path)
+            if oppføring:
+                with open(os.path.join(mappe, oppføring['fil']), 'rb') as f:
+                    innhold = f.read()
+                status = oppføring['status']
+                content_type = oppføring['content_type']
+                location = oppføring['location']
+            else:
+                status, content_type, location = 200, '', ''
+                innhold = self.syntetisk()
+                if innhold is None:
+                    status, innhold = 404, b'ikke funnet'
+
+            self.send_response(status)
+            self.send_header('Content-Type', content_type or self.content_type)
+            self.send_header('Content-Length', str(len(innhold)))
+            if location:
+                # Redirects i opptaket peker til den ekte verten
+                parsed = urllib.parse.urlparse(location)
+                self.send_header('Location', vert + (parsed.path or '/') + (f"?{parsed.query}" if parsed.query else ''))
+            self.end_headers()
+            self.wfile.write(innhold)
+
+        def syntetisk(self):
+            parsed = urllib.parse.urlparse(self.path)
+            query = urllib.parse.parse_qs(parsed.query)
+            if parsed.path == '/w/api.php':
+                self.content_type = 'application/json; charset=utf-8'
+                return syntetisk_wikipedia(query)
+            if parsed.path in STATISKE:
+                self.content_type, innhold = STATISKE[parsed.path]
+                return innhold
+
+            self.content_type = 'text/html; charset=utf-8'
+            if 'sle' in query and 'art' in query:
+                latinsk = f"{query['sle'][0]} {query['art'][0]}"
+            elif parsed.path.strip('/').count('-') == 1:
+                latinsk = parsed.path.strip('/').replace('-', ' ').capitalize()
+            else:
+                return None
+            norsk = norske_navn.get(latinsk.lower(), latinsk)
+            return lag_eksempelside(norsk, latinsk).encode('utf-8')
+
+    ThreadingHTTPServer.daemon_threads = True
+    ThreadingHTTPServer(('127.0.0.1', port), Avspiller).serve_forever()
+
+def ledig_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def start_server(mappe, forsinkelse, arter):
+    port = ledig_port()
+    norske_navn = {art['latinsk'].lower(): art['norsk'] for art in arter}
+    prosess = multiprocessing.Process(target=kjør_server, args=(port, mappe, forsinkelse, norske_navn), daemon=True)
+    prosess.start()
+
+    for _ in range(100):
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.1).close()
+            return prosess, f"http://127.0.0.1:{port}"
+        except OSError:
+            time.sleep(0.05)
+    prosess.terminate()
+    raise RuntimeError("Avspillingsserveren startet ikke")
+
+def lokal_url(url, basis_url):
+    """Samme sti og query, men mot avspillingsserveren"""
+    parsed = urllib.parse.urlparse(url)
+    return basis_url + parsed.path + (f"?{parsed.query}" if parsed.query else '')
+
+def skriv_csv(sti, kolonner, rader):
+    with open(sti, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=kolonner)
+        writer.writeheader()
+        writer.writerows(rader)
+
+class Rørledninger:
+    """
+    Én metode per rørledning. Hver kjører hele rørledningen én gang og gir
+    (antall rader, latenser i sekunder). Utskriftene fra skriptene går til /dev/null.
+    """
+
+    def __init__(self, arter, basis_url, mappe, fikse_rader, med_chrome=False):
+        self.arter = arter
+        self.basis_url = basis_url
+        self.mappe = mappe
+        self.fikse_rader = fikse_rader
+        self.med_chrome = med_chrome
+
+        self.linker_csv = os.path.join(mappe, 'linker.csv')
+        skriv_csv(self.linker_csv, ['Norsk navn', 'Latinsk navn', 'norskflora_url'], [
+            {'Norsk navn': a['norsk'], 'Latinsk navn': a['latinsk'], 'norskflora_url': lokal_url(a['url'], basis_url)}
+            for a in arter
+        ])
+        self.app_csv = os.path.join(mappe, 'arter.csv')
+        skriv_csv(self.app_csv, ['norsk_navn', 'latinsk_navn'], [
+            {'norsk_navn': a['norsk'], 'latinsk_navn': a['latinsk']} for a in arter
+        ])
+        self.skript_csv = os.path.join(mappe, 'skript.csv')
+        skriv_csv(self.skript_csv, ['Norsk navn', 'Latinsk navn'], [
+            {'Norsk navn': a['norsk'], 'Latinsk navn': a['latinsk']} for a in arter
+        ])
+
+    def hent_planteoverskrift(self, samtidige):
+        import litenapp
+        from nettverk import lag_sesjon
+
+        sesjon = lag_sesjon(1)
+        latenser = []
+        for art in self.arter:
+            start = time.perf_counter()
+            litenapp.hent_planteoverskrift(lokal_url(art['url'], self.basis_url), sesjon=sesjon)
+            latenser.append(time.perf_counter() - start)
+        return len(self.arter), latenser
+
+    def _med_tidtaking(self, kjør):
+        """Kjører `kjør` med sjekk_rad pakket inn, så hver rad blir tidtatt"""
+        import litenapp
+
+        original = litenapp.sjekk_rad
+        latenser = []
+
+        def tidtatt(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                latenser.append(time.perf_counter() - start)
+
+        litenapp.sjekk_rad = tidtatt
+        try:
+            resultater = kjør()
+        finally:
+            litenapp.sjekk_rad = original
+        return len(resultater), latenser
+
+    def sjekk_csv_linker(self, samtidige):
+        import litenapp
+        return self._med_tidtaking(lambda: litenapp.sjekk_csv_linker(self.linker_csv, pause=0))
+
+    def sjekk_csv_linker_parallelt(self, samtidige):
+        import litenapp
+        return self._med_tidtaking(lambda: litenapp.sjekk_csv_linker_parallelt(self.linker_csv, samtidige=samtidige,
+                                                                                 pause=0))
+
+    def kontroller_parallelt(self, samtidige):
+        """
+        Sjekker at sjekk_csv_linker_parallelt gir samme rapport som den sekvensielle,
+        aldri har mer enn `samtidige` rader i arbeid og ikke etterlater tråder.
+        Gir en liste med feil
+        """
+        import litenapp
+
+        original = litenapp.sjekk_rad
+        lås = threading.Lock()
+        i_arbeid = høyest = 0
+
+        def tellende(*args, **kwargs):
+            nonlocal i_arbeid, høyest
+            with lås:
+                i_arbeid += 1
+                høyest = max(høyest, i_arbeid)
+            try:
+                return original(*args, **kwargs)
+            finally:
+                with lås:
+                    i_arbeid -= 1
+
+        with open(os.devnull, 'w') as stille, redirect_stdout(stille), redirect_stderr(stille):
+            fasit = litenapp.sjekk_csv_linker(self.linker_csv, pause=0)
+            tråder = threading.active_count()
+            litenapp.sjekk_rad = tellende
+            try:
+                resultater = litenapp.sjekk_csv_linker_parallelt(self.linker_csv, samtidige=samtidige, pause=0)
+            finally:
+                litenapp.sjekk_rad = original
+
+        feil = []
+        if resultater != fasit:
+            ulike = sum(1 for a, b in zip(resultater, fasit) if a != b) + abs(len(resultater) - len(fasit))
+            feil.append(f"{ulike} rader ulike den sekvensielle rapporten")
+        if høyest > samtidige:
+            feil.append(f"{høyest} rader i arbeid samtidig, grensen er {samtidige}")
+        if threading.active_count() > tråder:
+            feil.append(f"{threading.active_count() - tråder} tråder lever etter at kjøringen er ferdig")
+        return feil
+
+    def behandle_csv_selenium(self, samtidige):
+        from app import NorskFloraSeleniumHenter
+        from metrikk import Metrikker
+
+        metrikker = Metrikker()
+        henter = NorskFloraSeleniumHenter(antall_arbeidere=samtidige, pause=0, basis_url=self.basis_url,
+                                          metrikker=metrikker)
+        if not self.med_chrome:
+            # Avspillingen har ingen React-app å rendre, så uten bilde i HTML er svaret det samme
+            henter.hent_bilde_selenium = lambda slekt, art: (None, None)
+        output = os.path.join(self.mappe, 'bilder.csv')
+        try:
+            henter.behandle_csv_selenium(self.skript_csv, output, gjenoppta=False)
+        finally:
+            henter.lukk()
+        return len(self.arter), metrikker.histogrammer['rad'].utvalg
+
+    def _selenium(self, rask):
+        """Bare Chrome-veien, én side om gangen, med eller uten rask rendring"""
+        from app import NorskFloraSeleniumHenter
+
+        henter = NorskFloraSeleniumHenter(pause=0, basis_url=self.basis_url, http_først=False,
+                                          rask_rendring=rask, vent=5)
+        latenser = []
+        try:
+            # Chrome startes før tidtakingen av radene
+            with henter.pool.lån():
+                pass
+            for art in self.arter:
+                slekt, navn = art['latinsk'].split()[:2]
+                start = time.perf_counter()
+                henter.hent_bilde_selenium(slekt, navn)
+                latenser.append(time.perf_counter() - start)
+        finally:
+            henter.lukk()
+        return len(self.arter), latenser
+
+    def selenium_full(self, samtidige):
+        return self._selenium(rask=False)
+
+    def selenium_rask(self, samtidige):
+        return self._selenium(rask=True)
+
+    def wikipedia(self, samtidige):
+        from wikipediahenter import WikipediaHenter
+
+        henter = WikipediaHenter(self.basis_url, antall_arbeidere=samtidige, pause=0)
+        original = henter._spør
+        latenser = []
+
+        def tidtatt(params):
+            start = time.perf_counter()
+            try:
+                return original(params)
+            finally:
+                latenser.append(time.perf_counter() - start)
+
+        henter._spør = tidtatt
+        henter.behandle_csv(self.app_csv, os.path.join(self.mappe, 'wikipedia.csv'), alle=True)
+        return len(self.arter), latenser
+
+    def fikse_kolonner(self, samtidige):
+        from test import fikse_kolonner
+
+        stor = os.path.join(self.mappe, 'stor.csv')
+        if not os.path.exists(stor):
+            rader = [{'Norsk navn': a['norsk'], 'Latinsk navn': a['latinsk'], 'norskflora_url': a['url']}
+                     for a in self.arter]
+            with open(stor, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.DictWriter(f, fieldnames=['norskflora_url', 'Latinsk navn', 'Norsk navn'])
+                writer.writeheader()
+                for i in range(self.fikse_rader):
+                    writer.writerow(rader[i % len(rader)])
+        antall = fikse_kolonner(stor, os.path.join(self.mappe, 'stor_fikset.csv'), backup=False)
+        return antall, []
+
+# (navn, metode, om den tar imot samtidige). fikse_kolonner og de sekvensielle kjøres bare én gang
+RØRLEDNINGER = [
+    ('hent_planteoverskrift', 'hent_planteoverskrift', False),
+    ('sjekk_csv_linker', 'sjekk_csv_linker', False),
+    ('sjekk_csv_linker_parallelt', 'sjekk_csv_linker_parallelt', True),
+    ('behandle_csv_selenium', 'behandle_csv_selenium', True),
+    ('wikipedia', 'wikipedia', True),
+    ('fikse_kolonner', 'fikse_kolonner', False),
+    ('selenium_full', 'selenium_full', False),
+    ('selenium_rask', 'selenium_rask', False),
+]
+
+# Måles bare med --med-chrome
+CHROME_RØRLEDNINGER = {'selenium_full', 'selenium_rask'}
+
+def persentil(verdier, p):
+    if not verdier:
+        return 0.0
+    sortert = sorted(verdier)
+    return sortert[min(len(sortert) - 1, int(p / 100 * len(sortert)))]
+
+def mål(funksjon, samtidige, runder):
+    """Kjører én rørledning `runder` ganger. Hver måling er medianen over rundene"""
+    runde_målinger = []
+    with open(os.devnull, 'w') as stille:
+        for _ in range(runder):
+            tracemalloc.start()
+            start = time.perf_counter()
+            cpu_start = time.process_time()
+            with redirect_stdout(stille), redirect_stderr(stille):
+                rader, latenser = funksjon(samtidige)
+            brukt = time.perf_counter() - start
+            cpu = time.process_time() - cpu_start
+            topp = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            runde_målinger.append({
+                'rader_per_s': rader / brukt if brukt > 0 else 0.0,
+                'cpu_ms_per_rad': cpu * 1000 / max(1, rader),
+                'p50_ms': persentil(latenser, 50) * 1000,
+                'p95_ms': persentil(latenser, 95) * 1000,
+                'topp_minne_kb': topp / 1024,
+            })
+
+    return {felt: round(statistics.median(m[felt] for m in runde_målinger), 3) for felt in runde_målinger[0]}
+
+def sammenlignbar(måling):
+    """Målingen med rader/s gjort om til ms per rad, så alle felt er lavere-er-bedre"""
+    verdier = dict(måling)
+    fart = verdier.pop('rader_per_s', 0)
+    verdier['ms_per_rad'] = 1000 / fart if fart else float('inf')
+    return verdier
+
+def sammenlign(resultater, baseline, toleranse=None):
+    """
+    Gir en liste med regresjoner: (måling, felt, baseline, nå). `toleranse`
+    overstyrer de relative grensene i GRENSER, støygulvene gjelder uansett
+    """
+    regresjoner = []
+    for navn, nå in resultater.items():
+        før = baseline.get(navn)
+        if not før:
+            continue
+        før, nå = sammenlignbar(før), sammenlignbar(nå)
+        for felt, (relativ, gulv) in GRENSER.items():
+            if felt not in før or felt not in nå:
+                continue
+            grense = toleranse if toleranse is not None else relativ
+            if nå[felt] > før[felt] * (1 + grense) and nå[felt] - før[felt] > gulv:
+                regresjoner.append((navn, felt, round(før[felt], 3), round(nå[felt], 3)))
+    return regresjoner
+
+def main():
+    parser = argparse.ArgumentParser(description="Måler skrapene og linksjekken mot opptak fra en lokal server")
+    parser.add_argument('--csv', default='public/data/blomster.csv', help="Artene som brukes i målingene")
+    parser.add_argument('--opptak', default=STANDARD_MAPPE, help="Mappe med opptatte svar")
+    parser.add_argument('--ta-opp', action='store_true', help="Hent svarene fra norskflora.no og Wikipedia først")
+    parser.add_argument('--rader', type=int, default=100, help="Antall arter per kjøring")
+    parser.add_argument('--samtidige', default='1,4,8', help="Kommaseparerte antall samtidige")
+    parser.add_argument('--runder', type=int, default=5, help="Kjøringer per måling; medianen brukes")
+    parser.add_argument('--forsinkelse', type=float, default=20, help="Millisekunder serveren venter per svar")
+    parser.add_argument('--fikse-rader', type=int, default=50000, help="Rader i CSV-en fikse_kolonner måles på")
+    parser.add_argument('--bare', help="Kommaseparerte rørledninger som skal måles (standard: alle)")
+    parser.add_argument('--med-chrome', action='store_true',
+                        help="La app.py falle tilbake til Chrome som vanlig, og mål Chrome-rendringen alene")
+    parser.add_argument('--baseline', default=STANDARD_BASELINE)
+    parser.add_argument('--lagre-baseline', action='store_true', help="Lagre målingene som ny baseline")
+    parser.add_argument('--streng', action='store_true',
+                        help="Avslutt med kode 1 ved regresjoner (bare mot en baseline fra samme maskin)")
+    parser.add_argument('--toleranse', type=float, default=None,
+                        help="Overstyr de relative grensene i GRENSER (f.eks. 0.2 = 20 %%)")
+    args = parser.parse_args()
+
+    arter = les_arter(args.csv, args.rader)
+    if not arter:
+        print(f"❌ Fant ingen arter med norskflora_url i {args.csv}")
+        raise SystemExit(1)
+
+    if args.ta_opp:
+        print(f"📥 Tar opp svar for {args.rader} arter fra {args.csv} til {args.opptak}")
+        ta_opp(args.csv, args.opptak, args.rader)
+
+    antall_opptak = len(Opptak(args.opptak).index)
+    if not antall_opptak:
+        print(f"⚠️ Ingen opptak i {args.opptak} - serveren lager syntetiske svar")
+
+    samtidige = [int(n) for n in args.samtidige.split(',') if n.strip()]
+    bare = set(args.bare.split(',')) if args.bare else None
+
+    prosess, basis_url = start_server(args.opptak, args.forsinkelse / 1000, arter)
+    print(f"📼 {antall_opptak} opptak spilles av fra {basis_url} ({args.forsinkelse:.0f} ms per svar)")
+    print(f"📋 {len(arter)} arter, samtidige {samtidige}, {args.runder} runder")
+    print()
+
+    resultater = {}
+    try:
+        with tempfile.TemporaryDirectory() as mappe:
+            rørledninger = Rørledninger(arter, basis_url, mappe, args.fikse_rader, args.med_chrome)
+            # Den samtidige linksjekken må gi samme svar som den sekvensielle før farten har noe å si
+            if not bare or 'sjekk_csv_linker_parallelt' in bare:
+                kontrollfeil = [f"sjekk_csv_linker_parallelt[{n}]: {feil}"
+                                for n in samtidige for feil in rørledninger.kontroller_parallelt(n)]
+                for feil in kontrollfeil:
+                    print(f"❌ {feil}")
+                if kontrollfeil:
+                    sys.exit(1)
+                print("✅ sjekk_csv_linker_parallelt: samme rapport som sekvensielt, innenfor grensen, ingen tråder igjen")
+                print()
+
+            print(f"{'måling':<30} {'rader/s':>9} {'CPU ms/rad':>11} {'p50 ms':>9} {'p95 ms':>9} {'topp KB':>10}")
+            for navn, metode, med_samtidige in RØRLEDNINGER:
+                if bare and navn not in bare:
+                    continue
+                if navn in CHROME_RØRLEDNINGER and not args.med_chrome:
+                    continue
+                for n in (samtidige if med_samtidige else [1]):
+                    målnavn = f"{navn}[{n}]"
+                    resultat = mål(getattr(rørledninger, metode), n, args.runder)
+                    resultater[målnavn] = resultat
+                    print(f"{målnavn:<30} {resultat['rader_per_s']:>9.1f} {resultat['cpu_ms_per_rad']:>11.2f} "
+                          f"{resultat['p50_ms']:>9.1f} {resultat['p95_ms']:>9.1f} {resultat['topp_minne_kb']:>10.0f}")
+    finally:
+        prosess.terminate()
+
+    print()
+    # Målinger med andre arter, antall eller forsinkelse kan ikke sammenlignes
+    oppsett = {'csv': args.csv, 'rader': len(arter), 'forsinkelse_ms': args.forsinkelse,
+               'fikse_rader': args.fikse_rader, 'opptak': antall_opptak}
+    if args.lagre_baseline:
+        os.makedirs(os.path.dirname(args.baseline) or '.', exist_ok=True)
+        with open(args.baseline + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump({'oppsett': oppsett, 'målinger': resultater}, f, ensure_ascii=False, indent=1, sort_keys=True)
+            f.write('\n')
+        os.replace(args.baseline + '.tmp', args.baseline)
+        print(f"💾 Baseline lagret: {args.baseline}")
+        return
+
+    # Tidene er fra én maskin, så de stopper bare kjøringen med --streng
+    merke, kode = ('❌', 1) if args.streng else ('⚠️', 0)
+    if not os.path.exists(args.baseline):
+        print(f"{merke} Ingen baseline i {args.baseline} - kjør med --lagre-baseline for å lage en")
+        sys.exit(kode)
+
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    if baseline.get('oppsett') != oppsett:
+        print(f"{merke} {args.baseline} er målt med et annet oppsett: {baseline.get('oppsett')}")
+        print(f"   nå: {oppsett}")
+        sys.exit(kode)
+    uten = [navn for navn in resultater if navn not in baseline['målinger']]
+    if uten:
+        print(f"⚠️ Ikke i baseline, sammenlignes ikke: {', '.join(uten)}")
+
+    grenser = (f"toleranse {args.toleranse:.0%}" if args.toleranse is not None
+               else "grenser fra GRENSER")
+    regresjoner = sammenlign(resultater, baseline['målinger'], args.toleranse)
+    if not regresjoner:
+        print(f"✅ Ingen regresjoner mot {args.baseline} ({grenser})")
+        return
+
+    print(f"{merke} {len(regresjoner)} regresjoner mot {args.baseline} ({grenser}):")
+    for navn, felt, før, nå in regresjoner:
+        print(f"   {navn} {felt}: {før} → {nå}")
+    sys.exit(kode)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+"""
+Sjekker at bildene i datasettet fortsatt virker, uten å laste dem ned.
+
+Hver bilde_url og wikipedia_image_url får én Range-GET på de første 1024
+bytene. Status, Content-Type og størrelse (Content-Range) sjekkes, og bredde
+og høyde leses fra headeren i de første bytene for JPEG, PNG, GIF, WebP og
+AVIF. Med --uten-maal sendes bare en HEAD (Range-GET hvis serveren nekter HEAD).
+
+Et bilde som ikke virker får 'BRUTT' i bilde_status (norskflora) eller
+wikipedia_status (Wikipedia), og bygg_datasett.py tar det ut av datasettet.
+Nettverksfeil og 5xx endrer ingenting, de kan være forbigående.
+"""
+import argparse
+import csv
+import os
+import struct
+import threading
+from collections import Counter
+
+import requests
+
+from nettverk import Vertspause, hent_med_forsøk, lag_sesjon, parallelt
+
+# Bildekolonne og statuskolonnen som merkes BRUTT for den
+BILDEKOLONNER = {'bilde_url': 'bilde_status', 'wikipedia_image_url': 'wikipedia_status'}
+
+RANGE = 'bytes=0-1023'
+
+# Mindre enn dette er en plassholder eller et ikon, ikke et plantebilde.
+# MIN_BYTES brukes bare når målene ikke kan leses
+MIN_BYTES = 512
+MIN_SIDE = 64
+
+def _jpeg_mål(data):
+    """Går gjennom segmentene til første SOF-markør, som har høyde og bredde"""
+    i = 2
+    while i + 9 <= len(data):
+        if data[i] != 0xFF:
+            return None
+        markør = data[i + 1]
+        if markør == 0xFF:
+            # Fyllbyte
+            i += 1
+            continue
+        if markør in (0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF):
+            høyde, bredde = struct.unpack('>HH', data[i + 5:i + 9])
+            return bredde, høyde
+        i += 2 + struct.unpack('>H', data[i + 2:i + 4])[0]
+    # Stor EXIF foran SOF - målene er ikke med i de første bytene
+    return None
+
+def _webp_mål(data):
+    chunk = data[12:16]
+    if chunk == b'VP8 ' and len(data) >= 30:
+        bredde, høyde = struct.unpack('<HH', data[26:30])
+        return bredde & 0x3FFF, høyde & 0x3FFF
+    if chunk == b'VP8L' and len(data) >= 25:
+        b = data[21:25]
+        return 1 + (b[0] | (b[1] & 0x3F) << 8), 1 + (b[1] >> 6 | b[2] << 2 | (b[3] & 0x0F) << 10)
+    if chunk == b'VP8X' and len(data) >= 30:
+        return 1 + int.from_bytes(data[24:27], 'little'), 1 + int.from_bytes(data[27:30], 'little')
+    return None
+
+def _avif_mål(data):
+    # 'ispe'-boksen (image spatial extents) har bredde og høyde rett etter versjon/flagg
+    i = data.find(b'ispe')
+    if i < 0 or i + 16 > len(data):
+        return None
+    return struct.unpack('>II', data[i + 8:i + 16])
+
+def bildemål(data):
+    """Gir (format, bredde, høyde) fra de første bytene av et bilde. Mål som ikke finnes er None"""
+    if data.startswith(b'\xff\xd8'):
+        mål = _jpeg_mål(data)
+        return ('jpeg',) + (mål or (None, None))
+    if data.startswith(b'\x89PNG\r\n\x1a\n') and len(data) >= 24:
+        return ('png',) + struct.unpack('>II', data[16:24])
+    if data[:6] in (b'GIF87a', b'GIF89a') and len(data) >= 10:
+        return ('gif',) + struct.unpack('<HH', data[6:10])
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return ('webp',) + (_webp_mål(data) or (None, None))
+    if data[4:8] == b'ftyp' and data[8:12] in (b'avif', b'avis'):
+        return ('avif',) + (_avif_mål(data) or (None, None))
+    return None, None, None
+
+def total_størrelse(response):
+    """Hele filens størrelse: fra Content-Range på et 206-svar, ellers Content-Length"""
+    content_range = response.headers.get('Content-Range', '')
+    if '/' in content_range and content_range.rsplit('/', 1)[1].isdigit():
+        return int(content_range.rsplit('/', 1)[1])
+    lengde = response.headers.get('Content-Length', '')
+    return int(lengde) if lengde.isdigit() and response.status_code != 206 else None
+
+class Bildesjekker:
+    """
+    Sjekker bilde-URL-er parallelt med én forespørsel per bilde. Med `mål` er
+    det en Range-GET på de første 1024 bytene så bredde og høyde kan sjekkes,
+    uten er det en HEAD.
+    """
+
+    def __init__(self, antall_arbeidere=8, pause=0.2, timeout=15, forsøk=2, mål=True,
+                 sesjon=None, vertspause=None):
+        self.antall_arbeidere = antall_arbeidere
+        self.timeout = timeout
+        self.forsøk = forsøk
+        self.mål = mål
+        self.sesjon = sesjon or lag_sesjon(antall_arbeidere)
+        self.vertspause = vertspause or Vertspause(pause)
+        self.forespørsler = 0
+        self._lås = threading.Lock()
+
+    def _send(self, metode, url, **kwargs):
+        self.vertspause.vent(url)
+        with self._lås:
+            self.forespørsler += 1
+        # HEAD prøves bare én gang; svarer den ikke, går vi rett til Range-GET
+        return hent_med_forsøk(self.sesjon, url, forsøk=1 if metode == 'HEAD' else self.forsøk,
+                               vertspause=self.vertspause, metode=metode, timeout=self.timeout,
+                               allow_redirects=True, **kwargs)
+
+    def _første_bytes(self, url):
+        """Range-GET på de første 1024 bytene. Ignorerer serveren Range, leses bare starten av svaret"""
+        response = self._send('GET', url, headers={'Range': RANGE, 'Accept': 'image/*'}, stream=True)
+        try:
+            data = response.raw.read(1024, decode_content=True) if response.status_code in (200, 206) else b''
+        finally:
+            response.close()
+        return response, data
+
+    def sjekk(self, url):
+        """
+        Gir et dict med status ('OK', 'BRUTT' eller 'FEIL' for forbigående feil),
+        grunn, http, content_type, bytes, format, bredde, høyde, etag og antall forespørsler
+        """
+        resultat = {'url': url, 'status': 'OK', 'grunn': '', 'http': None, 'content_type': '',
+                    'bytes': None, 'format': None, 'bredde': None, 'hoyde': None, 'etag': None, 'forespørsler': 1}
+        try:
+            if self.mål:
+                # Ett 206-svar gir status, hele størrelsen (Content-Range) og de første bytene
+                response, data = self._første_bytes(url)
+            else:
+                response, data = self._send('HEAD', url), b''
+                if response.status_code in (403, 405, 501):
+                    # Noen servere nekter HEAD; da gir Range-GET status og størrelse i stedet
+                    resultat['forespørsler'] += 1
+                    response, data = self._første_bytes(url)
+        except requests.exceptions.RequestException as e:
+            resultat.update(status='FEIL', grunn=type(e).__name__)
+            return resultat
+
+        resultat['http'] = response.status_code
+        resultat['content_type'] = response.headers.get('Content-Type', '').split(';')[0].strip()
+        resultat['etag'] = response.headers.get('ETag')
+        if resultat['bytes'] is None:
+            resultat['bytes'] = total_størrelse(response)
+        resultat['format'], resultat['bredde'], resultat['hoyde'] = bildemål(data)
+
+        if response.status_code >= 500 or response.status_code == 429:
+            resultat.update(status='FEIL', grunn=f"HTTP {response.status_code}")
+        elif response.status_code not in (200, 206):
+            resultat.update(status='BRUTT', grunn=f"HTTP {response.status_code}")
+        elif data.lstrip()[:1] == b'<':
+            resultat.update(status='BRUTT', grunn="HTML i stedet for bilde")
+        elif not resultat['content_type'].startswith('image/') and not resultat['format']:
+            resultat.update(status='BRUTT', grunn=f"Ikke et bilde: {resultat['content_type'] or 'ingen Content-Type'}")
+        elif resultat['bredde'] and resultat['hoyde']:
+            if min(resultat['bredde'], resultat['hoyde']) < MIN_SIDE:
+                resultat.update(status='BRUTT', grunn=f"For lite: {resultat['bredde']}x{resultat['hoyde']}")
+        elif resultat['bytes'] is not None and resultat['bytes'] < MIN_BYTES:
+            # Uten mål er størrelsen det eneste tegnet på en plassholder
+            resultat.update(status='BRUTT', grunn=f"For lite: {resultat['bytes']} bytes")
+        return resultat
+
+    def sjekk_alle(self, urler):
+        """Gir {url: resultat} for alle URL-ene, sjekket parallelt"""
+        urler = list(dict.fromkeys(urler))
+        return dict(zip(urler, parallelt(self.sjekk, urler, self.antall_arbeidere)))
+
+def oppdater_rader(rows, resultater):
+    """
+    Setter statuskolonnen til BRUTT for bilder som ikke virker, og tilbake til
+    FUNNET for bilder som virker igjen. Gir antall endrede rader per retning.
+    """
+    telling = Counter()
+    for row in rows:
+        for bildekolonne, statuskolonne in BILDEKOLONNER.items():
+            resultat = resultater.get((row.get(bildekolonne) or '').strip())
+            if not resultat or resultat['status'] == 'FEIL':
+                continue
+            status = row.get(statuskolonne) or ''
+            if resultat['status'] == 'BRUTT' and status != 'BRUTT':
+                row[statuskolonne] = 'BRUTT'
+                telling[f"{statuskolonne}: → BRUTT"] += 1
+            elif resultat['status'] == 'OK' and status == 'BRUTT':
+                row[statuskolonne] = 'FUNNET'
+                telling[f"{statuskolonne}: BRUTT → FUNNET"] += 1
+    return telling
+
+def main():
+    parser = argparse.ArgumentParser(description="Sjekker bilde-URL-ene i en CSV med HEAD/Range og merker brutte bilder")
+    parser.add_argument('input', nargs='?', default='public/data/blomster.csv')
+    parser.add_argument('output', nargs='?', default=None, help="Standard: skriv tilbake til input")
+    parser.add_argument('--arbeidere', type=int, default=8, help="Samtidige forespørsler")
+    parser.add_argument('--pause', type=float, default=0.2, help="Minste pause mellom forespørsler til samme vert")
+    parser.add_argument('--uten-maal', action='store_true', help="Bare HEAD, ikke les bredde og høyde")
+    parser.add_argument('--rapport', default='bilde_rapport.csv', help="Hvor resultatet for hver URL skrives")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.input):
+        print(f"❌ Finner ikke: {args.input}")
+        raise SystemExit(1)
+
+    with open(args.input, 'r', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        fieldnames = list(reader.fieldnames or [])
+        rows = list(reader)
+
+    urler = [(row.get(k) or '').strip() for row in rows for k in BILDEKOLONNER]
+    urler = [url for url in urler if url.startswith('http')]
+    sjekker = Bildesjekker(antall_arbeidere=args.arbeidere, pause=args.pause, mål=not args.uten_maal)
+    print(f"🖼️ Sjekker {len(set(urler))} bilder fra {args.input}")
+
+    resultater = sjekker.sjekk_alle(urler)
+    telling = Counter(r['status'] for r in resultater.values())
+
+    for felt in BILDEKOLONNER.values():
+        if felt not in fieldnames and any(r['status'] == 'BRUTT' for r in resultater.values()):
+            fieldnames.append(felt)
+    endringer = oppdater_rader(rows, resultater)
+
+    output = args.output or args.input
+    with open(output + '.tmp', 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(rows)
+    os.replace(output + '.tmp', output)
+
+    rapport_felter = ['url', 'status', 'grunn', 'http', 'content_type', 'bytes', 'format', 'bredde', 'hoyde']
+    with open(args.rapport, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=rapport_felter, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(sorted(resultater.values(), key=lambda r: (r['status'] == 'OK', r['url'])))
+
+    print(f"\n{'=' * 60}")
+    print(f"✅ OK: {telling['OK']}")
+    print(f"💔 Brutt: {telling['BRUTT']}")
+    print(f"⚠️ Forbigående feil (uendret): {telling['FEIL']}")
+    print(f"📡 {sjekker.forespørsler} forespørsler")
+    for endring, antall in sorted(endringer.items()):
+        print(f"🔁 {endring}: {antall}")
+    for resultat in [r for r in resultater.values() if r['status'] == 'BRUTT'][:15]:
+        print(f"   💔 {resultat['grunn']}: {resultat['url']}")
+    print(f"📁 Lagret: {output}, rapport: {args.rapport}")
+
+if __name__ == "__main__":
+    main()
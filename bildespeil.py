@@ -0,0 +1,279 @@
+"""
+Lokalt speil av bildene i datasettet.
+
+Laster ned hver bilde_url og wikipedia_image_url parallelt, skalerer dem ned
+til noen faste bredder som WebP i en prosesspool, og skriver et manifest som
+bygg_datasett.py leser. Filnavnene har innholdshash, så de kan caches for
+alltid. Appen (lib/bildespeil.ts) bruker bare WebP; AVIF lages bare med
+--formater webp,avif.
+
+Ved ny kjøring spørres serveren med ETag/Last-Modified fra manifestet, og et
+bilde som har samme innholdshash som sist blir ikke skalert på nytt.
+"""
+import argparse
+import csv
+import glob
+import hashlib
+import io
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+from nettverk import Vertspause, hent_med_forsøk, lag_sesjon
+
+STANDARD_MAPPE = 'public/bilder'
+STANDARD_BREDDER = [320, 640, 1024, 1600]
+BILDEKOLONNER = ('bilde_url', 'wikipedia_image_url')
+KVALITET = {'webp': 80, 'avif': 55}
+
+def bildenøkkel(sha256):
+    """Den delen av innholdshashen som brukes i filnavnene"""
+    return sha256[:16]
+
+def variantfil(nøkkel, bredde, format_):
+    """Sti til en variant, relativt til speilmappen"""
+    return f"{nøkkel[:2]}/{nøkkel}-{bredde}.{format_}"
+
+def støttede_formater(ønsket):
+    """Filtrerer bort formater Pillow ikke kan skrive her. WebP kreves alltid, det er det appen bruker"""
+    from PIL import features
+
+    formater = ['webp']
+    if 'avif' in ønsket:
+        if not features.check('avif'):
+            try:
+                import pillow_avif  # noqa: F401 - registrerer AVIF-pluginen i Pillow
+            except ImportError:
+                print("⚠️ Pillow mangler AVIF-støtte (pip install pillow-avif-plugin) - lager bare WebP")
+                return formater
+        formater.append('avif')
+    return formater
+
+def lag_varianter(data, nøkkel, bredder, formater, ut_mappe):
+    """
+    Skalerer ett bilde ned til hver bredde i hvert format. Kjøres i en egen prosess.
+    Bilder smalere enn en bredde forstørres ikke - de får én variant i egen bredde.
+    """
+    from PIL import Image, ImageOps
+
+    bilde = Image.open(io.BytesIO(data))
+    original_bredde, original_høyde = bilde.size
+
+    # For JPEG dekoder draft() rett til en mindre skala, det sparer mye tid på store originaler
+    største = min(max(bredder), original_bredde)
+    bilde.draft('RGB', (største, max(1, original_høyde * største // original_bredde)))
+    bilde = ImageOps.exif_transpose(bilde)
+    if bilde.mode not in ('RGB', 'RGBA'):
+        bilde = bilde.convert('RGBA' if 'transparency' in bilde.info else 'RGB')
+
+    bredde, høyde = bilde.size
+    mål = sorted({min(b, bredde) for b in bredder})
+    filer = []
+
+    for b in mål:
+        skalert = bilde if b == bredde else bilde.resize((b, max(1, round(høyde * b / bredde))), Image.LANCZOS)
+        for format_ in formater:
+            fil = variantfil(nøkkel, b, format_)
+            sti = os.path.join(ut_mappe, fil)
+            os.makedirs(os.path.dirname(sti), exist_ok=True)
+            skalert.save(sti + '.tmp', format=format_.upper(), quality=KVALITET[format_])
+            os.replace(sti + '.tmp', sti)
+            filer.append(fil)
+
+    return {'bredde': original_bredde, 'hoyde': original_høyde, 'bredder': mål, 'filer': filer}
+
+def les_bildeurler(csv_filer):
+    """Unike bilde-URL-er fra alle CSV-ene, i den rekkefølgen de dukker opp"""
+    urler = {}
+    for csv_fil in csv_filer:
+        with open(csv_fil, 'r', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                for kolonne in BILDEKOLONNER:
+                    url = (row.get(kolonne) or '').strip()
+                    if url.startswith('http'):
+                        urler[url] = True
+    return list(urler)
+
+def les_manifest(sti):
+    if not os.path.exists(sti):
+        return {'versjon': 1, 'bilder': {}}
+    with open(sti, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def skriv_manifest(sti, manifest):
+    os.makedirs(os.path.dirname(sti) or '.', exist_ok=True)
+    with open(sti + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1, sort_keys=True)
+    os.replace(sti + '.tmp', sti)
+
+class Bildespeil:
+    """Laster ned i tråder (nettverk) og skalerer i prosesser (CPU), med manifestet som fasit"""
+
+    def __init__(self, ut_mappe=STANDARD_MAPPE, bredder=STANDARD_BREDDER, formater=('webp',),
+                 antall_nedlastere=8, antall_prosesser=None, pause=0.5, timeout=30):
+        self.ut_mappe = ut_mappe
+        self.manifest_sti = os.path.join(ut_mappe, 'manifest.json')
+        self.bredder = sorted(bredder)
+        self.formater = støttede_formater(formater)
+        self.antall_nedlastere = antall_nedlastere
+        self.antall_prosesser = antall_prosesser
+        self.timeout = timeout
+        self.sesjon = lag_sesjon(antall_nedlastere)
+        self.vertspause = Vertspause(pause)
+        self.manifest = les_manifest(self.manifest_sti)
+
+        # Endres breddene eller formatene, må alle bildene skaleres på nytt
+        self.innstillinger = f"{','.join(map(str, self.bredder))}|{','.join(self.formater)}"
+
+    def er_ferdig(self, oppføring):
+        """Sant hvis oppføringen er laget med dagens innstillinger og alle filene finnes"""
+        return (
+            oppføring.get('innstillinger') == self.innstillinger
+            and all(os.path.exists(os.path.join(self.ut_mappe, fil)) for fil in oppføring.get('filer', []))
+        )
+
+    def last_ned(self, url):
+        """Gir (status, innhold, headere). Status 'uendret' betyr at serveren svarte 304"""
+        gammel = self.manifest['bilder'].get(url, {})
+        headers = {'Accept': 'image/*'}
+        if self.er_ferdig(gammel):
+            if gammel.get('etag'):
+                headers['If-None-Match'] = gammel['etag']
+            if gammel.get('last_modified'):
+                headers['If-Modified-Since'] = gammel['last_modified']
+
+        self.vertspause.vent(url)
+        response = hent_med_forsøk(self.sesjon, url, vertspause=self.vertspause, headers=headers, timeout=self.timeout)
+        if response.status_code == 304:
+            return 'uendret', None, response.headers
+        response.raise_for_status()
+        return 'hentet', response.content, response.headers
+
+    def speil(self, urler):
+        """Speiler alle URL-ene og gir antall per utfall"""
+        from PIL import Image  # noqa: F401 - feil tidlig hvis Pillow mangler, ikke inne i prosessene
+
+        telling = {'uendret': 0, 'samme_innhold': 0, 'skalert': 0, 'feil': 0}
+        totalt = len(urler)
+
+        with ThreadPoolExecutor(max_workers=self.antall_nedlastere) as nedlastere, \
+             ProcessPoolExecutor(max_workers=self.antall_prosesser) as prosesser:
+            nedlastinger = {nedlastere.submit(self.last_ned, url): url for url in urler}
+            skaleringer = {}
+
+            for i, future in enumerate(as_completed(nedlastinger), 1):
+                url = nedlastinger[future]
+                try:
+                    status, data, headers = future.result()
+                except Exception as e:
+                    print(f"   ❌ [{i}/{totalt}] {url}: {e}")
+                    telling['feil'] += 1
+                    continue
+
+                gammel = self.manifest['bilder'].get(url, {})
+                if status == 'uendret':
+                    telling['uendret'] += 1
+                    continue
+
+                sha256 = hashlib.sha256(data).hexdigest()
+                oppføring = {
+                    'sha256': sha256,
+                    'etag': headers.get('ETag'),
+                    'last_modified': headers.get('Last-Modified'),
+                    'bytes': len(data),
+                }
+
+                if gammel.get('sha256') == sha256 and self.er_ferdig(gammel):
+                    # Serveren støtter ikke 304, men innholdet er det samme som sist
+                    gammel.update(oppføring)
+                    telling['samme_innhold'] += 1
+                    continue
+
+                nøkkel = bildenøkkel(sha256)
+                skalering = prosesser.submit(lag_varianter, data, nøkkel, self.bredder, self.formater, self.ut_mappe)
+                skaleringer[skalering] = (url, oppføring)
+
+            for skalering in as_completed(skaleringer):
+                url, oppføring = skaleringer[skalering]
+                try:
+                    oppføring.update(skalering.result())
+                except Exception as e:
+                    print(f"   ❌ Kunne ikke skalere {url}: {e}")
+                    telling['feil'] += 1
+                    continue
+                oppføring['innstillinger'] = self.innstillinger
+                self.manifest['bilder'][url] = oppføring
+                telling['skalert'] += 1
+                print(f"   🖼️ {url[-60:]} → {len(oppføring['filer'])} varianter")
+
+        return telling
+
+    def rydd(self, urler):
+        """Fjerner manifestoppføringer som ikke lenger er i CSV-ene, og filer ingen oppføring bruker"""
+        aktive = set(urler)
+        for url in list(self.manifest['bilder']):
+            if url not in aktive:
+                del self.manifest['bilder'][url]
+
+        i_bruk = {fil for o in self.manifest['bilder'].values() for fil in o.get('filer', [])}
+        fjernet = 0
+        for sti in glob.glob(os.path.join(self.ut_mappe, '*', '*-*.*')):
+            if os.path.relpath(sti, self.ut_mappe).replace(os.sep, '/') not in i_bruk:
+                os.remove(sti)
+                fjernet += 1
+        return fjernet
+
+    def lagre(self):
+        self.manifest['bredder'] = self.bredder
+        self.manifest['formater'] = self.formater
+        skriv_manifest(self.manifest_sti, self.manifest)
+
+def main():
+    parser = argparse.ArgumentParser(description="Laster ned og skalerer bildene i datasettet til et lokalt speil")
+    parser.add_argument('csv_filer', nargs='*', default=['public/data/blomster.csv'])
+    parser.add_argument('--ut-mappe', default=STANDARD_MAPPE)
+    parser.add_argument('--bredder', default=','.join(map(str, STANDARD_BREDDER)), help="Kommaseparerte bredder i piksler")
+    parser.add_argument('--formater', default='webp',
+                        help="webp, eller webp,avif (appen bruker bare WebP foreløpig)")
+    parser.add_argument('--nedlastere', type=int, default=8, help="Samtidige nedlastinger")
+    parser.add_argument('--prosesser', type=int, default=None, help="Prosesser som skalerer (standard: antall kjerner)")
+    parser.add_argument('--pause', type=float, default=0.5, help="Minste pause mellom forespørsler til samme vert")
+    parser.add_argument('--ingen-rydding', action='store_true', help="Behold varianter for bilder som ikke lenger er i bruk")
+    args = parser.parse_args()
+
+    try:
+        import PIL  # noqa: F401
+    except ImportError:
+        print("❌ Bildespeilet trenger Pillow: pip install Pillow")
+        raise SystemExit(1)
+
+    urler = les_bildeurler(args.csv_filer)
+    speil = Bildespeil(
+        ut_mappe=args.ut_mappe,
+        bredder=[int(b) for b in args.bredder.split(',') if b.strip()],
+        formater=[f.strip() for f in args.formater.split(',')],
+        antall_nedlastere=args.nedlastere,
+        antall_prosesser=args.prosesser,
+        pause=args.pause,
+    )
+
+    print(f"🖼️ Speiler {len(urler)} bilder til {args.ut_mappe} ({', '.join(speil.formater)}, bredder {speil.bredder})")
+    try:
+        telling = speil.speil(urler)
+        if not args.ingen_rydding:
+            fjernet = speil.rydd(urler)
+            if fjernet:
+                print(f"🧹 Fjernet {fjernet} varianter som ikke er i bruk")
+    finally:
+        # Lagre det som er ferdig, også ved avbrudd
+        speil.lagre()
+
+    print()
+    print(f"✅ Skalert: {telling['skalert']}")
+    print(f"⏭️ Uendret (304): {telling['uendret']}")
+    print(f"⏭️ Samme innhold: {telling['samme_innhold']}")
+    print(f"❌ Feil: {telling['feil']}")
+    print(f"📝 Manifest: {speil.manifest_sti}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+import argparse
+import csv
+import glob
+import hashlib
+import json
+import os
+
+import forvekslinger
+from bildespeil import STANDARD_MAPPE, bildenøkkel, les_manifest
+from skjema import SKJEMAER
+
+# Rekkefølgen på feltene i hver rad i den kompakte filen (se KompaktDatasett i lib/types.ts)
+KOLONNER = [
+    'artNorsk',
+    'vitenskapeligNavn',
+    'familienavn',      # indeks i strenger
+    'type',             # indeks i strenger
+    'norskfloraUrl',
+    'wikipediaUrl',
+    'bildeStatus',      # indeks i strenger
+    'bildeUrls',        # indekser i bilder
+]
+
+# Felles starter på URL-ene. En URL som starter med prefikser[n] lagres som "n:resten"
+PREFIKSER = [
+    'https://norskflora.no/plante/?sle=',
+    'https://bilder.norskflora.no/orig/',
+    'https://en.wikipedia.org/wiki/',
+    'https://upload.wikimedia.org/wikipedia/commons/',
+]
+
+GYLDIGE_STATUSER = {'FUNNET', 'IKKE_FUNNET', 'MANGLER_NAVN', 'MANGLER_LATINSK', 'UGYLDIG_LATINSK', 'SUCCESS', 'BRUTT', 'SLEKT', ''}
+
+# Bildekolonne og statusen bildesjekk.py setter til BRUTT når bildet ikke virker
+BILDE_STATUSKOLONNE = {'bilde_url': 'bilde_status', 'wikipedia_image_url': 'wikipedia_status'}
+
+def bildeurler(row):
+    """Samler alle tilgjengelige bilder fra alle kilder, uten duplikater"""
+    bilde_urls = []
+    for kolonne, statuskolonne in BILDE_STATUSKOLONNE.items():
+        if row.get(statuskolonne) == 'BRUTT':
+            continue
+        url = (row.get(kolonne) or '').strip()
+        # norskflora_url peker til en nettside, og wikipedia_image_file er bare filnavnet på Commons
+        if url and url not in bilde_urls:
+            bilde_urls.append(url)
+    return bilde_urls
+
+def bildestatus(row, bilde_urls):
+    """
+    Samme regel som appen har brukt: FUNNET krever vellykket Wikipedia-oppslag og minst ett bilde.
+    BRUTT betyr at oppslaget virket, men at bildet er borte, og SLEKT at bare slektsartikkelen fantes
+    """
+    if not (row.get('norsk_navn') or '').strip():
+        return 'MANGLER_NAVN'
+    if row.get('wikipedia_status') in ('SUCCESS', 'FUNNET', 'BRUTT', 'SLEKT') and bilde_urls:
+        return 'FUNNET'
+    return 'IKKE_FUNNET'
+
+def valider(nr, row, sett_latin):
+    """Gir en liste med feilmeldinger for raden"""
+    feil = []
+    latinsk = (row.get('latinsk_navn') or '').strip()
+
+    if not latinsk:
+        feil.append(f"rad {nr}: mangler latinsk navn")
+    elif latinsk.lower() in sett_latin:
+        # blomstId() i lib/utvalg.ts forutsetter at latinsk navn er unikt
+        feil.append(f"rad {nr}: latinsk navn '{latinsk}' finnes fra før")
+
+    for kolonne in ('norskflora_url', 'bilde_url', 'wikipedia_url', 'wikipedia_image_url'):
+        verdi = (row.get(kolonne) or '').strip()
+        if verdi and not verdi.startswith('https://'):
+            feil.append(f"rad {nr}: {kolonne} er ikke en https-URL: '{verdi}'")
+
+    for kolonne in ('bilde_status', 'wikipedia_status'):
+        if (row.get(kolonne) or '').strip() not in GYLDIGE_STATUSER:
+            feil.append(f"rad {nr}: ukjent {kolonne} '{row.get(kolonne)}'")
+
+    return feil
+
+def kort_url(url):
+    """Bytter ut en kjent URL-start med indeksen dens, så den ikke gjentas i hver rad"""
+    for i, prefiks in enumerate(PREFIKSER):
+        if url.startswith(prefiks):
+            return f"{i}:{url[len(prefiks):]}"
+    return url
+
+def speilet(oppføring):
+    """[nøkkel, bredder] for et bilde i bildespeilets manifest, eller None hvis det ikke er speilet"""
+    if not oppføring or not oppføring.get('filer'):
+        return None
+    return [bildenøkkel(oppføring['sha256']), oppføring['bredder']]
+
+class Interner:
+    """Gir hver unike streng én indeks, i den rekkefølgen de dukker opp"""
+
+    def __init__(self):
+        self.liste = []
+        self._indeks = {}
+
+    def __call__(self, verdi):
+        if verdi not in self._indeks:
+            self._indeks[verdi] = len(self.liste)
+            self.liste.append(verdi)
+        return self._indeks[verdi]
+
+class Datasettbygger:
+    """
+    Bygger det kompakte datasettet én rad om gangen, så radene kan strømme
+    rett inn fra plantepugger.py uten å gå via en CSV. Radene er i app-skjemaet.
+    """
+
+    def __init__(self, bildemanifest=None):
+        self.bildemanifest = bildemanifest
+        self.strenger = Interner()
+        self.bilder = Interner()
+        self.speil = {}
+        self.rader = []
+        self.feil = []
+        self.sett_latin = set()
+
+    def legg_til(self, nr, row):
+        norsk_navn = (row.get('norsk_navn') or '').strip()
+        if not norsk_navn:
+            # Rader uten navn vises ikke i appen
+            return
+
+        self.feil.extend(valider(nr, row, self.sett_latin))
+        self.sett_latin.add((row.get('latinsk_navn') or '').strip().lower())
+
+        bilde_urls = bildeurler(row)
+        self.rader.append([
+            norsk_navn,
+            (row.get('latinsk_navn') or '').strip(),
+            self.strenger((row.get('familie') or '').strip()),
+            self.strenger((row.get('type') or '').strip()),
+            kort_url((row.get('norskflora_url') or '').strip()),
+            kort_url((row.get('wikipedia_url') or '').strip()),
+            self.strenger(bildestatus(row, bilde_urls)),
+            [self.bilder(kort_url(url)) for url in bilde_urls],
+        ])
+        if self.bildemanifest:
+            for url in bilde_urls:
+                self.speil[kort_url(url)] = speilet(self.bildemanifest['bilder'].get(url))
+
+    def ferdig(self):
+        """Gir (kompakt datasett, feilmeldinger)"""
+        datasett = {
+            'versjon': 1,
+            'kolonner': KOLONNER,
+            'prefikser': PREFIKSER,
+            'strenger': self.strenger.liste,
+            'bilder': self.bilder.liste,
+            'rader': self.rader,
+            # Parallelt med `rader`: radindeksene til artene hver art lettest forveksles med
+            'forvekslinger': forvekslinger.for_datasett(self.rader, self.strenger.liste),
+        }
+        if self.bildemanifest:
+            datasett['speil'] = [self.speil.get(url) for url in self.bilder.liste]
+        return datasett, self.feil
+
+def bygg(csv_fil, bildemanifest=None):
+    """
+    Leser CSV-en i app-skjemaet og gir (kompakt datasett, feilmeldinger).
+    Med manifestet fra bildespeil.py får datasettet også de lokale variantene.
+    """
+    with open(csv_fil, 'r', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        manglende = [k for k in SKJEMAER['app'] if k not in (reader.fieldnames or [])]
+        if manglende:
+            return None, [f"{csv_fil} mangler kolonnene {manglende}"]
+
+        bygger = Datasettbygger(bildemanifest)
+        for nr, row in enumerate(reader, 2):
+            bygger.legg_til(nr, row)
+    return bygger.ferdig()
+
+def skriv(datasett, ut_mappe, ts_fil):
+    """Skriver blomster.<hash>.json og peker appen til den via ts_fil. Gir filnavnet tilbake"""
+    innhold = json.dumps(datasett, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    hash_ = hashlib.sha256(innhold).hexdigest()[:12]
+    filnavn = f"blomster.{hash_}.json"
+
+    # Rydd bort gamle versjoner, de er ikke lenger referert fra appen
+    for gammel in glob.glob(os.path.join(ut_mappe, 'blomster.*.json')):
+        if os.path.basename(gammel) != filnavn:
+            os.remove(gammel)
+
+    with open(os.path.join(ut_mappe, filnavn), 'wb') as f:
+        f.write(innhold)
+
+    with open(ts_fil, 'w', encoding='utf-8') as f:
+        f.write("// Generert av bygg_datasett.py - ikke rediger for hånd\n")
+        f.write(f"export const DATASETT_URL = '/data/{filnavn}';\n")
+
+    return filnavn, len(innhold)
+
+def main():
+    parser = argparse.ArgumentParser(description="Bygger det kompakte datasettet appen laster")
+    parser.add_argument('csv_fil', nargs='?', default='public/data/blomster.csv')
+    parser.add_argument('--ut-mappe', default='public/data')
+    parser.add_argument('--ts-fil', default='lib/datasett.generated.ts')
+    parser.add_argument('--bildemanifest', default=os.path.join(STANDARD_MAPPE, 'manifest.json'),
+                        help="Manifest fra bildespeil.py (hoppes over hvis det ikke finnes)")
+    args = parser.parse_args()
+
+    bildemanifest = None
+    if os.path.exists(args.bildemanifest):
+        print(f"🖼️ Bruker bildespeilet i {args.bildemanifest}")
+        bildemanifest = les_manifest(args.bildemanifest)
+
+    print(f"📖 Leser: {args.csv_fil}")
+    datasett, feil = bygg(args.csv_fil, bildemanifest)
+
+    if feil:
+        print(f"❌ {len(feil)} valideringsfeil:")
+        for melding in feil[:20]:
+            print(f"   {melding}")
+        if len(feil) > 20:
+            print(f"   ... og {len(feil) - 20} flere")
+        raise SystemExit(1)
+
+    filnavn, størrelse = skriv(datasett, args.ut_mappe, args.ts_fil)
+    csv_størrelse = os.path.getsize(args.csv_fil)
+
+    print(f"✅ {len(datasett['rader'])} arter, {len(datasett['strenger'])} unike strenger, {len(datasett['bilder'])} bilder")
+    if bildemanifest:
+        antall_speilet = sum(1 for s in datasett['speil'] if s)
+        print(f"🖼️ {antall_speilet} av {len(datasett['bilder'])} bilder har lokale varianter")
+    print(f"📦 {filnavn}: {størrelse / 1024:.1f} KB (CSV: {csv_størrelse / 1024:.1f} KB)")
+    print(f"📝 Oppdaterte {args.ts_fil}")
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,7 @@
 import { useState, useRef, useEffect } from 'react';
 import Image from 'next/image';
 import FeilrapportModal from './FeilrapportModal';
+import { bildeProps } from '@/lib/bildespeil';
 import type { Blomst } from '@/lib/types';
 
 interface BlomsterCardProps {
@@ -266,14 +267,13 @@ export default function BlomsterCard({ blomst, onClick }: BlomsterCardProps) {
         {!bildeFeil ? (
           <Image
             key={`${blomst.artNorsk}-${aktivtBildeIndex}`}
-            src={aktivtBilde}
+            {...bildeProps(blomst, aktivtBilde)}
             alt={`${blomst.artNorsk} - bilde ${aktivtBildeIndex + 1}`}
             fill
             className={`transition-opacity duration-500 ${bildeLastet ? 'opacity-100' : 'opacity-0'}`}
             style={{ objectFit: 'contain' }}
             onLoad={() => setBildeLastet(true)}
             onError={handleBildeFeil}
-            unoptimized
             priority
           />
         ) : (
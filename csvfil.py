@@ -0,0 +1,53 @@
+"""
+Felles lesing og skriving av CSV-filene i repoet.
+
+Radene strømmes én og én, så også store filer kan gå gjennom uten å ligge i
+minnet, og output skrives atomisk. Brukes av test.py, arter.py, oppdelt.py,
+artsimport.py og plantepugger.py.
+"""
+import csv
+import os
+import shutil
+import tempfile
+
+def les_rader(input_fil):
+    """Leser én rad om gangen, og gir header-raden før første rad"""
+    with open(input_fil, 'r', encoding='utf-8', newline='') as f:
+        reader = csv.DictReader(f)
+        yield reader.fieldnames or []
+        for row in reader:
+            yield row
+
+def normaliser_rader(rader, alle_kolonner):
+    """Sørger for at alle kolonner eksisterer (fyll inn tomme hvis de mangler)"""
+    for row in rader:
+        yield {col: (row.get(col) or '') for col in alle_kolonner}
+
+def skriv_atomisk(output_fil, kolonner, rader):
+    """
+    Skriver radene til en midlertidig fil i samme mappe og bytter den inn til slutt,
+    så output-filen aldri står halvskrevet - heller ikke når den er samme fil som input
+    """
+    mappe = os.path.dirname(os.path.abspath(output_fil))
+    fd, tmp_fil = tempfile.mkstemp(prefix='.' + os.path.basename(output_fil) + '.', suffix='.tmp', dir=mappe)
+    antall = 0
+    try:
+        with os.fdopen(fd, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=kolonner)
+            writer.writeheader()
+            for row in rader:
+                writer.writerow(row)
+                antall += 1
+        # mkstemp lager filen med 0600 - behold rettighetene til filen vi erstatter
+        if os.path.exists(output_fil):
+            shutil.copymode(output_fil, tmp_fil)
+        else:
+            umask = os.umask(0)
+            os.umask(umask)
+            os.chmod(tmp_fil, 0o666 & ~umask)
+        os.replace(tmp_fil, output_fil)
+    except BaseException:
+        if os.path.exists(tmp_fil):
+            os.remove(tmp_fil)
+        raise
+    return antall
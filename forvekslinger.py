@@ -0,0 +1,115 @@
+"""
+Forvekslinger: for hver art en rangert liste over arter den lett kan
+forveksles med, til feil svar i quizen.
+
+Kandidatene er arter i samme familie eller av samme type, og arter med navn
+som ligner (trigram-likhet på navnene normalisert som i navneindeks.py). De rangeres etter samme familie,
+samme slekt, samme type og hvor like de norske navnene er, så "Engsoleie" får
+"Krypsoleie" og "Nyresoleie" før "Tepperot". Bare arter med bilde (FUNNET) er
+kandidater, siden quizen bare trekker fra dem.
+
+Listene regnes ut når datasettet bygges (se bygg_datasett.py) og ligger i
+datasettet som radindekser, så appen slipper å stokke hele utvalget for hvert
+spørsmål. For å se listene for én art:
+
+    python3 forvekslinger.py public/data/blomster.csv --art Engsoleie
+"""
+import argparse
+import csv
+import heapq
+from collections import Counter, defaultdict
+
+from navneindeks import normaliser, trigrammer
+
+# Hvor mange forvekslinger hver art får med i datasettet
+ANTALL = 8
+
+# Under dette teller ikke navnelikheten. "engsoleie"/"krypsoleie" gir 0.48, "alm"/"ask" 0.25
+MIN_LIKHET = 0.3
+
+def poeng(a, b, navnelikhet):
+    """Hvor lett art a kan forveksles med art b. Artene er (norsk, slekt, familie, type)"""
+    return ((3 if a[2] and a[2] == b[2] else 0) +
+            (2 if a[1] and a[1] == b[1] else 0) +
+            (1 if a[3] and a[3] == b[3] else 0) +
+            5 * navnelikhet)
+
+def beregn(arter, kandidat, antall=ANTALL):
+    """
+    `arter` er en liste med (norsk navn, latinsk navn, familie, type) og
+    `kandidat` sier hvilke som kan brukes som feil svar. Gir én liste per art
+    med indeksene til de `antall` beste forvekslingene, best først.
+    """
+    normert = [normaliser(norsk) for norsk, _, _, _ in arter]
+    antall_trigrammer = [len(trigrammer(n)) for n in normert]
+    nøkler = [(normert[i], (normaliser(latinsk).split() or [''])[0], familie, type_)
+              for i, (_, latinsk, familie, type_) in enumerate(arter)]
+
+    familier = defaultdict(list)
+    typer = defaultdict(list)
+    trigram_indeks = defaultdict(list)
+    for i, (_, _, familie, type_) in enumerate(arter):
+        if not kandidat[i]:
+            continue
+        if familie:
+            familier[familie].append(i)
+        if type_:
+            typer[type_].append(i)
+        for trigram in trigrammer(normert[i]):
+            trigram_indeks[trigram].append(i)
+
+    resultat = []
+    for i in range(len(arter)):
+        egne = trigrammer(normert[i]) if normert[i] else set()
+        delte = Counter(j for trigram in egne for j in trigram_indeks.get(trigram, ()))
+        # Dice-likhet rett fra antall delte trigrammer. Uten redigeringsavstanden
+        # i navneindeks.likhet, som gir korte navn mot lange navn for høy likhet
+        navnelikhet = {j: 2 * n / (len(egne) + antall_trigrammer[j]) for j, n in delte.items()}
+        kandidater = {j for j, verdi in navnelikhet.items() if verdi >= MIN_LIKHET}
+        kandidater.update(familier.get(nøkler[i][2], ()))
+        # Samme type fyller opp for arter i små familier (trær får andre trær)
+        kandidater.update(typer.get(nøkler[i][3], ()))
+        kandidater.discard(i)
+
+        rangert = []
+        for j in kandidater:
+            # Samme norske navn er ikke et feil svar, selv om det er en annen art
+            if normert[j] == normert[i]:
+                continue
+            likhet = navnelikhet.get(j, 0.0)
+            rangert.append((-poeng(nøkler[i], nøkler[j], likhet if likhet >= MIN_LIKHET else 0.0), j))
+        resultat.append([j for _, j in heapq.nsmallest(antall, rangert)])
+    return resultat
+
+def for_datasett(rader, strenger, antall=ANTALL):
+    """Forvekslingene for radene i det kompakte datasettet (se Datasettbygger)"""
+    arter = [(rad[0], rad[1], strenger[rad[2]], strenger[rad[3]]) for rad in rader]
+    return beregn(arter, [strenger[rad[6]] == 'FUNNET' for rad in rader], antall)
+
+def main():
+    parser = argparse.ArgumentParser(description="Viser forvekslingene som bygg_datasett.py legger i datasettet")
+    parser.add_argument('csv_fil', nargs='?', default='public/data/blomster.csv')
+    parser.add_argument('--art', help="Vis bare arter med dette norske navnet")
+    parser.add_argument('--antall', type=int, default=ANTALL)
+    args = parser.parse_args()
+
+    # Radene bygges som i datasettet, så kandidatene er de samme som appen får
+    from bygg_datasett import Datasettbygger
+    bygger = Datasettbygger()
+    with open(args.csv_fil, 'r', encoding='utf-8') as f:
+        for nr, row in enumerate(csv.DictReader(f), 2):
+            bygger.legg_til(nr, row)
+
+    strenger = bygger.strenger.liste
+    arter = [(rad[0], rad[1], strenger[rad[2]], strenger[rad[3]]) for rad in bygger.rader]
+    lister = for_datasett(bygger.rader, strenger, args.antall)
+
+    for (norsk, latinsk, familie, _), liste in zip(arter, lister):
+        if args.art and normaliser(args.art) != normaliser(norsk):
+            continue
+        print(f"🌼 {norsk} ({latinsk}, {familie}): {', '.join(arter[j][0] for j in liste) or '-'}")
+    tomme = sum(1 for liste in lister if not liste)
+    print(f"📊 {len(arter)} arter, {sum(map(len, lister)) / max(1, len(arter)):.1f} forvekslinger i snitt, {tomme} uten")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+import hashlib
+import json
+import os
+import threading
+
+
+def art_nøkkel(latinsk_navn):
+    """Nøkkelen en art journalføres under - latinsk navn uten store bokstaver og ekstra mellomrom"""
+    return ' '.join((latinsk_navn or '').split()).lower()
+
+def fingeravtrykk(row, felter):
+    """Kort hash av input-feltene i en rad, så vi ser om raden er endret siden sist"""
+    verdier = '\x1f'.join((row.get(felt) or '').strip() for felt in felter)
+    return hashlib.sha1(verdier.encode('utf-8')).hexdigest()[:16]
+
+
+class Journal:
+    """
+    Logg over ferdige rader i en berikingskjøring, én JSON-linje per rad.
+
+    Hver linje skrives og flushes så snart raden er ferdig, så en kjøring som
+    krasjer kan fortsette der den slapp. Samme art kan stå flere ganger i en CSV
+    med ulike felter, så oppføringene skilles på både nøkkel og fingeravtrykk.
+    Senere linjer for samme par vinner.
+    """
+
+    def __init__(self, sti):
+        self.sti = sti
+        self._lås = threading.Lock()
+        self._fil = None
+
+    def les(self):
+        """Gir {(nøkkel, fingeravtrykk): {...}} fra en tidligere kjøring"""
+        oppføringer = {}
+        if not os.path.exists(self.sti):
+            return oppføringer
+
+        with open(self.sti, 'r', encoding='utf-8') as f:
+            for linje in f:
+                try:
+                    oppføring = json.loads(linje)
+                except json.JSONDecodeError:
+                    # Siste linje kan være halvskrevet hvis prosessen ble drept
+                    continue
+                oppføringer[(oppføring['nøkkel'], oppføring['fingeravtrykk'])] = oppføring
+        return oppføringer
+
+    def skriv(self, nøkkel, fingeravtrykk, rad):
+        linje = json.dumps({'nøkkel': nøkkel, 'fingeravtrykk': fingeravtrykk, 'rad': rad}, ensure_ascii=False)
+        with self._lås:
+            if self._fil is None:
+                self._fil = open(self.sti, 'a', encoding='utf-8')
+            self._fil.write(linje + '\n')
+            self._fil.flush()
+
+    def lukk(self):
+        with self._lås:
+            if self._fil:
+                self._fil.close()
+                self._fil = None
+
+    def fjern(self):
+        """Sletter journalen når kjøringen er ferdig og resultatet ligger i output-filen"""
+        self.lukk()
+        if os.path.exists(self.sti):
+            os.remove(self.sti)
@@ -0,0 +1,32 @@
+import type { ImageLoader } from 'next/image';
+import type { Blomst, LokaltBilde } from './types';
+
+/** URL til en speilet variant (se variantfil() i bildespeil.py) */
+export function variantUrl(bilde: LokaltBilde, bredde: number): string {
+  return `/bilder/${bilde.nøkkel.slice(0, 2)}/${bilde.nøkkel}-${bredde}.webp`;
+}
+
+/**
+ * Loader for next/image som velger den minste speilede bredden som er minst
+ * like bred som den nettleseren ber om. Da får next/image en srcset med
+ * ferdige WebP-filer i stedet for å laste originalen.
+ */
+export function speilLoader(bilde: LokaltBilde): ImageLoader {
+  return ({ width }) => {
+    const bredde = bilde.bredder.find((b) => b >= width) ?? bilde.bredder[bilde.bredder.length - 1];
+    return variantUrl(bilde, bredde);
+  };
+}
+
+/** Props til <Image> for et bilde: speilet hvis det finnes, ellers originalen uendret */
+export function bildeProps(blomst: Blomst, url: string) {
+  const lokalt = blomst.lokaleBilder?.[url];
+  if (!lokalt) {
+    return { src: url, unoptimized: true };
+  }
+  return {
+    src: url,
+    loader: speilLoader(lokalt),
+    sizes: '(max-width: 768px) 100vw, 50vw',
+  };
+}
@@ -1,6 +1,54 @@
-// Cache for å unngå å lese CSV flere ganger
-let cachedData: BlomsterData | null = null;import Papa from 'papaparse';
-import type { Blomst, BlomsterData } from './types';
+import { DATASETT_URL } from './datasett.generated';
+import type { Blomst, BlomsterData, KompaktDatasett, LokaltBilde } from './types';
+
+// Cache for å unngå å laste datasettet flere ganger
+let cachedData: BlomsterData | null = null;
+
+/** Gjør "n:resten" om til full URL igjen (se PREFIKSER i bygg_datasett.py) */
+function fullUrl(url: string, prefikser: string[]): string {
+  const treff = /^(\d+):/.exec(url);
+  return treff ? prefikser[Number(treff[1])] + url.slice(treff[0].length) : url;
+}
+
+/** Pakker ut datasettet fra bygg_datasett.py til Blomst-objekter */
+function pakkUt(data: KompaktDatasett): Blomst[] {
+  const { prefikser, strenger } = data;
+  const bilder = data.bilder.map((url) => fullUrl(url, prefikser));
+  const speil: (LokaltBilde | null)[] = (data.speil ?? []).map((s) => (s ? { nøkkel: s[0], bredder: s[1] } : null));
+
+  const blomster: Blomst[] = data.rader.map(([norskNavn, latinskNavn, familie, type, norskfloraUrl, wikipediaUrl, status, bildeIndekser]) => {
+    const bildeUrls = bildeIndekser.map((i) => bilder[i]);
+    const typeNavn = strenger[type];
+
+    const lokaleBilder: Record<string, LokaltBilde> = {};
+    bildeIndekser.forEach((i) => {
+      if (speil[i]) lokaleBilder[bilder[i]] = speil[i]!;
+    });
+
+    return {
+      artNorsk: norskNavn,
+      vitenskapeligNavn: latinskNavn,
+      familienavn: strenger[familie],
+      type: typeNavn,
+      bildeUrl: bildeUrls[0] || '', // Første bilde som primærbilde
+      bildeUrls,
+      norskfloraUrl: fullUrl(norskfloraUrl, prefikser),
+      wikipediaUrl: fullUrl(wikipediaUrl, prefikser),
+      bildeStatus: strenger[status] as Blomst['bildeStatus'],
+      lokaleBilder: Object.keys(lokaleBilder).length > 0 ? lokaleBilder : undefined,
+
+      // For bakoverkompatibilitet - sett deprecated fields
+      slektNorsk: typeNavn,
+      sjikt: typeNavn,
+    };
+  });
+
+  // Forvekslingene peker rett på Blomst-objektene, så quizen slipper å slå opp
+  data.forvekslinger?.forEach((indekser, i) => {
+    blomster[i].forvekslinger = indekser.map((j) => blomster[j]);
+  });
+  return blomster;
+}
 
 export async function loadBlomsterData(): Promise<BlomsterData> {
   if (cachedData) {
@@ -8,80 +56,16 @@ export async function loadBlomsterData(): Promise<BlomsterData> {
   }
 
   try {
-    // Last CSV fra public/data
-    const response = await fetch('/data/blomster.csv');
-    const csvText = await response.text();
-    
-    // Parse CSV
-    const parseResult = Papa.parse(csvText, {
-      header: true,
-      skipEmptyLines: true,
-      dynamicTyping: false // Behold alt som strings
-    });
+    // Datasettet er ferdig validert og normalisert av bygg_datasett.py.
+    // Filnavnet har innholdshash, så nettleseren kan cache det for alltid.
+    const response = await fetch(DATASETT_URL);
+    const data: KompaktDatasett = await response.json();
 
-    if (parseResult.errors.length > 0) {
-      console.warn('CSV parsing errors:', parseResult.errors);
+    if (data.versjon !== 1) {
+      console.warn('Ukjent versjon av datasettet:', data.versjon);
     }
 
-    // Konverter til vårt format - eksakt matching til ditt CSV format
-    const blomster: Blomst[] = parseResult.data
-      .map((row: any) => {
-        const norskNavn = row['norsk_navn']?.trim() || '';
-        const latinskNavn = row['latinsk_navn']?.trim() || '';
-        const familie = row['familie']?.trim() || '';
-        const type = row['type']?.trim() || '';
-        const norskfloraUrl = row['norskflora_url']?.trim() || '';
-        const wikipediaUrl = row['wikipedia_url']?.trim() || '';
-
-        // Samle alle tilgjengelige bilder fra alle kilder
-        const bildeUrls: string[] = [];
-        
-        // 1. Legg til originale Norsk Flora bilder (hvis de fortsatt finnes i en kolonne)
-        if (row['bilde_url'] && row['bilde_url'].trim() !== '') {
-          bildeUrls.push(row['bilde_url'].trim());
-        }
-        
-        // 2. Legg til wikipedia_image_url hvis den finnes og ikke er tom
-        if (row['wikipedia_image_url'] && row['wikipedia_image_url'].trim() !== '') {
-          bildeUrls.push(row['wikipedia_image_url'].trim());
-        }
-        
-        // 3. Legg til wikipedia_image_file hvis den finnes, ikke er tom, og er forskjellig fra url
-        if (row['wikipedia_image_file'] && 
-            row['wikipedia_image_file'].trim() !== '' && 
-            row['wikipedia_image_file'].trim() !== row['wikipedia_image_url']) {
-          bildeUrls.push(row['wikipedia_image_file'].trim());
-        }
-
-        // Merk: norskflora_url peker til en nettside, ikke et bilde, og skal
-        // derfor ikke inn i bildeUrls. Den vises som lenke i infokortet i stedet.
-
-        // Bestem bildeStatus
-        let bildeStatus: 'FUNNET' | 'IKKE_FUNNET' | 'MANGLER_NAVN' = 'IKKE_FUNNET';
-        
-        if (!row['norsk_navn'] || row['norsk_navn'].trim() === '') {
-          bildeStatus = 'MANGLER_NAVN';
-        } else if ((row['wikipedia_status'] === 'SUCCESS' || row['wikipedia_status'] === 'FUNNET') && bildeUrls.length > 0) {
-          bildeStatus = 'FUNNET';
-        }
-
-        return {
-          artNorsk: norskNavn,
-          vitenskapeligNavn: latinskNavn,
-          familienavn: familie,
-          type: type,
-          bildeUrl: bildeUrls[0] || '', // Første bilde som primærbilde
-          bildeUrls: bildeUrls,
-          norskfloraUrl: norskfloraUrl,
-          wikipediaUrl: wikipediaUrl,
-          bildeStatus,
-          
-          // For bakoverkompatibilitet - sett deprecated fields
-          slektNorsk: type,
-          sjikt: type,
-        };
-      })
-      .filter((blomst: Blomst) => blomst.artNorsk.trim() !== ''); // Fjern rader uten navn
+    const blomster = pakkUt(data);
 
     // Statistikk
     const medBilder = blomster.filter(b => b.bildeStatus === 'FUNNET').length;
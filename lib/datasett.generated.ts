@@ -0,0 +1,2 @@
+// Generert av bygg_datasett.py - ikke rediger for hånd
+export const DATASETT_URL = '/data/blomster.5a569f561a5a.json';
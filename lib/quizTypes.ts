@@ -22,6 +22,32 @@ export interface QuizResultat {
   beskrivelse: string;
 }
 
+// Feil svar trekkes blant så mange av de beste forvekslingene, så quizen ikke blir lik hver gang
+const BESTE_FORVEKSLINGER = 5;
+
+/**
+ * Tre feil svar for en blomst: helst arter den forveksles med (forvekslinger.py),
+ * ellers tilfeldige arter fra utvalget. `iUtvalg` gjør sjekken av hver kandidat O(1).
+ */
+function feilSvar(blomst: Blomst, utvalg: Blomst[], iUtvalg: Set<Blomst>): Blomst[] {
+  const kandidater = (blomst.forvekslinger ?? [])
+    .filter(b => iUtvalg.has(b) && b.artNorsk !== blomst.artNorsk)
+    .slice(0, BESTE_FORVEKSLINGER)
+    .sort(() => 0.5 - Math.random());
+
+  const valgte: Blomst[] = [];
+  for (const b of kandidater) {
+    if (valgte.length < 3 && !valgte.some(v => v.artNorsk === b.artNorsk)) valgte.push(b);
+  }
+
+  // Fyll opp med tilfeldige trekk i stedet for å stokke hele utvalget
+  for (let forsøk = 0; valgte.length < 3 && forsøk < 100; forsøk++) {
+    const b = utvalg[Math.floor(Math.random() * utvalg.length)];
+    if (b.artNorsk !== blomst.artNorsk && !valgte.some(v => v.artNorsk === b.artNorsk)) valgte.push(b);
+  }
+  return valgte;
+}
+
 export function genererQuiz(blomster: Blomst[], antallSpørsmål: number = 10): QuizSpørsmål[] {
   const blomsterMedBilder = blomster.filter(b => b.bildeStatus === 'FUNNET');
 
@@ -37,12 +63,11 @@ export function genererQuiz(blomster: Blomst[], antallSpørsmål: number = 10):
   const shuffled = [...blomsterMedBilder].sort(() => 0.5 - Math.random());
   const valgteBlomseter = shuffled.slice(0, lengde);
 
+  const iUtvalg = new Set(blomsterMedBilder);
+
   return valgteBlomseter.map(blomst => {
     // Finn andre blomster for feil-alternativer
-    const andreBlomseter = blomsterMedBilder
-      .filter(b => b.artNorsk !== blomst.artNorsk)
-      .sort(() => 0.5 - Math.random())
-      .slice(0, 3);
+    const andreBlomseter = feilSvar(blomst, blomsterMedBilder, iUtvalg);
 
     // Lag alternativer
     const alternativer = [
@@ -9,12 +9,37 @@ export interface Blomst {
   norskfloraUrl: string;      // Fra "norskflora_url"
   wikipediaUrl: string;       // Fra "wikipedia_url"
   bildeStatus: 'FUNNET' | 'IKKE_FUNNET' | 'MANGLER_NAVN';
+  lokaleBilder?: Record<string, LokaltBilde>; // Speilede varianter, med original-URL som nøkkel
+  forvekslinger?: Blomst[];   // Arter den lett forveksles med, best først (forvekslinger.py)
   
   // Deprecated fields (for bakoverkompatibilitet)
   slektNorsk?: string;        // Kan settes til samme som type eller fjernes
   sjikt?: string;             // Kan settes til samme som type eller fjernes
 }
 
+/** Et bilde i bildespeilet (bildespeil.py): filene heter /bilder/<nøkkel[:2]>/<nøkkel>-<bredde>.webp */
+export interface LokaltBilde {
+  nøkkel: string;
+  bredder: number[];
+}
+
+/**
+ * Datasettet slik bygg_datasett.py skriver det. Hver rad er en array i
+ * rekkefølgen i `kolonner`; familie, type og status er indekser i `strenger`,
+ * bildene er indekser i `bilder`. URL-er på formen "n:resten" starter med
+ * `prefikser[n]`.
+ */
+export interface KompaktDatasett {
+  versjon: number;
+  kolonner: string[];
+  prefikser: string[];
+  strenger: string[];
+  bilder: string[];
+  rader: [string, string, number, number, string, string, number, number[]][];
+  speil?: ([string, number[]] | null)[]; // Parallelt med `bilder`, bare når bildespeilet er bygget
+  forvekslinger?: number[][]; // Parallelt med `rader`: radindekser, best først
+}
+
 export interface BlomsterData {
   blomster: Blomst[];
   totalAntall: number;
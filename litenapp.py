@@ -1,115 +1,99 @@
+import argparse
 import csv
 import requests
-from bs4 import BeautifulSoup
-import time
 import re
 import os
-import urllib.parse
+
+from arter import Artstabell
+from nettcache import NettCache
+from metrikk import Fremdrift, Metrikker
+from navneindeks import (LIK, STANDARD_SYNONYMER, Navneindeks, lagre_funn, les_synonymer, likhet, normaliser,
+                         sjekk_datasett)
+from nettverk import NETTLESER_HEADERS, Vertspause, alternativ_norskflora_url, hent_med_forsøk, lag_sesjon, parallelt
+from overskrift import BACKENDS, finn_overskrift, tegnsett_fra
+from versjoner import Versjonsmanifest
+
+# Parser-backend for planteoverskriften når ingen annen er gitt (--parser)
+STANDARD_PARSER = 'strøm'
+
+# Tid per trinn og tellere for hele kjøringen, skrives ut til slutt (se metrikk.py)
+METRIKKER = Metrikker('linksjekk')
 
 def finn_neste_versjon(base_path, base_navn):
-    """Finner neste tilgjengelige versjonsnummer"""
-    versjon = 1
-    while True:
-        fil_navn = f"{base_navn}_{versjon}.csv"
-        full_path = os.path.join(base_path, fil_navn)
-        if not os.path.exists(full_path):
-            return full_path, versjon
-        versjon += 1
+    """Finner neste versjonsnummer fra versjonsmanifestet i mappen (se versjoner.py)"""
+    return Versjonsmanifest(base_path).neste_versjon(base_navn)
 
-def hent_planteoverskrift(url, timeout=15):
-    """Henter planteoverskrift fra norskflora.no"""
-    try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8',
-            'Accept-Language': 'no-NO,no;q=0.9,en-US;q=0.8,en;q=0.7',
-            'Accept-Encoding': 'gzip, deflate, br',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1'
-        }
-        
-        print(f"      Henter side...")
-        
-        # Prøv opprinnelig URL først
-        response = requests.get(url, headers=headers, timeout=timeout, allow_redirects=True)
-        print(f"      Status: {response.status_code}, URL: {response.url}")
-        print(f"      HTML lengde: {len(response.content)} bytes")
-        
-        # Hvis side er suspekt liten, prøv alternativ URL
-        if len(response.content) < 5000:
-            parsed = urllib.parse.urlparse(url)
-            query_params = urllib.parse.parse_qs(parsed.query)
-            
-            if 'sle' in query_params and 'art' in query_params:
-                slekt = query_params['sle'][0].lower()
-                art = query_params['art'][0].lower()
-                alternativ_url = f"https://norskflora.no/{slekt}-{art}/"
-                
-                print(f"      Prøver alternativ URL: {alternativ_url}")
-                response2 = requests.get(alternativ_url, headers=headers, timeout=timeout, allow_redirects=True)
-                
-                if response2.status_code == 200 and len(response2.content) > len(response.content):
-                    print(f"      Alternativ ga mer innhold ({len(response2.content)} bytes)")
-                    response = response2
-        
-        response.raise_for_status()
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        # Metode 1: Finn planteoverskrift med class
-        planteoverskrift = soup.find('h1', class_='planteoverskrift')
-        if planteoverskrift:
-            overskrift_tekst = planteoverskrift.get_text().strip()
-            print(f"      ✅ Fant overskrift: '{overskrift_tekst}'")
-            return overskrift_tekst
+def hent_side(url, timeout=15, sesjon=None, vertspause=None, forsøk=3, cache=None):
+    """Henter en norskflora-side, og prøver /slekt-art/-formen hvis svaret er suspekt lite"""
+    if sesjon is None:
+        sesjon = requests
+    
+    def get(adresse):
+        def nett(ekstra_headers):
+            if vertspause:
+                with METRIKKER.tid('vertspause'):
+                    vertspause.vent(adresse)
+            if sesjon is requests:
+                return requests.get(adresse, headers={**NETTLESER_HEADERS, **ekstra_headers},
+                                    timeout=timeout, allow_redirects=True)
+            return hent_med_forsøk(sesjon, adresse, forsøk=forsøk, vertspause=vertspause, headers=ekstra_headers,
+                                   timeout=timeout, allow_redirects=True)
         
-        # Metode 2: Finn h1 inne i overskriftsrad
-        overskriftsrad = soup.find('div', class_='overskriftsrad')
-        if overskriftsrad:
-            h1_i_rad = overskriftsrad.find('h1')
-            if h1_i_rad:
-                overskrift_tekst = h1_i_rad.get_text().strip()
-                print(f"      ✅ Fant h1 i overskriftsrad: '{overskrift_tekst}'")
-                return overskrift_tekst
+        with METRIKKER.tid('http_henting'):
+            if cache:
+                return cache.hent(adresse, nett)
+            return nett({})
+    
+    print(f"      Henter side...")
+    
+    # Prøv opprinnelig URL først
+    response = get(url)
+    print(f"      Status: {response.status_code}, URL: {response.url}")
+    print(f"      HTML lengde: {len(response.content)} bytes")
+    
+    # Hvis side er suspekt liten, prøv alternativ URL
+    if len(response.content) < 5000:
+        alternativ_url = alternativ_norskflora_url(url)
         
-        # Metode 3: Finn alle h1 tagger
-        alle_h1 = soup.find_all('h1')
-        print(f"      Fant {len(alle_h1)} h1-tagger:")
-        for h1 in alle_h1:
-            tekst = h1.get_text().strip()
-            classes = h1.get('class', [])
-            print(f"        - '{tekst}' (class: {classes})")
+        if alternativ_url:
+            print(f"      Prøver alternativ URL: {alternativ_url}")
+            response2 = get(alternativ_url)
             
-            # Skip logo og andre ikke-plantenavn
-            if tekst.lower() not in ['norskflora.no', 'meny', 'støtt norskflora.no'] and len(tekst) > 2:
-                print(f"      ✅ Bruker første relevante h1: '{tekst}'")
-                return tekst
-        
-        # Metode 4: Søk etter botanisk navn
-        botnavn_link = soup.find('a', class_='botnavn')
-        if botnavn_link:
-            botanisk_navn = botnavn_link.get_text().strip()
-            print(f"      Fant botanisk navn: '{botanisk_navn}'")
-            return f"BOTANISK: {botanisk_navn}"
-        
-        # Metode 5: Fallback til title
-        title_tag = soup.find('title')
-        if title_tag:
-            title_tekst = title_tag.get_text().strip()
-            # Fjern norskflora.no suffix
-            title_ren = title_tekst.replace(' - norskflora.no', '').strip()
-            print(f"      ⚠️ Fallback til title: '{title_ren}'")
-            return f"FALLBACK_TITLE: {title_ren}"
-        
-        print(f"      ❌ Ingen overskrift funnet")
-        return "INGEN_OVERSKRIFT_FUNNET"
+            if response2.status_code == 200 and len(response2.content) > len(response.content):
+                print(f"      Alternativ ga mer innhold ({len(response2.content)} bytes)")
+                response = response2
+    
+    response.raise_for_status()
+    return response
+
+def finn_planteoverskrift(html, parser=None, tegnsett=None):
+    """Finner planteoverskriften i HTML fra norskflora.no (se overskrift.py for backendene)"""
+    with METRIKKER.tid('parsing'):
+        return finn_overskrift(html, parser or STANDARD_PARSER, tegnsett=tegnsett)
+
+def hent_planteoverskrift(url, timeout=15, sesjon=None, vertspause=None, forsøk=3, cache=None, parser=None, arkiv=None):
+    """Henter planteoverskrift fra norskflora.no. Med et Sidearkiv lagres HTML-en sammen med overskriften"""
+    try:
+        response = hent_side(url, timeout=timeout, sesjon=sesjon, vertspause=vertspause, forsøk=forsøk, cache=cache)
+        planteoverskrift = finn_planteoverskrift(response.content, parser, tegnsett_fra(response))
+        if arkiv:
+            with METRIKKER.tid('arkivering'):
+                arkiv.lagre(url, response, planteoverskrift)
+        return planteoverskrift
             
     except requests.exceptions.RequestException as e:
+        METRIKKER.feil(e)
         return f"FEIL: {str(e)}"
     except Exception as e:
+        METRIKKER.feil(e)
         return f"PARSE_FEIL: {str(e)}"
 
-def sjekk_tittel_match(forventet_navn, planteoverskrift):
-    """Sjekker om planteoverskriften matcher det forventede navnet"""
+def sjekk_tittel_match(forventet_navn, planteoverskrift, indeks=None):
+    """
+    Sjekker om planteoverskriften matcher det forventede navnet. Navnene
+    sammenlignes normalisert (æ/ø/å, bindestreker) og med fuzzy likhet. Med en
+    Navneindeks sier en mismatch også hvilken art overskriften egentlig er.
+    """
     if not planteoverskrift:
         return False, "Ingen overskrift funnet"
     
@@ -125,9 +109,9 @@ def sjekk_tittel_match(forventet_navn, planteoverskrift):
         # For botanisk navn, noter det men marker som mismatch
         return False, planteoverskrift
     
-    # Sammenlign (case-insensitive)
-    forventet_ren = forventet_navn.lower().strip()
-    overskrift_ren = planteoverskrift.lower().strip()
+    # Sammenlign normalisert, så 'Rød-sildre' og 'rødsildre' regnes som like
+    forventet_ren = normaliser(forventet_navn)
+    overskrift_ren = normaliser(planteoverskrift)
     
     # Eksakt match
     if forventet_ren == overskrift_ren:
@@ -137,9 +121,87 @@ def sjekk_tittel_match(forventet_navn, planteoverskrift):
     if forventet_ren in overskrift_ren or overskrift_ren in forventet_ren:
         return True, f"Delvis match: '{planteoverskrift}'"
     
+    # Skrivefeil og små variasjoner
+    score = likhet(forventet_ren, overskrift_ren)
+    if score >= LIK:
+        return True, f"Nesten lik ({score:.2f}): '{planteoverskrift}'"
+    
+    if indeks:
+        beste = indeks.beste(planteoverskrift, minst=LIK)
+        if beste and normaliser(beste[1].norsk) != forventet_ren:
+            return False, f"Mismatch: '{planteoverskrift}' er {beste[1].norsk} ({beste[1].latinsk}), rad {beste[1].rad}"
+    
     return False, f"Mismatch: '{planteoverskrift}'"
 
-def sjekk_csv_linker(csv_fil, url_kolonne='norskflora_url', navn_kolonne='Norsk navn'):
+def sjekk_rad(i, row, url_kolonne, navn_kolonne, sesjon=None, vertspause=None, forsøk=3, cache=None, indeks=None,
+              arkiv=None, parser=None):
+    """Sjekker én rad og gir tilbake resultat-dict, eller None hvis raden hoppes over"""
+    url = row.get(url_kolonne, '').strip()
+    navn = row.get(navn_kolonne, '').strip()
+    
+    if not url or not navn:
+        print(f"[{i:3d}] HOPPER OVER: Mangler URL eller navn")
+        return None
+    
+    print(f"[{i:3d}] Sjekker: {navn}")
+    print(f"      URL: {url}")
+    
+    # Hent planteoverskrift fra siden
+    planteoverskrift = hent_planteoverskrift(url, sesjon=sesjon, vertspause=vertspause, forsøk=forsøk, cache=cache,
+                                             parser=parser, arkiv=arkiv)
+    
+    if planteoverskrift.startswith('FEIL:') or planteoverskrift.startswith('PARSE_FEIL:'):
+        print(f"      ❌ {planteoverskrift}")
+        return {
+            'rad': i,
+            'navn': navn,
+            'url': url,
+            'status': 'FEIL',
+            'planteoverskrift': planteoverskrift,
+            'match': False,
+            'beskrivelse': planteoverskrift
+        }
+    
+    # Sjekk om overskriften matcher
+    match, beskrivelse = sjekk_tittel_match(navn, planteoverskrift, indeks)
+    
+    if match:
+        print(f"      ✅ {beskrivelse}")
+    else:
+        print(f"      ⚠️  {beskrivelse}")
+    
+    return {
+        'rad': i,
+        'navn': navn,
+        'url': url,
+        'status': 'OK' if match else 'MISMATCH',
+        'planteoverskrift': planteoverskrift,
+        'match': match,
+        'beskrivelse': beskrivelse
+    }
+
+def les_rader(csv_fil):
+    """Leser alle rader fra en CSV-fil som en Artstabell (se arter.py)"""
+    return Artstabell.les(csv_fil)
+
+def skriv_sammendrag(resultater):
+    """Skriver OK/feil-tellingen for en liste med resultater"""
+    ok_count = len([r for r in resultater if r['match']])
+    feil_count = len(resultater) - ok_count
+    
+    print("\n" + "=" * 60)
+    print(f"📊 SAMMENDRAG:")
+    print(f"✅ OK: {ok_count}")
+    print(f"❌ Feil: {feil_count}")
+    print(f"📈 Totalt: {len([r for r in resultater if r['status'] != 'HOPPER OVER'])}")
+
+def tell_resultat(resultat, fremdrift):
+    """Oppdaterer status-telleren og fremdriftslinjen for én ferdig rad"""
+    METRIKKER.tell('status', resultat['status'] if resultat else 'HOPPET_OVER')
+    fremdrift.steg()
+
+def sjekk_csv_linker(csv_fil, url_kolonne='norskflora_url', navn_kolonne='Norsk navn', cache=None, pause=0.5,
+                     arkiv=None, parser=None):
     """Sjekker alle linker i CSV-filen"""
     
     print(f"🔍 Sjekker linker i: {csv_fil}")
@@ -148,71 +210,69 @@ def sjekk_csv_linker(csv_fil, url_kolonne='norskflora_url', navn_kolonne='Norsk
     print("=" * 60)
     
     # Les CSV
-    with open(csv_fil, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        rows = list(reader)
+    rows = les_rader(csv_fil)
     
     print(f"📊 Fant {len(rows)} rader")
+    indeks = Navneindeks.fra_rader(rows, les_synonymer(STANDARD_SYNONYMER))
     
     resultater = []
-    feil_count = 0
-    ok_count = 0
+    
+    # Pause mellom forespørsler (sider fra cachen venter ikke)
+    vertspause = Vertspause(pause)
+    fremdrift = Fremdrift(len(rows))
     
     for i, row in enumerate(rows, 1):
-        url = row.get(url_kolonne, '').strip()
-        navn = row.get(navn_kolonne, '').strip()
-        
-        if not url or not navn:
-            print(f"[{i:3d}] HOPPER OVER: Mangler URL eller navn")
+        resultat = sjekk_rad(i, row, url_kolonne, navn_kolonne, vertspause=vertspause, cache=cache, indeks=indeks,
+                             arkiv=arkiv, parser=parser)
+        tell_resultat(resultat, fremdrift)
+        if resultat is None:
             continue
         
-        print(f"[{i:3d}] Sjekker: {navn}")
-        print(f"      URL: {url}")
-        
-        # Hent planteoverskrift fra siden
-        planteoverskrift = hent_planteoverskrift(url)
-        
-        if planteoverskrift.startswith('FEIL:') or planteoverskrift.startswith('PARSE_FEIL:'):
-            print(f"      ❌ {planteoverskrift}")
-            feil_count += 1
-            resultater.append({
-                'rad': i,
-                'navn': navn,
-                'url': url,
-                'status': 'FEIL',
-                'planteoverskrift': planteoverskrift,
-                'match': False,
-                'beskrivelse': planteoverskrift
-            })
-        else:
-            # Sjekk om overskriften matcher
-            match, beskrivelse = sjekk_tittel_match(navn, planteoverskrift)
-            
-            if match:
-                print(f"      ✅ {beskrivelse}")
-                ok_count += 1
-            else:
-                print(f"      ⚠️  {beskrivelse}")
-                feil_count += 1
-            
-            resultater.append({
-                'rad': i,
-                'navn': navn,
-                'url': url,
-                'status': 'OK' if match else 'MISMATCH',
-                'planteoverskrift': planteoverskrift,
-                'match': match,
-                'beskrivelse': beskrivelse
-            })
-        
-        # Pause mellom forespørsler
-        time.sleep(0.5)
+        resultater.append(resultat)
     
-    print("\n" + "=" * 60)
-    print(f"📊 SAMMENDRAG:")
-    print(f"✅ OK: {ok_count}")
-    print(f"❌ Feil: {feil_count}")
-    print(f"📈 Totalt: {len([r for r in resultater if r['status'] != 'HOPPER OVER'])}")
+    skriv_sammendrag(resultater)
+    print(vertspause.sammendrag())
+    
+    return resultater
+
+def sjekk_csv_linker_parallelt(csv_fil, url_kolonne='norskflora_url', navn_kolonne='Norsk navn',
+                               samtidige=8, pause=0.5, forsøk=3, cache=None, arkiv=None, parser=None):
+    """
+    Sjekker alle linker i CSV-filen med `samtidige` tråder, med samme resultatformat som sjekk_csv_linker.
+    
+    Alle kall går gjennom én delt keep-alive-sesjon, hver vert får minst `pause`
+    sekunder mellom forespørslene, og timeout/5xx prøves på nytt opptil `forsøk`
+    ganger med økende pause. Trådene er ferdige når funksjonen returnerer.
+    """
+    print(f"🔍 Sjekker linker i: {csv_fil} ({samtidige} samtidige)")
+    print(f"📋 URL kolonne: {url_kolonne}")
+    print(f"📋 Navn kolonne: {navn_kolonne}")
+    print("=" * 60)
+    
+    rows = les_rader(csv_fil)
+    print(f"📊 Fant {len(rows)} rader")
+    indeks = Navneindeks.fra_rader(rows, les_synonymer(STANDARD_SYNONYMER))
+    
+    sesjon = lag_sesjon(samtidige)
+    vertspause = Vertspause(pause)
+    fremdrift = Fremdrift(len(rows))
+    
+    def sjekk(par):
+        i, row = par
+        return sjekk_rad(i, row, url_kolonne, navn_kolonne, sesjon, vertspause, forsøk, cache, indeks, arkiv, parser)
+    
+    # parallelt gir resultatene i samme rekkefølge som radene, så rapporten blir lik den sekvensielle
+    resultater = []
+    try:
+        for resultat in parallelt(sjekk, enumerate(rows, 1), samtidige):
+            tell_resultat(resultat, fremdrift)
+            if resultat is not None:
+                resultater.append(resultat)
+    finally:
+        sesjon.close()
+    
+    skriv_sammendrag(resultater)
+    print(vertspause.sammendrag())
     
     return resultater
 
@@ -231,12 +291,27 @@ def lagre_rapport(resultater, output_fil='link_rapport.csv'):
     print(f"✅ Rapport lagret!")
 
 def main():
+    parser = argparse.ArgumentParser(description="Sjekker at norskflora-lenkene i en CSV peker til riktig plante")
+    parser.add_argument('csv_fil', nargs='?', default="Ny_1.csv")
+    parser.add_argument('--output-mappe', default=".", help="Hvor rapporten (Ny_Ny_<n>.csv) skrives")
+    parser.add_argument('--samtidige', type=int, default=8, help="Hvor mange sider som hentes samtidig (1 = sekvensielt)")
+    parser.add_argument('--pause', type=float, default=0.5, help="Minste antall sekunder mellom forespørsler til samme vert")
+    parser.add_argument('--forsok', type=int, default=3, help="Antall forsøk ved timeout og 5xx")
+    parser.add_argument('--parser', choices=list(BACKENDS), default=STANDARD_PARSER, help="Backend for å finne planteoverskriften")
+    parser.add_argument('--cache', default='.nettcache.sqlite3', help="Fil for HTTP-cachen")
+    parser.add_argument('--ingen-cache', action='store_true', help="Hent alle sider fra nettet")
+    parser.add_argument('--cache-ttl', type=float, default=24, help="Timer før en side i cachen revalideres")
+    parser.add_argument('--cache-maks-mb', type=float, default=200, help="Største størrelse på cachen")
+    parser.add_argument('--metrikker', help="Skriv målingene hit: .prom gir Prometheus-textfile, ellers JSONL")
+    parser.add_argument('--offline', action='store_true', help="Sjekk navn og URL-er mot hverandre uten å hente sidene")
+    parser.add_argument('--arkiv', help="Lagre HTML-en fra hver side i dette sidearkivet (se sidearkiv.py)")
+    args = parser.parse_args()
+    
     print("🔗 Plantepugger Link Sjekker")
     print("=" * 40)
     
-    # Faste filstier
-    csv_fil = "/Users/henrik/Documents/Skr.brd/Koding/Blomsterapp/Ny_1.csv"
-    output_base_path = "/Users/henrik/Documents/Skr.brd/Koding/Blomsterapp/"
+    csv_fil = args.csv_fil
+    output_base_path = args.output_mappe
     
     # Sjekk at input fil eksisterer
     if not os.path.exists(csv_fil):
@@ -250,9 +325,44 @@ def main():
     url_kolonne = "norskflora_url"
     navn_kolonne = "Norsk navn"
     
+    if args.offline:
+        # Hele datasettet i minnet mot navneindeksen - ingen forespørsler
+        funn = sjekk_datasett(les_rader(csv_fil), les_synonymer(STANDARD_SYNONYMER))
+        rapport_fil, versjon = finn_neste_versjon(output_base_path, "Ny_Navn")
+        lagre_funn(funn, rapport_fil)
+        print(f"🔎 {len(funn)} funn uten nett, se Ny_Navn_{versjon}.csv")
+        for f in funn[:15]:
+            print(f"  Rad {f['rad']}: {f['art']} [{f['type']} {f['kolonne']}] {f['beskrivelse']}")
+        return
+    
+    cache = None
+    if not args.ingen_cache:
+        cache = NettCache(args.cache, ttl=args.cache_ttl * 3600, maks_bytes=int(args.cache_maks_mb * 1024 * 1024))
+    
+    arkiv = None
+    if args.arkiv:
+        from sidearkiv import Sidearkiv
+        arkiv = Sidearkiv(args.arkiv)
+    
     try:
         # Sjekk alle linker
-        resultater = sjekk_csv_linker(csv_fil, url_kolonne, navn_kolonne)
+        if args.samtidige > 1:
+            resultater = sjekk_csv_linker_parallelt(
+                csv_fil, url_kolonne, navn_kolonne, samtidige=args.samtidige, pause=args.pause,
+                forsøk=args.forsok, cache=cache, arkiv=arkiv, parser=args.parser
+            )
+        else:
+            resultater = sjekk_csv_linker(csv_fil, url_kolonne, navn_kolonne, cache=cache, pause=args.pause,
+                                          arkiv=arkiv, parser=args.parser)
+        
+        if cache:
+            print(cache.sammendrag())
+        if arkiv:
+            print(arkiv.sammendrag())
+        print(METRIKKER.sammendrag())
+        if args.metrikker:
+            METRIKKER.skriv(args.metrikker)
+            print(f"📈 Målinger skrevet til {args.metrikker}")
         
         # Finn neste versjonsnummer for output
         rapport_fil, versjon = finn_neste_versjon(output_base_path, "Ny_Ny")
@@ -0,0 +1,200 @@
+"""
+Målinger for skrapene: tid per trinn, tellere og en fremdriftslinje.
+
+    metrikker = Metrikker()
+    with metrikker.tid('sidelast'):
+        driver.get(url)
+    metrikker.tell('bilde_status', 'FUNNET')
+    metrikker.feil(e)
+
+Tidene havner i histogrammer med faste bøtter (som Prometheus), og hele
+sammendraget kan skrives som JSONL eller som en Prometheus-textfile.
+"""
+import bisect
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+# Øvre grenser i sekunder. Dekker alt fra en parse på et millisekund til en treg Chrome-start
+BØTTER = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# Målinger som tas vare på per histogram for persentilene. Under dette er de eksakte
+UTVALG = 2048
+
+class Histogram:
+    """
+    Tider fordelt på BØTTER, pluss sum, antall og maks. Persentilene regnes fra et
+    tilfeldig utvalg på høyst UTVALG målinger (reservoir sampling), så minnet
+    holder seg likt uansett hvor mange rader en kjøring har
+    """
+
+    def __init__(self):
+        self.bøtter = [0] * (len(BØTTER) + 1)
+        self.sum = 0.0
+        self.antall = 0
+        self.maks = 0.0
+        self.utvalg = []
+        self._tilfeldig = random.Random()
+
+    def legg_til(self, sekunder):
+        self.bøtter[bisect.bisect_left(BØTTER, sekunder)] += 1
+        self.sum += sekunder
+        self.antall += 1
+        self.maks = max(self.maks, sekunder)
+        if len(self.utvalg) < UTVALG:
+            self.utvalg.append(sekunder)
+        else:
+            # Hver måling så langt har samme sjanse, UTVALG / antall, for å være med
+            plass = self._tilfeldig.randrange(self.antall)
+            if plass < UTVALG:
+                self.utvalg[plass] = sekunder
+
+    def persentil(self, p):
+        if not self.utvalg:
+            return 0.0
+        sortert = sorted(self.utvalg)
+        return sortert[min(len(sortert) - 1, int(p / 100 * len(sortert)))]
+
+class Metrikker:
+    """Trådsikker samling av tidsmålinger og tellere for én kjøring"""
+
+    def __init__(self, navn='plantepugger'):
+        self.navn = navn
+        self.start = time.time()
+        self.histogrammer = defaultdict(Histogram)
+        self.tellere = defaultdict(Counter)
+        self._lås = threading.Lock()
+
+    @contextmanager
+    def tid(self, trinn):
+        """Måler hvor lenge blokken tar, også når den kaster"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.registrer_tid(trinn, time.perf_counter() - start)
+
+    def registrer_tid(self, trinn, sekunder):
+        with self._lås:
+            self.histogrammer[trinn].legg_til(sekunder)
+
+    def tell(self, teller, etikett='', antall=1):
+        with self._lås:
+            self.tellere[teller][etikett] += antall
+
+    def feil(self, unntak):
+        """Teller et unntak etter klassenavn (TimeoutException, ConnectionError, ...)"""
+        self.tell('feil', type(unntak).__name__)
+
+    def sammendrag_data(self):
+        """Alt som et dict som kan gjøres om til JSON"""
+        with self._lås:
+            return {
+                'navn': self.navn,
+                'start': self.start,
+                'varighet': time.time() - self.start,
+                'trinn': {
+                    trinn: {
+                        'antall': h.antall,
+                        'sum': round(h.sum, 6),
+                        'p50': round(h.persentil(50), 6),
+                        'p95': round(h.persentil(95), 6),
+                        'maks': round(h.maks, 6),
+                        'bøtter': dict(zip([str(b) for b in BØTTER] + ['+Inf'], h.bøtter)),
+                    }
+                    for trinn, h in self.histogrammer.items()
+                },
+                'tellere': {navn: dict(teller) for navn, teller in self.tellere.items()},
+            }
+
+    def skriv_jsonl(self, sti):
+        """Legger sammendraget til som én linje, så flere kjøringer kan sammenlignes i samme fil"""
+        with open(sti, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(self.sammendrag_data(), ensure_ascii=False) + '\n')
+
+    def skriv_prometheus(self, sti):
+        """Prometheus textfile-format (for node_exporter), skrevet atomisk"""
+        prefiks = self.navn
+        linjer = []
+        with self._lås:
+            linjer.append(f"# TYPE {prefiks}_trinn_sekunder histogram")
+            for trinn, h in sorted(self.histogrammer.items()):
+                kumulativ = 0
+                for grense, antall in zip([str(b) for b in BØTTER] + ['+Inf'], h.bøtter):
+                    kumulativ += antall
+                    linjer.append(f'{prefiks}_trinn_sekunder_bucket{{trinn="{trinn}",le="{grense}"}} {kumulativ}')
+                linjer.append(f'{prefiks}_trinn_sekunder_sum{{trinn="{trinn}"}} {h.sum:.6f}')
+                linjer.append(f'{prefiks}_trinn_sekunder_count{{trinn="{trinn}"}} {h.antall}')
+            for navn, teller in sorted(self.tellere.items()):
+                linjer.append(f"# TYPE {prefiks}_{navn}_total counter")
+                for etikett, antall in sorted(teller.items()):
+                    linjer.append(f'{prefiks}_{navn}_total{{etikett="{etikett}"}} {antall}')
+            linjer.append(f"{prefiks}_varighet_sekunder {time.time() - self.start:.3f}")
+
+        with open(sti + '.tmp', 'w', encoding='utf-8') as f:
+            f.write('\n'.join(linjer) + '\n')
+        os.replace(sti + '.tmp', sti)
+
+    def skriv(self, sti):
+        """Velger format ut fra filendelsen: .prom gir Prometheus, alt annet JSONL"""
+        if sti.endswith('.prom'):
+            self.skriv_prometheus(sti)
+        else:
+            self.skriv_jsonl(sti)
+
+    def sammendrag(self):
+        """Tabell over hvor tiden gikk, mest brukt tid først"""
+        data = self.sammendrag_data()
+        linjer = [f"⏱️ Tid per trinn ({data['varighet']:.1f} s totalt):"]
+        linjer.append(f"   {'trinn':<18} {'antall':>7} {'sum s':>9} {'p50 ms':>9} {'p95 ms':>9} {'maks ms':>9}")
+        for trinn, t in sorted(data['trinn'].items(), key=lambda par: -par[1]['sum']):
+            linjer.append(
+                f"   {trinn:<18} {t['antall']:>7} {t['sum']:>9.2f} "
+                f"{t['p50'] * 1000:>9.1f} {t['p95'] * 1000:>9.1f} {t['maks'] * 1000:>9.1f}"
+            )
+        for navn, teller in sorted(data['tellere'].items()):
+            verdier = ', '.join(f"{etikett or '-'}: {antall}" for etikett, antall in sorted(teller.items()))
+            linjer.append(f"📊 {navn}: {verdier}")
+        return '\n'.join(linjer)
+
+class Fremdrift:
+    """
+    Linje med ferdige rader, rader per sekund og ETA. I en terminal skrives den
+    over seg selv på stderr; ellers som en vanlig linje høyst hvert `intervall` sekund.
+    """
+
+    def __init__(self, totalt, intervall=2.0, ut=None):
+        self.totalt = totalt
+        self.intervall = intervall
+        self.ut = ut or sys.stderr
+        self.ferdige = 0
+        self.start = time.monotonic()
+        self._sist = 0.0
+        self._lås = threading.Lock()
+
+    def linje(self):
+        brukt = time.monotonic() - self.start
+        fart = self.ferdige / brukt if brukt > 0 else 0.0
+        gjenstår = (self.totalt - self.ferdige) / fart if fart > 0 else 0.0
+        minutter, sekunder = divmod(int(gjenstår), 60)
+        return f"⏱️ {self.ferdige}/{self.totalt} rader  {fart:.2f} rader/s  ETA {minutter}:{sekunder:02d}"
+
+    def steg(self, antall=1):
+        with self._lås:
+            self.ferdige += antall
+            nå = time.monotonic()
+            if nå - self._sist < self.intervall and self.ferdige < self.totalt:
+                return
+            self._sist = nå
+            if self.ut.isatty():
+                self.ut.write('\r' + self.linje() + '\033[K')
+                if self.ferdige >= self.totalt:
+                    self.ut.write('\n')
+            else:
+                self.ut.write(self.linje() + '\n')
+            self.ut.flush()
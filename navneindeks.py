@@ -0,0 +1,333 @@
+"""
+Navneindeks for hele datasettet, uten nett.
+
+Alle norske navn, latinske binomen og kjente synonymer normaliseres én gang
+(små bokstaver, æ/ø/å brettet til ae/o/a, uten tegnsetting) og legges i en
+trigram-indeks. Oppslag henter kandidater fra indeksen og rangerer dem med
+trigram-likhet og redigeringsavstand, så "Rod-sildre" og "rødsildre" er det
+samme navnet, og en overskrift kan knyttes til riktig art selv om den er feil
+for raden den står på.
+
+sjekk_datasett() går gjennom alle radene i én runde og flagger duplikater,
+URL-er som ikke passer med navnet og sannsynlige ombyttinger.
+"""
+import argparse
+import csv
+import os
+import re
+import unicodedata
+import urllib.parse
+from collections import Counter, defaultdict
+
+from skjema import finn_skjema, kolonne
+
+BRETTING = str.maketrans({'æ': 'ae', 'ø': 'o', 'å': 'a', 'ä': 'a', 'ö': 'o', 'ü': 'u', '×': 'x'})
+
+# Grensene er satt etter datasettet: skrivefeil og bindestreker ligger over 0.8,
+# nærstående arter i samme slekt ("Saxifraga hirculus"/"Saxifraga hypnoides") under
+LIK = 0.8
+MULIG = 0.6
+
+# Synonymer og vanlige navn som er sjekket for hånd (Hierochloe odorata = Anthoxanthum nitens)
+STANDARD_SYNONYMER = 'public/data/synonymer.csv'
+
+# Kolonner der samme verdi på to rader nesten alltid er en feil
+UNIKE_KOLONNER = ['Latinsk navn', 'Norsk navn', 'norskflora_url', 'bilde_url', 'wikipedia_url', 'wikipedia_image_url']
+
+def normaliser(navn):
+    """Sammenligningsform for et navn: 'Rød-sildre ' → 'rod sildre'"""
+    tekst = (navn or '').lower().translate(BRETTING)
+    tekst = unicodedata.normalize('NFKD', tekst)
+    tekst = ''.join(t for t in tekst if not unicodedata.combining(t))
+    tekst = re.sub(r'\b(ssp|subsp|var|agg)\b\.?', ' ', tekst)
+    tekst = re.sub(r'[^a-z0-9]+', ' ', tekst)
+    return ' '.join(tekst.split())
+
+def trigrammer(tekst):
+    """Trigrammene i en normalisert tekst, med mellomrom rundt så start og slutt teller"""
+    tekst = f"  {tekst} "
+    return {tekst[i:i + 3] for i in range(len(tekst) - 2)}
+
+def redigeringsavstand(a, b, maks=None):
+    """Levenshtein-avstand. Med `maks` gis maks + 1 tilbake så snart avstanden er større"""
+    if len(a) < len(b):
+        a, b = b, a
+    if maks is not None and len(a) - len(b) > maks:
+        return maks + 1
+
+    forrige = list(range(len(b) + 1))
+    for i, tegn_a in enumerate(a, 1):
+        nå = [i]
+        for j, tegn_b in enumerate(b, 1):
+            nå.append(min(forrige[j] + 1, nå[j - 1] + 1, forrige[j - 1] + (tegn_a != tegn_b)))
+        if maks is not None and min(nå) > maks:
+            return maks + 1
+        forrige = nå
+    return forrige[-1]
+
+def likhet(a, b):
+    """0..1 for to normaliserte navn: det beste av trigram-likhet (Dice) og redigeringsavstand"""
+    if not a or not b:
+        return 0.0
+    if a == b:
+        return 1.0
+    ta, tb = trigrammer(a), trigrammer(b)
+    dice = 2 * len(ta & tb) / (len(ta) + len(tb))
+    lengst = max(len(a), len(b))
+    avstand = redigeringsavstand(a, b, maks=lengst // 3)
+    return max(dice, 1 - avstand / lengst)
+
+def navn_fra_norskflora_url(url):
+    """'Slekt art' fra ?sle=&art= eller /slekt-art/, ellers None"""
+    parsed = urllib.parse.urlparse(url or '')
+    query = urllib.parse.parse_qs(parsed.query)
+    if 'sle' in query and 'art' in query:
+        return f"{query['sle'][0]} {query['art'][0]}"
+    deler = [d for d in parsed.path.split('/') if d]
+    if parsed.netloc.endswith('norskflora.no') and deler and '-' in deler[-1]:
+        return deler[-1].replace('-', ' ')
+    return None
+
+def navn_fra_wikipedia_url(url):
+    """Artikkeltittelen i en Wikipedia-URL, eller None"""
+    parsed = urllib.parse.urlparse(url or '')
+    if 'wikipedia.org' not in parsed.netloc or not parsed.path.startswith('/wiki/'):
+        return None
+    return urllib.parse.unquote(parsed.path[len('/wiki/'):]).replace('_', ' ')
+
+def les_synonymer(sti):
+    """Synonymfil: CSV med kolonnene 'navn' (latinsk navn i datasettet) og 'synonym'"""
+    synonymer = defaultdict(list)
+    if sti and os.path.exists(sti):
+        with open(sti, 'r', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                synonymer[normaliser(row['navn'])].append(row['synonym'])
+    return synonymer
+
+class Art:
+    """Én rad i indeksen"""
+
+    __slots__ = ('rad', 'norsk', 'latinsk', 'navn')
+
+    def __init__(self, rad, norsk, latinsk, synonymer=()):
+        self.rad = rad
+        self.norsk = norsk
+        self.latinsk = latinsk
+        # Alle normaliserte navn arten kan kalles, med hva slags navn det er
+        self.navn = {}
+        for hva, verdi in [('norsk', norsk), ('latinsk', latinsk)] + [('synonym', s) for s in synonymer]:
+            n = normaliser(verdi)
+            if n:
+                self.navn.setdefault(n, hva)
+        binomen = ' '.join(normaliser(latinsk).split()[:2])
+        if binomen:
+            self.navn.setdefault(binomen, 'latinsk')
+
+    def __repr__(self):
+        return f"Art({self.rad}, {self.norsk!r}, {self.latinsk!r})"
+
+class Navneindeks:
+    """Trigram-indeks over alle navnene til alle artene"""
+
+    def __init__(self, arter):
+        self.arter = list(arter)
+        self._trigrammer = defaultdict(set)
+        self._eksakt = defaultdict(set)
+        for nr, art in enumerate(self.arter):
+            for navn in art.navn:
+                self._eksakt[navn].add(nr)
+                for trigram in trigrammer(navn):
+                    self._trigrammer[trigram].add(nr)
+
+    @classmethod
+    def fra_rader(cls, rows, synonymer=None, første_rad=1):
+        """Bygger indeksen fra CSV-rader i hvilket som helst av de to skjemaene"""
+        rows = list(rows)
+        skjema = finn_skjema(rows[0].keys() if rows else [])
+        norsk_kolonne = kolonne(skjema, 'Norsk navn')
+        latin_kolonne = kolonne(skjema, 'Latinsk navn')
+        synonymer = synonymer or {}
+
+        # Navn som tilhører en art i datasettet kan ikke samtidig være synonym for en annen
+        egne_navn = set()
+        for row in rows:
+            latinsk = normaliser(row.get(latin_kolonne))
+            egne_navn.update({latinsk, ' '.join(latinsk.split()[:2]), normaliser(row.get(norsk_kolonne))})
+
+        arter = []
+        for rad, row in enumerate(rows, første_rad):
+            latinsk = (row.get(latin_kolonne) or '').strip()
+            kjente = list(synonymer.get(normaliser(latinsk), []))
+
+            # En Wikipedia-tittel på to ord i samme slekt som ikke er en annen arts navn, er et
+            # synonym vi allerede har slått opp (Rosa spinosissima → Rosa pimpinellifolia).
+            # Andre slekter tas ikke med, ellers ville en feil lenke godkjenne seg selv
+            tittel = navn_fra_wikipedia_url(row.get('wikipedia_url'))
+            if (tittel and ' ' in tittel.strip() and normaliser(tittel) not in egne_navn
+                    and normaliser(tittel).split()[0] == (normaliser(latinsk).split() or [''])[0]):
+                kjente.append(tittel)
+
+            arter.append(Art(rad, (row.get(norsk_kolonne) or '').strip(), latinsk, kjente))
+        return cls(arter)
+
+    def søk(self, navn, antall=3, minst=MULIG):
+        """Gir [(likhet, art, navnetype)] for artene som ligner mest på `navn`, best først"""
+        n = normaliser(navn)
+        if not n:
+            return []
+
+        if n in self._eksakt:
+            return [(1.0, self.arter[nr], self.arter[nr].navn[n]) for nr in sorted(self._eksakt[n])][:antall]
+
+        # Kandidater er arter som deler minst en tredel av trigrammene; bare de får full poengberegning
+        delte = Counter()
+        for trigram in trigrammer(n):
+            for nr in self._trigrammer.get(trigram, ()):
+                delte[nr] += 1
+        grense = len(trigrammer(n)) / 3
+
+        treff = []
+        for nr, antall_delte in delte.items():
+            if antall_delte < grense:
+                continue
+            art = self.arter[nr]
+            beste = max((likhet(n, kandidat), hva) for kandidat, hva in art.navn.items())
+            if beste[0] >= minst:
+                treff.append((beste[0], art, beste[1]))
+
+        treff.sort(key=lambda t: (-t[0], t[1].rad))
+        return treff[:antall]
+
+    def beste(self, navn, minst=MULIG):
+        treff = self.søk(navn, antall=1, minst=minst)
+        return treff[0] if treff else None
+
+def navnelikhet(art, navn):
+    """Hvor godt `navn` passer med arten, målt mot det beste av navnene dens"""
+    n = normaliser(navn)
+    return max((likhet(n, kandidat) for kandidat in art.navn), default=0.0)
+
+def finn_duplikater(rows, skjema):
+    """
+    Gir {(kolonne, verdi): [rad, ...]} for verdier som står på mer enn én rad.
+    Slektsartikler (wikipedia_status SLEKT) deles med vilje av artene i slekten
+    """
+    duplikater = {}
+    for felt in UNIKE_KOLONNER:
+        navn = kolonne(skjema, felt)
+        per_verdi = defaultdict(list)
+        for rad, row in enumerate(rows, 1):
+            verdi = (row.get(navn) or '').strip()
+            if felt == 'wikipedia_url' and row.get('wikipedia_status') == 'SLEKT':
+                continue
+            if verdi:
+                nøkkel = normaliser(verdi) if felt in ('Latinsk navn', 'Norsk navn') else verdi
+                per_verdi[nøkkel].append(rad)
+        for verdi, rader in per_verdi.items():
+            if len(rader) > 1:
+                duplikater[(navn, verdi)] = rader
+    return duplikater
+
+def sjekk_datasett(rows, synonymer=None):
+    """
+    Sjekker hele datasettet i minnet og gir en liste med funn:
+    {'rad', 'art', 'type', 'kolonne', 'verdi', 'beskrivelse'}.
+
+    Typene er DUPLIKAT (samme verdi på flere rader), MISMATCH (URL-en passer
+    ikke med artens navn), FEIL_ART (URL-en passer med en annen art) og
+    BYTTET (to rader peker til hverandres art).
+    """
+    rows = list(rows)
+    skjema = finn_skjema(rows[0].keys() if rows else [])
+    indeks = Navneindeks.fra_rader(rows, synonymer)
+    funn = []
+
+    def legg_til(art, type_, kolonne_, verdi, beskrivelse):
+        funn.append({
+            'rad': art.rad, 'art': art.norsk or art.latinsk, 'type': type_,
+            'kolonne': kolonne_, 'verdi': verdi, 'beskrivelse': beskrivelse,
+        })
+
+    for (kolonne_, verdi), rader in finn_duplikater(rows, skjema).items():
+        navn = ', '.join(indeks.arter[r - 1].norsk or indeks.arter[r - 1].latinsk for r in rader)
+        for rad in rader:
+            legg_til(indeks.arter[rad - 1], 'DUPLIKAT', kolonne_, verdi, f"Samme verdi på rad {rader}: {navn}")
+
+    # Hvilken art hver URL egentlig peker til, for å finne ombyttinger etterpå
+    peker_til = {}
+    uttrekk = [('norskflora_url', navn_fra_norskflora_url), ('wikipedia_url', navn_fra_wikipedia_url)]
+
+    for art, row in zip(indeks.arter, rows):
+        slekt = normaliser(art.latinsk).split()[:1]
+        for kolonne_, finn_navn in uttrekk:
+            url = (row.get(kolonne_) or '').strip()
+            navn = finn_navn(url) if url else None
+            if not navn:
+                continue
+
+            n = normaliser(navn)
+            if navnelikhet(art, navn) >= LIK:
+                continue
+            if kolonne_ == 'wikipedia_url' and n.split() == slekt:
+                # Slektsartikkel brukt som reserve (se wikipediahenter --slekt), ikke en feil
+                continue
+
+            beste = indeks.beste(navn, minst=LIK)
+            if beste and beste[1] is not art:
+                peker_til[(art.rad, kolonne_)] = beste[1]
+                legg_til(art, 'FEIL_ART', kolonne_, url,
+                         f"'{navn}' er {beste[1].norsk} ({beste[1].latinsk}), rad {beste[1].rad}")
+            elif kolonne_ == 'norskflora_url' or slekt and len(n.split()) >= 2 and n.split()[0] != slekt[0]:
+                # Wikipedia-titler på vanlige engelske navn (Chicory) kan vi ikke sjekke uten nett
+                legg_til(art, 'MISMATCH', kolonne_, url, f"'{navn}' passer ikke med {art.latinsk}")
+
+    # To rader som peker til hverandre i samme kolonne er nesten sikkert byttet om
+    for (rad, kolonne_), annen in peker_til.items():
+        tilbake = peker_til.get((annen.rad, kolonne_))
+        if tilbake is not None and tilbake.rad == rad and rad < annen.rad:
+            art = indeks.arter[rad - 1]
+            for a, b in ((art, annen), (annen, art)):
+                legg_til(a, 'BYTTET', kolonne_, (rows[a.rad - 1].get(kolonne_) or '').strip(),
+                         f"Byttet med rad {b.rad} ({b.norsk})")
+
+    funn.sort(key=lambda f: (f['rad'], f['type'], f['kolonne']))
+    return funn
+
+def lagre_funn(funn, output_fil):
+    with open(output_fil, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=['rad', 'art', 'type', 'kolonne', 'verdi', 'beskrivelse'])
+        writer.writeheader()
+        writer.writerows(funn)
+
+def main():
+    parser = argparse.ArgumentParser(description="Finner duplikater, feil lenker og ombyttinger i datasettet uten nett")
+    parser.add_argument('csv_fil', nargs='?', default='public/data/blomster.csv')
+    parser.add_argument('--synonymer', default=STANDARD_SYNONYMER, help="CSV med kolonnene 'navn' og 'synonym'")
+    parser.add_argument('--rapport', help="Skriv funnene til denne CSV-filen")
+    parser.add_argument('--vis', type=int, default=30, help="Hvor mange funn som skrives ut")
+    args = parser.parse_args()
+
+    with open(args.csv_fil, 'r', encoding='utf-8') as f:
+        rows = list(csv.DictReader(f))
+
+    print(f"🔎 Sjekker {len(rows)} rader i {args.csv_fil}")
+    funn = sjekk_datasett(rows, les_synonymer(args.synonymer))
+
+    per_type = Counter(f['type'] for f in funn)
+    for type_ in ('DUPLIKAT', 'MISMATCH', 'FEIL_ART', 'BYTTET'):
+        print(f"   {type_:<9} {per_type[type_]}")
+
+    for f in funn[:args.vis]:
+        print(f"  Rad {f['rad']}: {f['art']} [{f['type']} {f['kolonne']}] {f['beskrivelse']}")
+    if len(funn) > args.vis:
+        print(f"  ... og {len(funn) - args.vis} flere")
+
+    if args.rapport:
+        lagre_funn(funn, args.rapport)
+        print(f"📁 Rapport: {args.rapport}")
+
+    if not funn:
+        print("🎉 Ingen funn!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import Counter
+
+import requests
+
+
+class CachetSvar:
+    """Et HTTP-svar fra cachen, med de feltene skrapene bruker fra requests.Response"""
+
+    def __init__(self, url, status_code, content, headers, fra_cache):
+        self.url = url
+        self.status_code = status_code
+        self.content = content
+        self.headers = requests.structures.CaseInsensitiveDict(headers)
+        self.fra_cache = fra_cache
+
+    @property
+    def text(self):
+        content_type = self.headers.get('Content-Type', '')
+        encoding = 'utf-8'
+        if 'charset=' in content_type:
+            encoding = content_type.split('charset=')[-1].split(';')[0].strip()
+        return self.content.decode(encoding, errors='replace')
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f"{self.status_code} for url: {self.url}")
+
+
+class NettCache:
+    """
+    Varig HTTP-cache på disk, felles for alle skrapene.
+
+    Innholdet lagres zlib-komprimert én gang per SHA-256, så like sider deler
+    lagring. Hver URL husker ETag og Last-Modified: innenfor `ttl` sekunder
+    brukes cachen direkte, etterpå revalideres den med If-None-Match og
+    If-Modified-Since. Blir cachen større enn `maks_bytes`, kastes de minst
+    nylig brukte URL-ene først.
+    """
+
+    def __init__(self, sti='.nettcache.sqlite3', ttl=24 * 3600, maks_bytes=200 * 1024 * 1024):
+        self.sti = sti
+        self.ttl = ttl
+        self.maks_bytes = maks_bytes
+        self.statistikk = Counter()
+        self._lås = threading.Lock()
+
+        mappe = os.path.dirname(sti)
+        if mappe:
+            os.makedirs(mappe, exist_ok=True)
+
+        self._db = sqlite3.connect(sti, check_same_thread=False)
+        self._db.executescript('''
+            CREATE TABLE IF NOT EXISTS innhold (
+                hash TEXT PRIMARY KEY,
+                data BLOB NOT NULL,
+                størrelse INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS svar (
+                url TEXT PRIMARY KEY,
+                endelig_url TEXT NOT NULL,
+                status INTEGER NOT NULL,
+                headers TEXT NOT NULL,
+                hash TEXT NOT NULL REFERENCES innhold(hash),
+                etag TEXT,
+                last_modified TEXT,
+                lagret REAL NOT NULL,
+                brukt REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS svar_brukt ON svar(brukt);
+        ''')
+
+        # En lavere grense enn forrige kjøring skal gjelde med en gang
+        with self._lås:
+            self._rydd()
+            self._db.commit()
+
+    def lukk(self):
+        with self._lås:
+            self._db.close()
+
+    def _finn(self, url):
+        with self._lås:
+            return self._db.execute(
+                'SELECT endelig_url, status, headers, hash, etag, last_modified, lagret FROM svar WHERE url = ?',
+                (url,)
+            ).fetchone()
+
+    def _innhold(self, hash_):
+        with self._lås:
+            rad = self._db.execute('SELECT data FROM innhold WHERE hash = ?', (hash_,)).fetchone()
+        return zlib.decompress(rad[0]) if rad else None
+
+    def _merk_brukt(self, url, revalidert=False):
+        nå = time.time()
+        with self._lås:
+            if revalidert:
+                self._db.execute('UPDATE svar SET brukt = ?, lagret = ? WHERE url = ?', (nå, nå, url))
+            else:
+                self._db.execute('UPDATE svar SET brukt = ? WHERE url = ?', (nå, url))
+            self._db.commit()
+
+    def _lagre(self, url, response):
+        content = response.content
+        hash_ = hashlib.sha256(content).hexdigest()
+        headers = {k: v for k, v in response.headers.items() if k.lower() in ('content-type', 'etag', 'last-modified')}
+        nå = time.time()
+
+        komprimert = zlib.compress(content, 6)
+
+        with self._lås:
+            self._db.execute(
+                'INSERT OR IGNORE INTO innhold (hash, data, størrelse) VALUES (?, ?, ?)',
+                (hash_, komprimert, len(komprimert))
+            )
+            self._db.execute(
+                'INSERT OR REPLACE INTO svar VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (url, response.url, response.status_code, json.dumps(headers), hash_,
+                 response.headers.get('ETag'), response.headers.get('Last-Modified'), nå, nå)
+            )
+            self._rydd()
+            self._db.commit()
+
+    def _rydd(self):
+        # Kalles under lås. Fjerner innhold ingen peker på, og deretter de eldste URL-ene
+        self._db.execute('DELETE FROM innhold WHERE hash NOT IN (SELECT hash FROM svar)')
+        totalt = self._db.execute('SELECT COALESCE(SUM(størrelse), 0) FROM innhold').fetchone()[0]
+
+        while totalt > self.maks_bytes:
+            eldste = self._db.execute('SELECT url FROM svar ORDER BY brukt LIMIT 1').fetchone()
+            if not eldste:
+                break
+            self._db.execute('DELETE FROM svar WHERE url = ?', eldste)
+            self._db.execute('DELETE FROM innhold WHERE hash NOT IN (SELECT hash FROM svar)')
+            totalt = self._db.execute('SELECT COALESCE(SUM(størrelse), 0) FROM innhold').fetchone()[0]
+            self._tell('kastet')
+
+    def _tell(self, hva):
+        self.statistikk[hva] += 1
+
+    def _fra_rad(self, rad):
+        endelig_url, status, headers, hash_, *_ = rad
+        content = self._innhold(hash_)
+        if content is None:
+            return None
+        return CachetSvar(endelig_url, status, content, json.loads(headers), fra_cache=True)
+
+    def hent(self, url, nett):
+        """
+        Gir svaret for `url`, fra cachen når det går.
+
+        `nett(ekstra_headers)` gjør selve nettverkskallet og må gi tilbake en
+        requests.Response; den kalles bare når cachen er utløpt eller mangler URL-en.
+        """
+        rad = self._finn(url)
+
+        if rad:
+            lagret = rad[6]
+            if time.time() - lagret < self.ttl:
+                svar = self._fra_rad(rad)
+                if svar:
+                    self._merk_brukt(url)
+                    with self._lås:
+                        self._tell('treff')
+                    return svar
+
+        ekstra_headers = {}
+        if rad:
+            etag, last_modified = rad[4], rad[5]
+            if etag:
+                ekstra_headers['If-None-Match'] = etag
+            if last_modified:
+                ekstra_headers['If-Modified-Since'] = last_modified
+
+        response = nett(ekstra_headers)
+
+        if response.status_code == 304 and rad:
+            svar = self._fra_rad(rad)
+            if svar:
+                self._merk_brukt(url, revalidert=True)
+                with self._lås:
+                    self._tell('ikke_endret')
+                return svar
+            # Innholdet er borte under oss - hent på nytt uten betingelser
+            response = nett({})
+
+        with self._lås:
+            self._tell('hentet')
+
+        if response.status_code == 200:
+            self._lagre(url, response)
+
+        return response
+
+    def sammendrag(self):
+        """Kort linje med treff, 304-svar og nye nedlastinger"""
+        s = self.statistikk
+        return (f"💾 Cache: {s['treff']} lokale treff, {s['ikke_endret']} uendret (304), "
+                f"{s['hentet']} hentet, {s['kastet']} kastet")
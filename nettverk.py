@@ -0,0 +1,231 @@
+import email.utils
+import threading
+import time
+import urllib.parse
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Lengste Retry-After vi godtar, og lengste hvile etter gjentatte brudd
+MAKS_RETRY_AFTER = 600
+MAKS_HVILE = 600
+
+# Headere som får norskflora.no til å svare som for en vanlig nettleser
+NETTLESER_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8',
+    'Accept-Language': 'no-NO,no;q=0.9,en-US;q=0.8,en;q=0.7',
+    'Accept-Encoding': 'gzip, deflate, br',
+    'Connection': 'keep-alive',
+    'Upgrade-Insecure-Requests': '1'
+}
+
+def lag_sesjon(antall_forbindelser=10):
+    """Lager en requests.Session med keep-alive og plass til flere samtidige forbindelser"""
+    sesjon = requests.Session()
+    sesjon.headers.update(NETTLESER_HEADERS)
+    adapter = HTTPAdapter(pool_connections=antall_forbindelser, pool_maxsize=antall_forbindelser)
+    sesjon.mount('http://', adapter)
+    sesjon.mount('https://', adapter)
+    return sesjon
+
+def alternativ_norskflora_url(url):
+    """Gjør ?sle=Slekt&art=art om til /slekt-art/-formen, eller None hvis URL-en mangler dem"""
+    parsed = urllib.parse.urlparse(url)
+    query_params = urllib.parse.parse_qs(parsed.query)
+    
+    if 'sle' not in query_params or 'art' not in query_params:
+        return None
+    
+    slekt = query_params['sle'][0].lower()
+    art = query_params['art'][0].lower()
+    return f"{parsed.scheme}://{parsed.netloc}/{slekt}-{art}/"
+
+def retry_after(response):
+    """Sekundene i Retry-After (tall eller HTTP-dato), eller None"""
+    verdi = (response.headers.get('Retry-After') or '').strip()
+    if verdi.isdigit():
+        return float(verdi)
+    try:
+        tidspunkt = email.utils.parsedate_to_datetime(verdi)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, tidspunkt.timestamp() - time.time())
+
+def hent_med_forsøk(sesjon, url, forsøk=3, backoff=0.5, vertspause=None, metode='GET', **kwargs):
+    """
+    GET (eller `metode`) som prøver på nytt med økende pause ved timeout, brutt
+    forbindelse, 429 og 5xx. Med `vertspause` får den vite hvordan hvert forsøk
+    gikk, og nye forsøk venter på tur hos den
+    """
+    for nr in range(forsøk):
+        siste = nr == forsøk - 1
+        pause = backoff * (2 ** nr)
+        try:
+            response = sesjon.request(metode, url, **kwargs)
+        except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
+            if vertspause:
+                vertspause.tilbakemelding(url, feil=e)
+            if siste:
+                raise
+        else:
+            if vertspause:
+                vertspause.tilbakemelding(url, response)
+            if (response.status_code < 500 and response.status_code != 429) or siste:
+                return response
+            if not vertspause:
+                # Vertspausen holder selv igjen til Retry-After er ute
+                pause = max(pause, min(retry_after(response) or 0, MAKS_RETRY_AFTER))
+        
+        time.sleep(pause)
+        if vertspause:
+            vertspause.vent(url)
+
+class _Vert:
+    """Tilstanden Vertspause har for én vert"""
+
+    def __init__(self, rate):
+        self.rate = rate
+        self.tokens = 1.0
+        self.sist = time.monotonic()
+        self.latens = None
+        self.beste_latens = None
+        self.sist_senket = 0.0
+        self.stengt_til = 0.0
+        self.feil_på_rad = 0
+        self.åpen_til = 0.0
+        self.åpen_tid = 0.0
+        self.prøver_til = 0.0
+        self.strupinger = 0
+        self.brudd = 0
+        self.forespørsler = 0
+        self.høyeste_rate = rate
+
+class Vertspause:
+    """
+    Tilpasset tempo per vert, på tvers av tråder: en token-bøtte som starter på
+    én forespørsel per `pause` sekunder.
+
+    Etter hvert vellykkede svar går raten litt opp, mot én per `min_pause`.
+    Blir svarene tregere enn det verten har klart før, eller kommer 429/503
+    eller andre feil, halveres den (AIMD, som TCP). Retry-After holder hele
+    verten igjen så lenge serveren ber om, og etter `terskel` feil på rad
+    brytes kretsen: verten hviler, så slipper én prøveforespørsel gjennom før
+    resten får fortsette. Hviletiden dobles for hvert nytt brudd.
+    """
+
+    def __init__(self, pause=2.0, min_pause=None, maks_pause=30.0, terskel=5, hvile=30.0):
+        self.pause = pause
+        self.min_pause = min_pause if min_pause is not None else pause / 8
+        self.maks_rate = 1 / self.min_pause if self.min_pause > 0 else float('inf')
+        self.maks_pause = max(maks_pause, pause)
+        self.terskel = terskel
+        self.hvile = hvile
+        self._verter = {}
+        self._lås = threading.Lock()
+
+    def _vert(self, url):
+        vert = urllib.parse.urlparse(url).netloc
+        if vert not in self._verter:
+            self._verter[vert] = _Vert(1 / self.pause if self.pause > 0 else 0.0)
+        return vert, self._verter[vert]
+
+    def vent(self, url):
+        """Blokkerer til det er lov å sende neste forespørsel til vertens URL"""
+        while True:
+            # Reserver neste ledige tidspunkt under lås, men sov utenfor
+            with self._lås:
+                _, v = self._vert(url)
+                nå = time.monotonic()
+                hold = max(v.stengt_til, v.åpen_til, v.prøver_til)
+                if hold <= nå:
+                    if v.feil_på_rad >= self.terskel:
+                        # Halvåpen krets: denne forespørselen prøver, de andre venter på svaret
+                        v.prøver_til = nå + self.hvile
+                    v.forespørsler += 1
+                    if self.pause <= 0:
+                        return
+                    v.tokens = min(1.0, v.tokens + (nå - v.sist) * v.rate)
+                    v.sist = nå
+                    v.tokens -= 1
+                    start = nå + (-v.tokens / v.rate if v.tokens < 0 else 0.0)
+                    break
+            time.sleep(min(hold - nå, 1.0))
+
+        if start > nå:
+            time.sleep(start - nå)
+
+    def tilbakemelding(self, url, response=None, feil=None, sekunder=None):
+        """
+        Forteller hvordan en forespørsel gikk: et response-objekt, et unntak
+        (`feil`) eller bare tiden den tok (`sekunder`, f.eks. en sidelast i Chrome)
+        """
+        status = response.status_code if response is not None else None
+        if response is not None and sekunder is None:
+            sekunder = response.elapsed.total_seconds()
+        with self._lås:
+            vert, v = self._vert(url)
+            nå = time.monotonic()
+            v.prøver_til = 0.0
+
+            # 501 er "kan ikke HEAD", ikke en vert som sliter
+            if feil is not None or status == 429 or (status is not None and status >= 500 and status != 501):
+                v.feil_på_rad += 1
+                v.strupinger += 1
+                self._senk(v, 0.5 if status in (429, 503) else 0.7, nå)
+                ventetid = retry_after(response) if status in (429, 503) else None
+                if ventetid:
+                    v.stengt_til = max(v.stengt_til, nå + min(ventetid, MAKS_RETRY_AFTER))
+                # Feil fra forespørsler som var sendt før bruddet, åpner ikke kretsen på nytt
+                if v.feil_på_rad >= self.terskel and v.åpen_til <= nå:
+                    v.åpen_tid = min(v.åpen_tid * 2 or self.hvile, MAKS_HVILE)
+                    v.åpen_til = nå + v.åpen_tid
+                    v.brudd += 1
+                    print(f"🔌 {vert}: {v.feil_på_rad} feil på rad, hviler i {v.åpen_tid:.0f} s")
+                return
+
+            v.feil_på_rad = 0
+            v.åpen_tid = 0.0
+            if sekunder is not None:
+                v.latens = sekunder if v.latens is None else 0.8 * v.latens + 0.2 * sekunder
+                v.beste_latens = min(v.beste_latens or v.latens, v.latens)
+                if v.latens > 2 * v.beste_latens + 0.05:
+                    # Verten svarer tregere enn den har klart før - det er kø der
+                    self._senk(v, 0.9, nå)
+                    return
+            if self.pause > 0:
+                v.rate = min(self.maks_rate, v.rate + 0.1 / self.pause)
+                v.høyeste_rate = max(v.høyeste_rate, v.rate)
+
+    def _senk(self, v, faktor, nå):
+        # Én senking per sekund, så en bølge av feil fra samtidige tråder ikke gir raten null
+        if self.pause <= 0 or nå - v.sist_senket < 1.0:
+            return
+        v.rate = max(1 / self.maks_pause, v.rate * faktor)
+        v.sist_senket = nå
+
+    def sammendrag(self):
+        with self._lås:
+            return '\n'.join(
+                f"🚦 {vert}: {v.forespørsler} forespørsler, {v.rate:.2f}/s nå (høyest {v.høyeste_rate:.2f}/s), "
+                f"{v.strupinger} strupinger, {v.brudd} brudd"
+                for vert, v in sorted(self._verter.items())
+            )
+
+def parallelt(funksjon, elementer, arbeidere, i_luften=None):
+    """
+    Som executor.map, men leser bare `i_luften` elementer forut i stedet for
+    hele input-en, så den kan stå midt i en kjede av generatorer. Resultatene
+    kommer i samme rekkefølge som elementene.
+    """
+    i_luften = i_luften or arbeidere * 2
+    with ThreadPoolExecutor(max_workers=arbeidere) as executor:
+        kø = deque()
+        for element in elementer:
+            kø.append(executor.submit(funksjon, element))
+            if len(kø) >= i_luften:
+                yield kø.popleft().result()
+        while kø:
+            yield kø.popleft().result()
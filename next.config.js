@@ -1,4 +1,19 @@
 /** @type {import("next").NextConfig} */
-const nextConfig = {};
+const nextConfig = {
+  async headers() {
+    return [
+      {
+        // blomster.<hash>.json fra bygg_datasett.py endrer navn når innholdet endres
+        source: '/data/:fil(blomster\\.[0-9a-f]{12}\\.json)',
+        headers: [{ key: 'Cache-Control', value: 'public, max-age=31536000, immutable' }],
+      },
+      {
+        // Variantene fra bildespeil.py har innholdshash i navnet
+        source: '/bilder/:mappe/:fil([0-9a-f]{16}-\\d+\\.[a-z]+)',
+        headers: [{ key: 'Cache-Control', value: 'public, max-age=31536000, immutable' }],
+      },
+    ];
+  },
+};
 
 export default nextConfig;
@@ -0,0 +1,215 @@
+"""
+Oppdelt skraping: input-CSV-en deles i skår etter en hash av latinsk navn, og
+hvert skår kjøres gjennom plantepugger.py i en egen prosess. Når alle skårene
+er ferdige slås de sammen i samme rekkefølge som input-filen.
+
+    python3 oppdelt.py -i midlertidig.csv -o blomster_norskflora.csv --skaar 8 -- \\
+        normalize enrich-norskflora --drivere 1
+
+Alt etter '--' sendes videre til plantepugger.py (globale valg og trinn), med
+-i og -o satt til skårets filer. Hvert skår har sin egen output og journal i
+--mappe. Skår som ble ferdige står over neste gang, så en krasj i ett skår
+kjøres på nytt ved å kjøre samme kommando igjen (eller med --bare N).
+
+Sammenslåingen trenger ingen ekstra kolonner: et skår beholder rekkefølgen på
+radene sine, så for hver rad i input-filen tas neste rad fra skåret den hører til.
+"""
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from csvfil import les_rader, skriv_atomisk
+from journal import art_nøkkel
+from skjema import finn_skjema, kolonne
+
+def skår_for(latinsk_navn, antall):
+    """Hvilket skår en art hører til. Samme navn gir samme skår på alle maskiner og i alle kjøringer"""
+    nøkkel = art_nøkkel(latinsk_navn).encode('utf-8')
+    return int.from_bytes(hashlib.sha1(nøkkel).digest()[:8], 'big') % antall
+
+def latin_kolonne(fieldnames):
+    return kolonne(finn_skjema(fieldnames), 'Latinsk navn')
+
+def filsjekksum(sti):
+    h = hashlib.sha1()
+    with open(sti, 'rb') as f:
+        for blokk in iter(lambda: f.read(1 << 20), b''):
+            h.update(blokk)
+    return h.hexdigest()
+
+class Oppdeling:
+    """Filene til én oppdelt kjøring: skaar_N.csv (input), skaar_N.ut.csv (output), skaar_N.log og tilstand.json"""
+
+    def __init__(self, mappe, antall):
+        self.mappe = mappe
+        self.antall = antall
+
+    def inn(self, nr):
+        return os.path.join(self.mappe, f"skaar_{nr}.csv")
+
+    def ut(self, nr):
+        return os.path.join(self.mappe, f"skaar_{nr}.ut.csv")
+
+    def logg(self, nr):
+        return os.path.join(self.mappe, f"skaar_{nr}.log")
+
+    def ferdig(self, nr):
+        # Output skrives atomisk og journalen fjernes først etterpå, så begge må stemme
+        return os.path.exists(self.ut(nr)) and not os.path.exists(self.ut(nr) + '.journal.jsonl')
+
+    def forbered(self, input_fil, trinn_args):
+        """
+        Deler input-filen i skår. Er input eller trinnene endret siden forrige
+        kjøring i samme mappe, kastes de gamle resultatene så de ikke blandes inn.
+        """
+        os.makedirs(self.mappe, exist_ok=True)
+        tilstand = {'input': os.path.abspath(input_fil), 'sjekksum': filsjekksum(input_fil),
+                    'antall': self.antall, 'trinn': trinn_args}
+        tilstand_fil = os.path.join(self.mappe, 'tilstand.json')
+        if os.path.exists(tilstand_fil):
+            with open(tilstand_fil, 'r', encoding='utf-8') as f:
+                if json.load(f) == tilstand:
+                    return False
+            print(f"♻️ Input eller trinn er endret siden sist, starter {self.mappe} på nytt")
+        for nr in range(self.antall):
+            for sti in (self.ut(nr), self.ut(nr) + '.journal.jsonl', self.logg(nr)):
+                if os.path.exists(sti):
+                    os.remove(sti)
+
+        rader = les_rader(input_fil)
+        kolonner = next(rader)
+        kolonne_navn = latin_kolonne(kolonner)
+        skår = [[] for _ in range(self.antall)]
+        for row in rader:
+            skår[skår_for(row.get(kolonne_navn), self.antall)].append(row)
+        for nr, skårrader in enumerate(skår):
+            skriv_atomisk(self.inn(nr), kolonner, skårrader)
+
+        with open(tilstand_fil + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(tilstand, f, ensure_ascii=False, indent=2)
+        os.replace(tilstand_fil + '.tmp', tilstand_fil)
+        print(f"✂️ Delte {input_fil} i {self.antall} skår: {', '.join(str(len(s)) for s in skår)} rader")
+        return True
+
+    def kjør(self, nr, trinn_args):
+        """Kjører plantepugger.py for ett skår med output til loggfilen. Gir (nr, returkode, sekunder)"""
+        kommando = [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'plantepugger.py'),
+                    '-i', self.inn(nr), '-o', self.ut(nr)] + trinn_args
+        start = time.monotonic()
+        with open(self.logg(nr), 'a', encoding='utf-8') as logg:
+            logg.write(f"\n$ {' '.join(kommando)}\n")
+            logg.flush()
+            # Hvert skår er en egen prosess med egen GIL, Chrome-pool og sesjon
+            returkode = subprocess.run(kommando, stdout=logg, stderr=subprocess.STDOUT,
+                                       env=dict(os.environ, PYTHONUNBUFFERED='1')).returncode
+        return nr, returkode, time.monotonic() - start
+
+    def slå_sammen(self, input_fil, output_fil):
+        """
+        Bygger output i input-filens rekkefølge. Feiler hvis et skår har et
+        annet antall rader eller en annen art enn forventet.
+        """
+        skårrader = []
+        kolonner = []
+        for nr in range(self.antall):
+            rader = les_rader(self.ut(nr))
+            header = next(rader)
+            kolonner += [k for k in header if k not in kolonner]
+            skårrader.append((rader, latin_kolonne(header)))
+
+        def i_rekkefølge():
+            rader = les_rader(input_fil)
+            kolonne_navn = latin_kolonne(next(rader))
+            for linje, row in enumerate(rader, 2):
+                nr = skår_for(row.get(kolonne_navn), self.antall)
+                skår_rader, skår_kolonne = skårrader[nr]
+                skår_row = next(skår_rader, None)
+                if skår_row is None or art_nøkkel(skår_row.get(skår_kolonne)) != art_nøkkel(row.get(kolonne_navn)):
+                    raise ValueError(f"skår {nr} stemmer ikke med linje {linje} i {input_fil}")
+                yield {k: skår_row.get(k) or '' for k in kolonner}
+            for nr, (skår_rader, _) in enumerate(skårrader):
+                if next(skår_rader, None) is not None:
+                    raise ValueError(f"skår {nr} har flere rader enn input")
+
+        return skriv_atomisk(output_fil, kolonner, i_rekkefølge())
+
+def main():
+    if '--' in sys.argv:
+        skille = sys.argv.index('--')
+        egne, trinn_args = sys.argv[1:skille], sys.argv[skille + 1:]
+    else:
+        egne, trinn_args = sys.argv[1:], []
+
+    parser = argparse.ArgumentParser(
+        description="Kjører plantepugger.py på flere prosesser, delt etter latinsk navn",
+        usage="oppdelt.py -i INPUT -o OUTPUT [--skaar N] [--prosesser N] [--bare N,...] -- [plantepugger-valg] TRINN ...",
+    )
+    parser.add_argument('-i', '--input', required=True)
+    parser.add_argument('-o', '--output', required=True)
+    parser.add_argument('--skaar', type=int, default=os.cpu_count() or 4, help="Antall skår (standard: antall kjerner)")
+    parser.add_argument('--prosesser', type=int, default=None, help="Skår som kjøres samtidig (standard: alle)")
+    parser.add_argument('--mappe', default=None, help="Hvor skårene ligger (standard: OUTPUT.skaar)")
+    parser.add_argument('--bare', default=None, help="Kjør bare disse skårene på nytt, f.eks. 3 eller 1,5")
+    parser.add_argument('--bare-slaa-sammen', action='store_true', help="Ikke kjør noe, bare slå sammen ferdige skår")
+    args = parser.parse_args(egne)
+
+    if not trinn_args and not args.bare_slaa_sammen:
+        parser.error("mangler trinn etter '--', f.eks. -- normalize enrich-norskflora")
+    if 'build' in trinn_args:
+        parser.error("build trenger alle radene - kjør det på den sammenslåtte filen")
+    if '-i' in trinn_args or '-o' in trinn_args or '--input' in trinn_args or '--output' in trinn_args:
+        parser.error("-i og -o settes per skår, oppgi dem før '--'")
+    if not os.path.exists(args.input):
+        print(f"❌ Finner ikke: {args.input}")
+        raise SystemExit(1)
+
+    oppdeling = Oppdeling(args.mappe or args.output + '.skaar', args.skaar)
+    if not args.bare_slaa_sammen:
+        oppdeling.forbered(args.input, trinn_args)
+
+    if args.bare:
+        valgte = [int(nr) for nr in args.bare.split(',')]
+        for nr in valgte:
+            if not 0 <= nr < args.skaar:
+                parser.error(f"skår {nr} finnes ikke (0-{args.skaar - 1})")
+    else:
+        valgte = [nr for nr in range(args.skaar) if not oppdeling.ferdig(nr)]
+    if args.bare_slaa_sammen:
+        # Skårene er ikke delt på nytt, så de må komme fra samme input
+        valgte = []
+
+    hoppet_over = args.skaar - len(valgte)
+    if hoppet_over and not args.bare_slaa_sammen:
+        print(f"⏭️ {hoppet_over} skår er ferdige fra før")
+    if valgte:
+        print(f"🚀 Kjører {len(valgte)} skår: plantepugger.py {' '.join(trinn_args)}")
+
+    feilet = []
+    with ThreadPoolExecutor(max_workers=args.prosesser or max(1, len(valgte))) as executor:
+        for nr, returkode, sekunder in executor.map(lambda nr: oppdeling.kjør(nr, trinn_args), valgte):
+            if returkode == 0 and oppdeling.ferdig(nr):
+                print(f"✅ Skår {nr} ferdig på {sekunder:.1f} s")
+            else:
+                feilet.append(nr)
+                print(f"❌ Skår {nr} feilet (kode {returkode}), se {oppdeling.logg(nr)}")
+
+    uferdige = [nr for nr in range(args.skaar) if not oppdeling.ferdig(nr)]
+    if uferdige:
+        print(f"\n⚠️ {len(uferdige)} skår er ikke ferdige: {','.join(map(str, uferdige))}")
+        print(f"   Kjør samme kommando igjen, eller med --bare {','.join(map(str, uferdige))}")
+        raise SystemExit(1)
+
+    try:
+        antall = oppdeling.slå_sammen(args.input, args.output)
+    except ValueError as e:
+        print(f"❌ Kunne ikke slå sammen: {e}")
+        raise SystemExit(1)
+    print(f"📁 Slo sammen {args.skaar} skår til {antall} rader: {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+"""
+Uttrekk av planteoverskriften fra norskflora-sider, med utskiftbar parser.
+
+Alle backendene gir de samme kandidatene, og `velg_overskrift` bruker dem i
+samme rekkefølge som før:
+
+1. h1.planteoverskrift
+2. første h1 i div.overskriftsrad
+3. første h1 som ikke er logo/meny
+4. a.botnavn  -> "BOTANISK: ..."
+5. <title>    -> "FALLBACK_TITLE: ..."
+
+'strøm' går gjennom HTML-en én gang med standardbibliotekets HTMLParser og
+stopper så snart den har sett h1.planteoverskrift. 'lxml' og 'selectolax'
+krever at pakkene er installert.
+
+Bytes dekodes med tegnsettet fra svaret (`tegnsett_fra`), ellers fra
+<meta charset> i starten av siden, ellers som UTF-8 (windows-1252 hvis de
+ikke er gyldig UTF-8).
+"""
+import re
+from html.parser import HTMLParser
+
+IKKE_PLANTENAVN = ['norskflora.no', 'meny', 'støtt norskflora.no']
+
+META_CHARSET = re.compile(rb'<meta[^>]+charset=["\']?([A-Za-z0-9_\-:.]+)', re.I)
+
+
+class Kandidater:
+    """Det hver backend fant av mulige overskrifter"""
+
+    def __init__(self):
+        self.planteoverskrift = None   # metode 1
+        self.h1_i_rad = None           # metode 2
+        self.alle_h1 = []              # metode 3: (tekst, classes)
+        self.botnavn = None            # metode 4
+        self.title = None              # metode 5
+
+
+def tegnsett_fra(response):
+    """
+    Tegnsettet fra Content-Type, eller det requests gjetter ut fra innholdet
+    når siden verken oppgir det eller er gyldig UTF-8. None lar `_som_tekst`
+    se etter <meta charset> selv.
+    """
+    innholdstype = response.headers.get('Content-Type', '')
+    if 'charset=' in innholdstype.lower():
+        return innholdstype.lower().split('charset=')[-1].split(';')[0].strip(' "\'') or None
+    if META_CHARSET.search(response.content[:2048]):
+        return None
+    try:
+        response.content.decode('utf-8')
+    except UnicodeDecodeError:
+        return getattr(response, 'apparent_encoding', None)
+    return None
+
+def _som_tekst(html, tegnsett=None):
+    if not isinstance(html, bytes):
+        return html
+    if not tegnsett:
+        treff = META_CHARSET.search(html[:2048])
+        if treff:
+            tegnsett = treff.group(1).decode('ascii')
+        else:
+            # Uten oppgitt tegnsett er ugyldig UTF-8 som regel windows-1252
+            try:
+                return html.decode('utf-8')
+            except UnicodeDecodeError:
+                tegnsett = 'windows-1252'
+    try:
+        return html.decode(tegnsett, errors='replace')
+    except LookupError:
+        return html.decode('utf-8', errors='replace')
+
+
+def _kandidater_soup(html, features):
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, features)
+    funn = Kandidater()
+
+    planteoverskrift = soup.find('h1', class_='planteoverskrift')
+    if planteoverskrift:
+        funn.planteoverskrift = planteoverskrift.get_text()
+        return funn
+
+    overskriftsrad = soup.find('div', class_='overskriftsrad')
+    if overskriftsrad:
+        h1_i_rad = overskriftsrad.find('h1')
+        if h1_i_rad:
+            funn.h1_i_rad = h1_i_rad.get_text()
+
+    funn.alle_h1 = [(h1.get_text(), h1.get('class', [])) for h1 in soup.find_all('h1')]
+
+    botnavn_link = soup.find('a', class_='botnavn')
+    if botnavn_link:
+        funn.botnavn = botnavn_link.get_text()
+
+    title_tag = soup.find('title')
+    if title_tag:
+        funn.title = title_tag.get_text()
+
+    return funn
+
+def _kandidater_html_parser(html):
+    return _kandidater_soup(html, 'html.parser')
+
+def _kandidater_lxml(html):
+    return _kandidater_soup(html, 'lxml')
+
+def _kandidater_selectolax(html):
+    from selectolax.lexbor import LexborHTMLParser
+
+    tre = LexborHTMLParser(_som_tekst(html))
+    funn = Kandidater()
+
+    planteoverskrift = tre.css_first('h1.planteoverskrift')
+    if planteoverskrift:
+        funn.planteoverskrift = planteoverskrift.text()
+        return funn
+
+    # Som BeautifulSoup: bare første overskriftsrad teller
+    overskriftsrad = tre.css_first('div.overskriftsrad')
+    if overskriftsrad:
+        h1_i_rad = overskriftsrad.css_first('h1')
+        if h1_i_rad:
+            funn.h1_i_rad = h1_i_rad.text()
+
+    funn.alle_h1 = [(h1.text(), (h1.attributes.get('class') or '').split()) for h1 in tre.css('h1')]
+
+    botnavn_link = tre.css_first('a.botnavn')
+    if botnavn_link:
+        funn.botnavn = botnavn_link.text()
+
+    title_tag = tre.css_first('title')
+    if title_tag:
+        funn.title = title_tag.text()
+
+    return funn
+
+
+class _Ferdig(Exception):
+    pass
+
+
+class _StrømParser(HTMLParser):
+    """Én gjennomgang av dokumentet som samler kandidatene og avbryter ved h1.planteoverskrift"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.funn = Kandidater()
+        self._rad_dybde = None       # div-dybde inne i første overskriftsrad, None utenfor
+        self._sett_rad = False
+        self._div_dybde = 0
+        self._åpne = []              # [tag, classes, tekstdeler, i_rad] for elementer vi samler tekst fra
+
+    def handle_starttag(self, tag, attrs):
+        classes = (dict(attrs).get('class') or '').split()
+
+        if tag == 'div':
+            self._div_dybde += 1
+            if not self._sett_rad and 'overskriftsrad' in classes:
+                self._sett_rad = True
+                self._rad_dybde = self._div_dybde
+        elif tag == 'h1':
+            self._åpne.append(['h1', classes, [], self._rad_dybde is not None])
+        elif tag == 'a' and self.funn.botnavn is None and 'botnavn' in classes:
+            self._åpne.append(['a', classes, [], False])
+        elif tag == 'title' and self.funn.title is None:
+            self._åpne.append(['title', classes, [], False])
+
+    def handle_endtag(self, tag):
+        if tag == 'div':
+            if self._rad_dybde is not None and self._div_dybde == self._rad_dybde:
+                self._rad_dybde = None
+            self._div_dybde = max(0, self._div_dybde - 1)
+            return
+
+        # Lukk innerste åpne element med samme tag
+        for i in range(len(self._åpne) - 1, -1, -1):
+            if self._åpne[i][0] == tag:
+                _, classes, deler, i_rad = self._åpne.pop(i)
+                tekst = ''.join(deler)
+                self._ferdig_element(tag, classes, tekst, i_rad)
+                break
+
+    def handle_data(self, data):
+        for element in self._åpne:
+            element[2].append(data)
+
+    def _ferdig_element(self, tag, classes, tekst, i_rad):
+        if tag == 'h1':
+            if 'planteoverskrift' in classes:
+                self.funn.planteoverskrift = tekst
+                raise _Ferdig()
+            if i_rad and self.funn.h1_i_rad is None:
+                self.funn.h1_i_rad = tekst
+            self.funn.alle_h1.append((tekst, classes))
+        elif tag == 'a':
+            self.funn.botnavn = tekst
+        elif tag == 'title':
+            self.funn.title = tekst
+
+def _kandidater_strøm(html, bit=16 * 1024):
+    parser = _StrømParser()
+    tekst = _som_tekst(html)
+    try:
+        for start in range(0, len(tekst), bit):
+            parser.feed(tekst[start:start + bit])
+        parser.close()
+    except _Ferdig:
+        pass
+    return parser.funn
+
+
+BACKENDS = {
+    'strøm': _kandidater_strøm,
+    'html.parser': _kandidater_html_parser,
+    'lxml': _kandidater_lxml,
+    'selectolax': _kandidater_selectolax,
+}
+
+def finn_kandidater(html, parser='strøm', tegnsett=None):
+    """Kjører valgt backend og gir tilbake Kandidater"""
+    if parser not in BACKENDS:
+        raise ValueError(f"Ukjent parser '{parser}', velg en av: {', '.join(BACKENDS)}")
+    # Dekodes her så alle backendene ser den samme teksten
+    return BACKENDS[parser](_som_tekst(html, tegnsett))
+
+def velg_overskrift(funn, vis=True):
+    """Velger overskrift fra kandidatene i den faste rekkefølgen"""
+    logg = print if vis else (lambda *a, **k: None)
+
+    # Metode 1: Finn planteoverskrift med class
+    if funn.planteoverskrift is not None:
+        overskrift_tekst = funn.planteoverskrift.strip()
+        logg(f"      ✅ Fant overskrift: '{overskrift_tekst}'")
+        return overskrift_tekst
+
+    # Metode 2: Finn h1 inne i overskriftsrad
+    if funn.h1_i_rad is not None:
+        overskrift_tekst = funn.h1_i_rad.strip()
+        logg(f"      ✅ Fant h1 i overskriftsrad: '{overskrift_tekst}'")
+        return overskrift_tekst
+
+    # Metode 3: Finn alle h1 tagger
+    logg(f"      Fant {len(funn.alle_h1)} h1-tagger:")
+    for tekst, classes in funn.alle_h1:
+        tekst = tekst.strip()
+        logg(f"        - '{tekst}' (class: {classes})")
+
+        # Skip logo og andre ikke-plantenavn
+        if tekst.lower() not in IKKE_PLANTENAVN and len(tekst) > 2:
+            logg(f"      ✅ Bruker første relevante h1: '{tekst}'")
+            return tekst
+
+    # Metode 4: Søk etter botanisk navn
+    if funn.botnavn is not None:
+        botanisk_navn = funn.botnavn.strip()
+        logg(f"      Fant botanisk navn: '{botanisk_navn}'")
+        return f"BOTANISK: {botanisk_navn}"
+
+    # Metode 5: Fallback til title
+    if funn.title is not None:
+        title_tekst = funn.title.strip()
+        # Fjern norskflora.no suffix
+        title_ren = title_tekst.replace(' - norskflora.no', '').strip()
+        logg(f"      ⚠️ Fallback til title: '{title_ren}'")
+        return f"FALLBACK_TITLE: {title_ren}"
+
+    logg(f"      ❌ Ingen overskrift funnet")
+    return "INGEN_OVERSKRIFT_FUNNET"
+
+def finn_overskrift(html, parser='strøm', vis=True, tegnsett=None):
+    """Finner planteoverskriften i HTML fra norskflora.no"""
+    return velg_overskrift(finn_kandidater(html, parser, tegnsett), vis=vis)
@@ -0,0 +1,409 @@
+"""
+Hele datakjeden i ett verktøy. Trinnene er underkommandoer som kan kjedes,
+og radene strømmer fra trinn til trinn som generatorer i stedet for å gå via
+mellomliggende CSV-filer:
+
+    python3 plantepugger.py -i midlertidig.csv -o blomster_norskflora.csv normalize enrich-norskflora
+    python3 plantepugger.py -i blomster_norskflora.csv -o public/data/blomster.csv \\
+        normalize --skjema app enrich-wikipedia check-images build
+    python3 plantepugger.py -i Ny_1.csv check-links --rapport link_rapport.csv
+
+Hvert trinn importerer det det trenger først når det kjøres, så normalize
+laster verken Selenium, requests eller BeautifulSoup.
+"""
+import argparse
+import os
+import sys
+from collections import Counter
+
+from skjema import APP_TIL_SKRIPT, SKJEMAER, SKRIPT_TIL_APP, finn_skjema, kolonne
+
+class Flyt:
+    """Det trinnene deler: kolonnene og skjemaet radene har nå, og felles nettressurser"""
+
+    def __init__(self, kilde, kolonner, args):
+        self.kilde = kilde
+        self.kolonner = list(kolonner)
+        self.skjema = finn_skjema(kolonner)
+        self.args = args
+        # Kjøres når alle radene er skrevet (fjerne journalen, skrive datasettet)
+        self.etter_skriving = []
+        self._cache = None
+        self._sesjon = None
+        self._vertspause = None
+        self._metrikker = None
+
+    def legg_til_kolonner(self, felter):
+        for felt in felter:
+            if felt not in self.kolonner:
+                self.kolonner.append(felt)
+
+    def krev_skjema(self, trinn):
+        if self.skjema not in SKJEMAER:
+            print(f"❌ {trinn}: kjenner ikke igjen kolonnene {self.kolonner}")
+            raise SystemExit(1)
+
+    def cache(self):
+        if self.args.ingen_cache:
+            return None
+        if self._cache is None:
+            from nettcache import NettCache
+            self._cache = NettCache(self.args.cache, ttl=self.args.cache_ttl * 3600,
+                                    maks_bytes=int(self.args.cache_maks_mb * 1024 * 1024))
+        return self._cache
+
+    def sesjon(self):
+        if self._sesjon is None:
+            from nettverk import lag_sesjon
+            self._sesjon = lag_sesjon(self.args.arbeidere)
+        return self._sesjon
+
+    def vertspause(self):
+        if self._vertspause is None:
+            from nettverk import Vertspause
+            self._vertspause = Vertspause(self.args.pause)
+        return self._vertspause
+
+    def metrikker(self):
+        if self._metrikker is None:
+            from metrikk import Metrikker
+            self._metrikker = Metrikker()
+        return self._metrikker
+
+    def lukk(self):
+        if self._cache:
+            print(self._cache.sammendrag())
+            self._cache.lukk()
+        if self._vertspause:
+            print(self._vertspause.sammendrag())
+        if self._metrikker:
+            print(self._metrikker.sammendrag())
+            if self.args.metrikker:
+                self._metrikker.skriv(self.args.metrikker)
+                print(f"📈 Målinger skrevet til {self.args.metrikker}")
+
+def biter(rader, størrelse):
+    """Deler en strøm av rader opp i lister på høyst `størrelse`"""
+    bit = []
+    for row in rader:
+        bit.append(row)
+        if len(bit) >= størrelse:
+            yield bit
+            bit = []
+    if bit:
+        yield bit
+
+def normalize(rader, flyt, args):
+    """Gir radene kolonnene i skjemaet, i riktig rekkefølge, og bytter skjema med --skjema"""
+    from csvfil import normaliser_rader
+
+    flyt.krev_skjema('normalize')
+    mål = args.skjema or flyt.skjema
+    omdøp = {}
+    if flyt.skjema == 'skript' and mål == 'app':
+        omdøp = SKRIPT_TIL_APP
+    elif flyt.skjema == 'app' and mål == 'skript':
+        omdøp = APP_TIL_SKRIPT
+
+    nye = [omdøp.get(k, k) for k in flyt.kolonner]
+    flyt.kolonner = SKJEMAER[mål] + [k for k in nye if k not in SKJEMAER[mål]]
+    flyt.skjema = mål
+    print(f"🎯 normalize: {len(flyt.kolonner)} kolonner i skjemaet '{mål}'")
+
+    omdøpte = ({omdøp.get(k, k): v for k, v in row.items()} for row in rader)
+    return normaliser_rader(omdøpte, flyt.kolonner)
+
+def enrich_norskflora(rader, flyt, args):
+    """Fyller bilde_url, norskflora_url og bilde_status fra norskflora.no (se app.py)"""
+    from app import RESULTAT_FELTER, NorskFloraSeleniumHenter
+    from journal import Journal
+
+    flyt.krev_skjema('enrich-norskflora')
+    # Trinnene etter kan endre flyt.skjema før første rad kommer hit, så det leses nå
+    skjema = flyt.skjema
+    input_felter = [f for f in flyt.kolonner if f not in RESULTAT_FELTER]
+    flyt.legg_til_kolonner(RESULTAT_FELTER)
+
+    henter = NorskFloraSeleniumHenter(
+        antall_drivere=args.drivere,
+        antall_arbeidere=flyt.args.arbeidere,
+        pause=flyt.args.pause,
+        http_først=not args.kun_selenium,
+        rask_rendring=not args.full_rendring,
+        basis_url=args.basis_url,
+        cache=flyt.cache(),
+        metrikker=flyt.metrikker(),
+    )
+    henter.sesjon = flyt.sesjon()
+    henter.vertspause = flyt.vertspause()
+
+    # Journalen ligger ved output-filen, som i app.py, så en avbrutt kjøring kan fortsette
+    journal = Journal((flyt.args.output or flyt.kilde) + '.journal.jsonl')
+    kjente = {}
+    if not args.start_paa_nytt:
+        for nøkkel, oppføring in journal.les().items():
+            if oppføring['rad'].get('bilde_status') == 'FUNNET':
+                kjente[nøkkel] = oppføring['rad']
+    if kjente:
+        print(f"📒 enrich-norskflora: {len(kjente)} arter har resultat i journalen")
+    flyt.etter_skriving.append(journal.fjern)
+
+    def strøm():
+        try:
+            ferdige = henter.berik(rader, input_felter, journal=journal, kjente=kjente,
+                                   skjema=skjema, behold_funnet=not args.alle)
+            for row, fra_før in ferdige:
+                henter.metrikker.tell('bilde_status', row.get('bilde_status') or '')
+                henter.metrikker.tell('rader', 'gjenbrukt' if fra_før else 'slått_opp')
+                yield row
+        finally:
+            journal.lukk()
+            henter.lukk()
+        print(f"⚡ {henter.treff['http']} løst med HTTP, 🤖 {henter.treff['selenium']} med Selenium, "
+              f"😞 {henter.treff['ingen']} av ingen")
+
+    return strøm()
+
+def enrich_wikipedia(rader, flyt, args):
+    """Fyller Wikipedia-kolonnene med batchede API-oppslag, `--bit` rader om gangen"""
+    import requests
+    from wikipediahenter import RESULTAT_FELTER, WikipediaHenter
+
+    flyt.krev_skjema('enrich-wikipedia')
+    latin_kolonne = kolonne(flyt.skjema, 'Latinsk navn')
+    flyt.legg_til_kolonner(RESULTAT_FELTER)
+
+    henter = WikipediaHenter(args.basis_url, antall_arbeidere=flyt.args.arbeidere, cache=flyt.cache(),
+                             sesjon=flyt.sesjon(), vertspause=flyt.vertspause())
+
+    def strøm():
+        for bit in biter(rader, args.bit):
+            try:
+                henter.fyll_rader(bit, latin_kolonne, args.alle, args.slekt)
+            except (requests.exceptions.RequestException, ValueError) as e:
+                # Radene går videre uendret, så neste kjøring slår dem opp på nytt
+                print(f"❌ Wikipedia-oppslaget feilet for {len(bit)} rader: {e}")
+            yield from bit
+        print(f"📡 {henter.forespørsler} Wikipedia-forespørsler")
+
+    return strøm()
+
+def check_links(rader, flyt, args):
+    """Sjekker at norskflora_url peker til riktig plante og skriver en rapport. Radene går videre uendret"""
+    import litenapp
+    from navneindeks import STANDARD_SYNONYMER, Navneindeks, les_synonymer
+    from nettverk import parallelt
+
+    flyt.krev_skjema('check-links')
+    navn_kolonne = kolonne(flyt.skjema, 'Norsk navn')
+
+    # Indeksen trenger bare navnene, og de leses rett fra input-filen
+    indeks = Navneindeks.fra_rader(litenapp.les_rader(flyt.kilde), les_synonymer(STANDARD_SYNONYMER))
+    sesjon = flyt.sesjon()
+    vertspause = flyt.vertspause()
+    cache = flyt.cache()
+    arkiv = None
+    if args.arkiv:
+        from sidearkiv import Sidearkiv
+        arkiv = Sidearkiv(args.arkiv)
+
+    def sjekk(par):
+        i, row = par
+        return row, litenapp.sjekk_rad(i, row, 'norskflora_url', navn_kolonne, sesjon, vertspause,
+                                       args.forsok, cache, indeks, arkiv, args.parser)
+
+    def strøm():
+        resultater = []
+        for row, resultat in parallelt(sjekk, enumerate(rader, 1), flyt.args.arbeidere):
+            if resultat is not None:
+                resultater.append(resultat)
+            yield row
+        litenapp.skriv_sammendrag(resultater)
+        litenapp.lagre_rapport(resultater, args.rapport)
+        if arkiv:
+            print(arkiv.sammendrag())
+            arkiv.lukk()
+
+    return strøm()
+
+def check_images(rader, flyt, args):
+    """Sjekker bilde-URL-ene med HEAD/Range (se bildesjekk.py) og setter BRUTT på bilder som ikke virker"""
+    from bildesjekk import BILDEKOLONNER, Bildesjekker, oppdater_rader
+
+    flyt.krev_skjema('check-images')
+    flyt.legg_til_kolonner(status for bilde, status in BILDEKOLONNER.items() if bilde in flyt.kolonner)
+    sjekker = Bildesjekker(antall_arbeidere=flyt.args.arbeidere, mål=not args.uten_maal,
+                           sesjon=flyt.sesjon(), vertspause=flyt.vertspause())
+
+    def strøm():
+        telling = Counter()
+        endringer = Counter()
+        for bit in biter(rader, args.bit):
+            urler = [(row.get(k) or '').strip() for row in bit for k in BILDEKOLONNER]
+            resultater = sjekker.sjekk_alle(url for url in urler if url.startswith('http'))
+            telling.update(r['status'] for r in resultater.values())
+            endringer.update(oppdater_rader(bit, resultater))
+            yield from bit
+        print(f"🖼️ check-images: {telling['OK']} OK, {telling['BRUTT']} brutt, "
+              f"{telling['FEIL']} forbigående feil, {sjekker.forespørsler} forespørsler")
+        for endring, antall in sorted(endringer.items()):
+            print(f"🔁 {endring}: {antall}")
+
+    return strøm()
+
+def build(rader, flyt, args):
+    """Bygger det kompakte datasettet appen laster (se bygg_datasett.py) av radene som strømmer forbi"""
+    from bildespeil import les_manifest
+    from bygg_datasett import Datasettbygger, skriv
+
+    flyt.krev_skjema('build')
+    omdøp = SKRIPT_TIL_APP if flyt.skjema == 'skript' else {}
+    manglende = [k for k in SKJEMAER['app'] if k not in {omdøp.get(k, k) for k in flyt.kolonner}]
+    if manglende:
+        print(f"❌ build: radene mangler kolonnene {manglende}")
+        raise SystemExit(1)
+
+    bildemanifest = les_manifest(args.bildemanifest) if os.path.exists(args.bildemanifest) else None
+
+    bygger = Datasettbygger(bildemanifest)
+
+    def strøm():
+        for nr, row in enumerate(rader, 2):
+            bygger.legg_til(nr, {omdøp.get(k, k): v for k, v in row.items()} if omdøp else row)
+            yield row
+
+    def fullfør():
+        # Først etter at output-CSV-en er skrevet, så en valideringsfeil ikke kaster skrapingen
+        datasett, feil = bygger.ferdig()
+        if feil:
+            print(f"❌ {len(feil)} valideringsfeil:")
+            for melding in feil[:20]:
+                print(f"   {melding}")
+            raise SystemExit(1)
+        filnavn, størrelse = skriv(datasett, args.ut_mappe, args.ts_fil)
+        print(f"📦 {filnavn}: {len(datasett['rader'])} arter, {størrelse / 1024:.1f} KB")
+
+    flyt.etter_skriving.append(fullfør)
+    return strøm()
+
+def lag_trinn_parsere():
+    """Én parser per trinn: (parser, funksjon, om trinnet endrer radene)"""
+    from overskrift import BACKENDS
+    trinn = {}
+
+    p = argparse.ArgumentParser(prog='plantepugger.py normalize', description=normalize.__doc__)
+    p.add_argument('--skjema', choices=list(SKJEMAER), help="Skjemaet radene skal ha (standard: det de har)")
+    trinn['normalize'] = (p, normalize, True)
+
+    p = argparse.ArgumentParser(prog='plantepugger.py enrich-norskflora', description=enrich_norskflora.__doc__)
+    p.add_argument('--drivere', type=int, default=1, help="Antall Chrome-instanser i poolen")
+    p.add_argument('--basis-url', default='https://norskflora.no')
+    p.add_argument('--kun-selenium', action='store_true', help="Hopp over HTTP-forsøket")
+    p.add_argument('--full-rendring', action='store_true', help="Last hele siden i Chrome, med CSS, skrifter og bilder")
+    p.add_argument('--alle', action='store_true', help="Slå opp rader som allerede er FUNNET også")
+    p.add_argument('--start-paa-nytt', action='store_true', help="Ignorer journalen fra en avbrutt kjøring")
+    trinn['enrich-norskflora'] = (p, enrich_norskflora, True)
+
+    p = argparse.ArgumentParser(prog='plantepugger.py enrich-wikipedia', description=enrich_wikipedia.__doc__)
+    p.add_argument('--alle', action='store_true', help="Slå opp alle rader, ikke bare de uten wikipedia_status")
+    p.add_argument('--slekt', action='store_true',
+                   help="Lenk til slektsartikkelen (status SLEKT, uten bilde) når arten ikke har egen artikkel")
+    p.add_argument('--basis-url', default='https://en.wikipedia.org')
+    p.add_argument('--bit', type=int, default=500, help="Rader per runde mot API-et")
+    trinn['enrich-wikipedia'] = (p, enrich_wikipedia, True)
+
+    p = argparse.ArgumentParser(prog='plantepugger.py check-links', description=check_links.__doc__)
+    p.add_argument('--rapport', default='link_rapport.csv')
+    p.add_argument('--parser', choices=list(BACKENDS), default='strøm', help="Backend for planteoverskriften")
+    p.add_argument('--forsok', type=int, default=3, help="Antall forsøk ved timeout og 5xx")
+    p.add_argument('--arkiv', help="Lagre HTML-en fra hver side i dette sidearkivet (se sidearkiv.py)")
+    trinn['check-links'] = (p, check_links, False)
+
+    p = argparse.ArgumentParser(prog='plantepugger.py check-images', description=check_images.__doc__)
+    p.add_argument('--uten-maal', action='store_true', help="Bare HEAD, ikke les bredde og høyde")
+    p.add_argument('--bit', type=int, default=200, help="Rader per runde")
+    trinn['check-images'] = (p, check_images, True)
+
+    p = argparse.ArgumentParser(prog='plantepugger.py build', description=build.__doc__)
+    p.add_argument('--ut-mappe', default='public/data')
+    p.add_argument('--ts-fil', default='lib/datasett.generated.ts')
+    p.add_argument('--bildemanifest', default='public/bilder/manifest.json', help="Manifest fra bildespeil.py")
+    trinn['build'] = (p, build, False)
+
+    return trinn
+
+TRINN = ['normalize', 'enrich-norskflora', 'enrich-wikipedia', 'check-links', 'check-images', 'build']
+
+def del_opp(argv):
+    """Deler argumentene i globale valg og én liste per trinn: ['-i', 'x.csv', 'normalize', '--skjema', 'app'] →
+    (['-i', 'x.csv'], [('normalize', ['--skjema', 'app'])])"""
+    globale = []
+    trinn = []
+    for arg in argv:
+        if arg in TRINN:
+            trinn.append((arg, []))
+        elif trinn:
+            trinn[-1][1].append(arg)
+        else:
+            globale.append(arg)
+    return globale, trinn
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Kjører datakjeden som trinn som kan kjedes: " + ', '.join(TRINN),
+        usage="plantepugger.py -i INPUT [-o OUTPUT] [valg] TRINN [trinnvalg] [TRINN [trinnvalg] ...]",
+        epilog="Se 'plantepugger.py TRINN --help' for valgene til hvert trinn.",
+    )
+    parser.add_argument('-i', '--input', required=True, help="CSV i skript- eller app-skjemaet")
+    parser.add_argument('-o', '--output', help="Hvor radene skrives (standard: tilbake til input hvis et trinn endrer dem)")
+    parser.add_argument('--arbeidere', type=int, default=4, help="Samtidige forespørsler")
+    parser.add_argument('--pause', type=float, default=0.5, help="Minste pause mellom forespørsler til samme vert")
+    parser.add_argument('--cache', default='.nettcache.sqlite3', help="Fil for HTTP-cachen")
+    parser.add_argument('--ingen-cache', action='store_true', help="Hent alle sider fra nettet")
+    parser.add_argument('--cache-ttl', type=float, default=24, help="Timer før en side i cachen revalideres")
+    parser.add_argument('--cache-maks-mb', type=float, default=200, help="Største størrelse på cachen")
+    parser.add_argument('--metrikker', help="Skriv målingene hit: .prom gir Prometheus-textfile, ellers JSONL")
+
+    globale, valgte = del_opp(sys.argv[1:])
+    trinn_parsere = lag_trinn_parsere()
+    for navn, trinn_args in valgte:
+        if '-h' in trinn_args or '--help' in trinn_args:
+            trinn_parsere[navn][0].print_help()
+            return
+    args = parser.parse_args(globale)
+    if not valgte:
+        parser.error(f"velg minst ett trinn: {', '.join(TRINN)}")
+    if [navn for navn, _ in valgte].count('build') > 1 or ('build' in dict(valgte) and valgte[-1][0] != 'build'):
+        parser.error("build må være siste trinn")
+
+    if not os.path.exists(args.input):
+        print(f"❌ Finner ikke: {args.input}")
+        raise SystemExit(1)
+
+    from csvfil import les_rader, normaliser_rader, skriv_atomisk
+
+    rader = les_rader(args.input)
+    flyt = Flyt(args.input, next(rader), args)
+    print(f"📖 {args.input} ({flyt.skjema or 'ukjent skjema'}) → {' → '.join(navn for navn, _ in valgte)}")
+
+    endrer = False
+    for navn, trinn_args in valgte:
+        trinn_parser, funksjon, endrer_rader = trinn_parsere[navn]
+        rader = funksjon(rader, flyt, trinn_parser.parse_args(trinn_args))
+        endrer = endrer or endrer_rader
+
+    output = args.output or (args.input if endrer else None)
+    try:
+        if output:
+            antall = skriv_atomisk(output, flyt.kolonner, normaliser_rader(rader, flyt.kolonner))
+            print(f"📁 Lagret {antall} rader: {output}")
+        else:
+            antall = sum(1 for _ in rader)
+            print(f"✅ {antall} rader gikk gjennom kjeden")
+        for etterpå in flyt.etter_skriving:
+            etterpå()
+    finally:
+        flyt.lukk()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+"""
+Sidearkiv: lagrer HTML-en fra hver side linksjekken henter, så uttrekket av
+planteoverskriften kan kjøres på nytt uten nett når norskflora endrer markupen.
+
+Innholdet lagres komprimert én gang per SHA-256 (zstd hvis `zstandard` er
+installert, ellers zlib), og hver URL har en historikk over versjonene den har
+hatt. En side som er lik forrige gang gir ingen ny versjon, bare ny sist_sett.
+I motsetning til nettcache.py kastes ingenting.
+
+    python3 litenapp.py Ny_1.csv --arkiv .sidearkiv.sqlite3
+    python3 sidearkiv.py statistikk
+    python3 sidearkiv.py historikk https://norskflora.no/...
+    python3 sidearkiv.py vis https://norskflora.no/... > side.html
+    python3 sidearkiv.py overskrifter --parser selectolax -o overskrifter.csv
+"""
+import argparse
+import hashlib
+import os
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+from datetime import datetime
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+STANDARD_STI = '.sidearkiv.sqlite3'
+
+# HTML fra samme nettsted komprimeres godt selv på høye nivåer, og arkivet skrives sjelden
+ZSTD_NIVÅ = 19
+ZLIB_NIVÅ = 9
+
+def komprimer(data):
+    """Gir (format, komprimert). zstd når pakken finnes, ellers zlib"""
+    if zstandard is not None:
+        return 'zstd', zstandard.ZstdCompressor(level=ZSTD_NIVÅ).compress(data)
+    return 'zlib', zlib.compress(data, ZLIB_NIVÅ)
+
+def pakk_ut(format_, data):
+    if format_ == 'zlib':
+        return zlib.decompress(data)
+    if format_ == 'zstd':
+        if zstandard is None:
+            raise RuntimeError("arkivet har zstd-komprimerte sider: pip install zstandard")
+        return zstandard.ZstdDecompressor().decompress(data)
+    raise ValueError(f"Ukjent format i arkivet: {format_}")
+
+
+class Sidearkiv:
+    """
+    Varig arkiv over hentede sider. Tabellen `innhold` har hvert unike innhold
+    én gang, og `versjoner` har én rad per URL og innhold med når det først og
+    sist ble sett, og overskriften skrapen fant.
+    """
+
+    def __init__(self, sti=STANDARD_STI):
+        self.sti = sti
+        self.lagret = 0
+        self.nye = 0
+        self._lås = threading.Lock()
+
+        mappe = os.path.dirname(sti)
+        if mappe:
+            os.makedirs(mappe, exist_ok=True)
+
+        self._db = sqlite3.connect(sti, check_same_thread=False)
+        self._db.executescript('''
+            CREATE TABLE IF NOT EXISTS innhold (
+                hash TEXT PRIMARY KEY,
+                format TEXT NOT NULL,
+                data BLOB NOT NULL,
+                størrelse INTEGER NOT NULL,
+                komprimert INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS versjoner (
+                id INTEGER PRIMARY KEY,
+                url TEXT NOT NULL,
+                endelig_url TEXT NOT NULL,
+                status INTEGER NOT NULL,
+                hash TEXT NOT NULL REFERENCES innhold(hash),
+                først_sett REAL NOT NULL,
+                sist_sett REAL NOT NULL,
+                overskrift TEXT
+            );
+            CREATE INDEX IF NOT EXISTS versjoner_url ON versjoner(url, først_sett);
+        ''')
+
+    def lukk(self):
+        with self._lås:
+            self._db.close()
+
+    def lagre(self, url, response, overskrift=None):
+        """
+        Arkiverer svaret for `url` (URL-en fra CSV-en, ikke nødvendigvis den
+        endelige). Gir hashen til innholdet.
+        """
+        content = response.content
+        hash_ = hashlib.sha256(content).hexdigest()
+        nå = time.time()
+
+        with self._lås:
+            finnes = self._db.execute('SELECT 1 FROM innhold WHERE hash = ?', (hash_,)).fetchone()
+        # Komprimeringen er det som koster, så den gjøres utenfor låsen og bare for nytt innhold
+        if not finnes:
+            format_, komprimert = komprimer(content)
+
+        with self._lås:
+            if not finnes:
+                self._db.execute(
+                    'INSERT OR IGNORE INTO innhold VALUES (?, ?, ?, ?, ?)',
+                    (hash_, format_, komprimert, len(content), len(komprimert))
+                )
+            siste = self._db.execute(
+                'SELECT id, hash FROM versjoner WHERE url = ? ORDER BY først_sett DESC LIMIT 1', (url,)
+            ).fetchone()
+            if siste and siste[1] == hash_:
+                self._db.execute(
+                    'UPDATE versjoner SET sist_sett = ?, overskrift = COALESCE(?, overskrift) WHERE id = ?',
+                    (nå, overskrift, siste[0])
+                )
+            else:
+                self._db.execute(
+                    'INSERT INTO versjoner (url, endelig_url, status, hash, først_sett, sist_sett, overskrift) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                    (url, getattr(response, 'url', url) or url, response.status_code, hash_, nå, nå, overskrift)
+                )
+                self.nye += 1
+            self._db.commit()
+            self.lagret += 1
+        return hash_
+
+    def innhold(self, hash_):
+        with self._lås:
+            rad = self._db.execute('SELECT format, data FROM innhold WHERE hash = ?', (hash_,)).fetchone()
+        return pakk_ut(*rad) if rad else None
+
+    def historikk(self, url):
+        """Versjonene til en URL, eldste først, som dicts"""
+        with self._lås:
+            rader = self._db.execute(
+                'SELECT v.hash, v.endelig_url, v.status, v.først_sett, v.sist_sett, v.overskrift, i.størrelse '
+                'FROM versjoner v JOIN innhold i USING (hash) WHERE v.url = ? ORDER BY v.først_sett', (url,)
+            ).fetchall()
+        felter = ('hash', 'endelig_url', 'status', 'først_sett', 'sist_sett', 'overskrift', 'størrelse')
+        return [dict(zip(felter, rad)) for rad in rader]
+
+    def side(self, url, tidspunkt=None):
+        """HTML-en URL-en hadde ved `tidspunkt` (epoch-sekunder), eller den siste. None hvis den ikke finnes"""
+        with self._lås:
+            rad = self._db.execute(
+                'SELECT hash FROM versjoner WHERE url = ? AND først_sett <= ? ORDER BY først_sett DESC LIMIT 1',
+                (url, tidspunkt if tidspunkt is not None else float('inf'))
+            ).fetchone()
+        return self.innhold(rad[0]) if rad else None
+
+    def siste_versjoner(self):
+        """
+        (url, hash, overskrift) for den nyeste versjonen av hver URL, i
+        rekkefølgen URL-ene først ble arkivert
+        """
+        with self._lås:
+            return self._db.execute('''
+                SELECT v.url, v.hash, v.overskrift FROM versjoner v
+                JOIN (SELECT url, MAX(først_sett) AS siste, MIN(id) AS første FROM versjoner GROUP BY url) s
+                  ON v.url = s.url AND v.først_sett = s.siste
+                ORDER BY s.første
+            ''').fetchall()
+
+    def statistikk(self):
+        with self._lås:
+            urler, versjoner = self._db.execute('SELECT COUNT(DISTINCT url), COUNT(*) FROM versjoner').fetchone()
+            unike, størrelse, komprimert = self._db.execute(
+                'SELECT COUNT(*), COALESCE(SUM(størrelse), 0), COALESCE(SUM(komprimert), 0) FROM innhold'
+            ).fetchone()
+            formater = dict(self._db.execute('SELECT format, COUNT(*) FROM innhold GROUP BY format').fetchall())
+        return {'urler': urler, 'versjoner': versjoner, 'unike': unike,
+                'størrelse': størrelse, 'komprimert': komprimert, 'formater': formater}
+
+    def sammendrag(self):
+        """Kort linje for slutten av en kjøring"""
+        return f"🗄️ Sidearkiv: {self.lagret} sider arkivert, {self.nye} nye versjoner ({self.sti})"
+
+
+def dato(tidspunkt):
+    return datetime.fromtimestamp(tidspunkt).strftime('%Y-%m-%d %H:%M')
+
+def kjør_overskrifter(arkiv, parser, output=None):
+    """Kjører uttrekket på nytt over siste versjon av hver side og viser hva som er endret"""
+    import csv
+
+    from overskrift import finn_overskrift
+
+    versjoner = arkiv.siste_versjoner()
+    start = time.perf_counter()
+    resultater = []
+    for url, hash_, gammel in versjoner:
+        ny = finn_overskrift(arkiv.innhold(hash_), parser, vis=False)
+        resultater.append({'url': url, 'hash': hash_, 'lagret': gammel or '', 'ny': ny})
+    sekunder = time.perf_counter() - start
+
+    endret = [r for r in resultater if r['lagret'] and r['lagret'] != r['ny']]
+    for r in endret[:20]:
+        print(f"  🔀 {r['url']}: '{r['lagret']}' → '{r['ny']}'")
+    if len(endret) > 20:
+        print(f"  ... og {len(endret) - 20} flere")
+    reserve = sum(1 for r in resultater if r['ny'].startswith(('BOTANISK:', 'FALLBACK_TITLE:', 'INGEN_OVERSKRIFT')))
+    print(f"📊 {len(resultater)} sider med '{parser}' på {sekunder:.2f} s: "
+          f"{len(endret)} annerledes enn da de ble hentet, {reserve} uten planteoverskrift")
+
+    if output:
+        with open(output, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=['url', 'hash', 'lagret', 'ny'])
+            writer.writeheader()
+            writer.writerows(resultater)
+        print(f"📁 Skrev {output}")
+    return resultater
+
+def main():
+    from overskrift import BACKENDS
+
+    parser = argparse.ArgumentParser(description="Ser i og bruker arkivet over hentede norskflora-sider")
+    parser.add_argument('--arkiv', default=STANDARD_STI, help="Arkivfilen")
+    kommandoer = parser.add_subparsers(dest='kommando')
+    kommandoer.add_parser('statistikk', help="Antall sider, versjoner og plass")
+    historikk = kommandoer.add_parser('historikk', help="Versjonene til én URL")
+    historikk.add_argument('url')
+    vis = kommandoer.add_parser('vis', help="Skriv HTML-en til en URL til stdout")
+    vis.add_argument('url')
+    vis.add_argument('--hash', help="En bestemt versjon (fra historikk), ellers den siste")
+    overskrifter = kommandoer.add_parser('overskrifter', help="Finn planteoverskriftene på nytt uten nett")
+    overskrifter.add_argument('--parser', choices=list(BACKENDS), default='strøm')
+    overskrifter.add_argument('-o', '--output', help="Skriv alle resultatene til denne CSV-en")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.arkiv):
+        print(f"❌ Finner ikke arkivet: {args.arkiv}")
+        raise SystemExit(1)
+    arkiv = Sidearkiv(args.arkiv)
+
+    try:
+        if args.kommando == 'historikk':
+            versjoner = arkiv.historikk(args.url)
+            if not versjoner:
+                print(f"❌ {args.url} er ikke arkivert")
+                raise SystemExit(1)
+            for v in versjoner:
+                print(f"  {v['hash'][:12]}  {dato(v['først_sett'])} - {dato(v['sist_sett'])}  "
+                      f"{v['status']}  {v['størrelse']} bytes  {v['overskrift'] or '-'}")
+        elif args.kommando == 'vis':
+            html = arkiv.innhold(args.hash) if args.hash else arkiv.side(args.url)
+            if html is None:
+                print(f"❌ {args.hash or args.url} er ikke arkivert", file=sys.stderr)
+                raise SystemExit(1)
+            sys.stdout.buffer.write(html)
+        elif args.kommando == 'overskrifter':
+            kjør_overskrifter(arkiv, args.parser, args.output)
+        else:
+            s = arkiv.statistikk()
+            andel = s['komprimert'] / s['størrelse'] if s['størrelse'] else 0
+            print(f"🗄️ {args.arkiv}: {s['urler']} URL-er, {s['versjoner']} versjoner, {s['unike']} unike sider")
+            print(f"   {s['størrelse'] / 1e6:.1f} MB HTML lagret som {s['komprimert'] / 1e6:.1f} MB ({andel:.0%}), "
+                  f"{', '.join(f'{n} {f}' for f, n in s['formater'].items()) or 'tomt'}")
+    except RuntimeError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        raise SystemExit(1)
+    finally:
+        arkiv.lukk()
+
+if __name__ == "__main__":
+    main()
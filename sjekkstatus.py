@@ -0,0 +1,335 @@
+"""
+Planlagt lenkesjekk med varig tilstand.
+
+Hver norskflora_url, bilde_url og wikipedia_image_url i CSV-ene har en rad i
+en SQLite-fil med siste resultat, tidspunkt og fingeravtrykk av innholdet.
+En kjøring sjekker bare det som er forfalt, i denne rekkefølgen:
+
+1. URL-er som feilet sist
+2. URL-er som aldri er sjekket
+3. resten, eldste sjekk først
+
+En URL som er OK flere ganger på rad sjekkes sjeldnere (1, 2, 4, ... døgn,
+høyst --maks-intervall). Endrer innholdet seg, begynner intervallet på nytt.
+Med --maks-tid og --maks-foresporsler holdes en nattlig kjøring billig også
+når datasettet vokser.
+"""
+import argparse
+import csv
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+
+import requests
+
+from bildesjekk import Bildesjekker
+from metrikk import Fremdrift, Metrikker
+from nettverk import Vertspause, hent_med_forsøk, lag_sesjon, parallelt
+from skjema import finn_skjema, kolonne
+
+LENKEKOLONNER = ('norskflora_url', 'bilde_url', 'wikipedia_image_url')
+
+DØGN = 24 * 3600
+GRUNNINTERVALL = DØGN
+MAKS_INTERVALL = 30 * DØGN
+
+def les_lenker(csv_filer):
+    """
+    Gir {url: (kolonne, navn)} for alle lenkene i CSV-ene. Peker flere arter til
+    samme URL, får den alle navnene skilt med '|', så sjekken ser at noe er galt.
+    """
+    navn_per_url = {}
+    kolonner = {}
+    for csv_fil in csv_filer:
+        with open(csv_fil, 'r', encoding='utf-8') as f:
+            reader = csv.DictReader(f)
+            navn_kolonne = kolonne(finn_skjema(reader.fieldnames), 'Norsk navn')
+            for row in reader:
+                for lenkekolonne in LENKEKOLONNER:
+                    url = (row.get(lenkekolonne) or '').strip()
+                    if url.startswith('http'):
+                        kolonner[url] = lenkekolonne
+                        navn_per_url.setdefault(url, {})[(row.get(navn_kolonne) or '').strip()] = True
+    return {url: (kolonner[url], '|'.join(navn)) for url, navn in navn_per_url.items()}
+
+def neste_intervall(ok_antall, grunn=GRUNNINTERVALL, maks=MAKS_INTERVALL):
+    """Eksponentiell backoff: 1, 2, 4, ... ganger grunnintervallet etter så mange OK på rad"""
+    return min(maks, grunn * 2 ** max(0, ok_antall - 1))
+
+class Sjekkstatus:
+    """Tilstanden til hver lenke i en SQLite-fil, trygg å bruke fra flere tråder"""
+
+    def __init__(self, sti='.sjekkstatus.sqlite3', grunn=GRUNNINTERVALL, maks=MAKS_INTERVALL):
+        self.sti = sti
+        self.grunn = grunn
+        self.maks = maks
+        self._lås = threading.Lock()
+
+        mappe = os.path.dirname(sti)
+        if mappe:
+            os.makedirs(mappe, exist_ok=True)
+
+        self._db = sqlite3.connect(sti, check_same_thread=False)
+        self._db.executescript('''
+            CREATE TABLE IF NOT EXISTS lenker (
+                url TEXT PRIMARY KEY,
+                kolonne TEXT NOT NULL,
+                navn TEXT NOT NULL,
+                status TEXT,
+                melding TEXT,
+                fingeravtrykk TEXT,
+                etag TEXT,
+                sist_sjekket REAL,
+                neste_sjekk REAL,
+                ok_antall INTEGER NOT NULL DEFAULT 0,
+                feil_antall INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS lenker_neste ON lenker(neste_sjekk);
+        ''')
+
+    def lukk(self):
+        with self._lås:
+            self._db.close()
+
+    def oppdater_lenker(self, lenker):
+        """Legger til nye URL-er og fjerner de som ikke lenger er i datasettet. Gir (nye, fjernet)"""
+        with self._lås:
+            kjente = {url: (k, navn) for url, k, navn in self._db.execute('SELECT url, kolonne, navn FROM lenker')}
+            nye = [(url, k, navn) for url, (k, navn) in lenker.items() if url not in kjente]
+            self._db.executemany('INSERT INTO lenker (url, kolonne, navn) VALUES (?, ?, ?)', nye)
+            # Navnet kan ha blitt rettet i CSV-en siden sist. Da må siden sjekkes mot det nye
+            # navnet med en full GET med en gang, ellers gir en 304 bare OK for det gamle
+            endret = [(k, navn, url) for url, (k, navn) in lenker.items() if url in kjente and kjente[url] != (k, navn)]
+            self._db.executemany('''
+                UPDATE lenker SET kolonne = ?, navn = ?, etag = NULL, fingeravtrykk = NULL,
+                                  neste_sjekk = NULL, ok_antall = 0
+                WHERE url = ?
+            ''', endret)
+            borte = [(url,) for url in set(kjente) - set(lenker)]
+            self._db.executemany('DELETE FROM lenker WHERE url = ?', borte)
+            self._db.commit()
+        return len(nye), len(borte)
+
+    def forfalte(self, nå=None):
+        """Alle URL-er som skal sjekkes nå, i prioritert rekkefølge: feilende, aldri sjekket, eldste"""
+        nå = nå or time.time()
+        with self._lås:
+            return self._db.execute('''
+                SELECT url, kolonne, navn, etag, status FROM lenker
+                WHERE neste_sjekk IS NULL OR neste_sjekk <= ?
+                ORDER BY
+                    CASE WHEN status IS NULL THEN 1 WHEN status = 'OK' THEN 2 ELSE 0 END,
+                    sist_sjekket
+            ''', (nå,)).fetchall()
+
+    def registrer(self, url, status, melding='', fingeravtrykk=None, etag=None, nå=None):
+        """Lagrer resultatet av én sjekk og regner ut når URL-en skal sjekkes neste gang"""
+        nå = nå or time.time()
+        with self._lås:
+            rad = self._db.execute('SELECT fingeravtrykk, ok_antall, feil_antall FROM lenker WHERE url = ?',
+                                   (url,)).fetchone()
+            if not rad:
+                return
+            gammelt_avtrykk, ok_antall, feil_antall = rad
+
+            if status == 'OK':
+                # Nytt innhold kan bety at siden er flyttet eller byttet ut, så følg den tettere igjen
+                endret = gammelt_avtrykk and fingeravtrykk and fingeravtrykk != gammelt_avtrykk
+                ok_antall = 1 if endret else ok_antall + 1
+                feil_antall = 0
+                neste = nå + neste_intervall(ok_antall, self.grunn, self.maks)
+            else:
+                # Feilende sjekkes ved neste kjøring uansett, og står først i køen
+                ok_antall = 0
+                feil_antall += 1
+                neste = nå
+
+            self._db.execute('''
+                UPDATE lenker SET status = ?, melding = ?, fingeravtrykk = COALESCE(?, fingeravtrykk),
+                    etag = COALESCE(?, etag), sist_sjekket = ?, neste_sjekk = ?, ok_antall = ?, feil_antall = ?
+                WHERE url = ?
+            ''', (status, melding, fingeravtrykk, etag, nå, neste, ok_antall, feil_antall, url))
+            self._db.commit()
+
+    def feilende(self):
+        with self._lås:
+            return self._db.execute('''
+                SELECT url, kolonne, navn, status, melding, sist_sjekket, feil_antall FROM lenker
+                WHERE status IS NOT NULL AND status != 'OK' ORDER BY feil_antall DESC, url
+            ''').fetchall()
+
+    def telling(self):
+        with self._lås:
+            return Counter(dict(self._db.execute(
+                "SELECT COALESCE(status, 'USJEKKET'), COUNT(*) FROM lenker GROUP BY 1"
+            ).fetchall()))
+
+class Budsjett:
+    """Stopper kjøringen når tiden eller antall forespørsler er brukt opp"""
+
+    def __init__(self, maks_tid=None, maks_forespørsler=None):
+        self.maks_tid = maks_tid
+        self.maks_forespørsler = maks_forespørsler
+        self.start = time.monotonic()
+        self.forespørsler = 0
+        self._lås = threading.Lock()
+
+    def brukt(self, antall=1):
+        with self._lås:
+            self.forespørsler += antall
+
+    def igjen(self):
+        if self.maks_tid is not None and time.monotonic() - self.start >= self.maks_tid:
+            return False
+        if self.maks_forespørsler is not None and self.forespørsler >= self.maks_forespørsler:
+            return False
+        return True
+
+class Lenkesjekker:
+    """Sjekker forfalte lenker i prioritert rekkefølge innenfor et budsjett, og lagrer resultatene"""
+
+    def __init__(self, status, antall_arbeidere=4, pause=0.5, forsøk=2, timeout=15, budsjett=None, metrikker=None):
+        self.status = status
+        self.antall_arbeidere = antall_arbeidere
+        self.sesjon = lag_sesjon(antall_arbeidere)
+        self.vertspause = Vertspause(pause)
+        self.forsøk = forsøk
+        self.timeout = timeout
+        self.budsjett = budsjett or Budsjett()
+        self.metrikker = metrikker or Metrikker('lenkesjekk')
+        self.bilder = Bildesjekker(forsøk=forsøk, timeout=timeout, mål=False, sesjon=self.sesjon,
+                                   vertspause=self.vertspause)
+
+    def _get(self, url, **kwargs):
+        self.vertspause.vent(url)
+        with self.metrikker.tid('http_henting'):
+            return hent_med_forsøk(self.sesjon, url, forsøk=self.forsøk, vertspause=self.vertspause,
+                                   timeout=self.timeout, **kwargs)
+
+    def sjekk_side(self, url, navn, etag):
+        """norskflora-siden må finnes og ha en planteoverskrift som matcher navnet (alle navnene)"""
+        from litenapp import STANDARD_PARSER, sjekk_tittel_match
+        from overskrift import finn_overskrift, tegnsett_fra
+
+        headers = {'If-None-Match': etag} if etag else {}
+        response = self._get(url, headers=headers, allow_redirects=True)
+        if response.status_code == 304:
+            return 'OK', 'Uendret siden sist', None, etag
+        if response.status_code != 200:
+            return 'FEIL', f"HTTP {response.status_code}", None, None
+
+        avtrykk = hashlib.sha256(response.content).hexdigest()[:16]
+        with self.metrikker.tid('parsing'):
+            overskrift = finn_overskrift(response.content, STANDARD_PARSER, vis=False,
+                                         tegnsett=tegnsett_fra(response))
+        resultater = [sjekk_tittel_match(n, overskrift) for n in navn.split('|')]
+        match = all(m for m, _ in resultater)
+        beskrivelse = '; '.join(dict.fromkeys(b for _, b in resultater))
+        # Bare en side som matcher kan revalideres med ETag neste gang
+        return ('OK' if match else 'MISMATCH'), beskrivelse, avtrykk, response.headers.get('ETag') if match else None
+
+    def sjekk_bilde(self, url):
+        """Et bilde sjekkes med bildesjekk.py sin HEAD (eller Range-GET hvis serveren nekter HEAD)"""
+        with self.metrikker.tid('http_henting'):
+            resultat = self.bilder.sjekk(url)
+        # Første forespørsel er allerede trukket fra budsjettet
+        self.budsjett.brukt(resultat['forespørsler'] - 1)
+        if resultat['status'] != 'OK':
+            return 'FEIL', resultat['grunn'], None, None
+        avtrykk = resultat['etag'] or f"{resultat['bytes'] or ''}|{resultat['content_type']}"
+        return 'OK', resultat['content_type'], avtrykk, None
+
+    def sjekk(self, oppføring):
+        url, lenkekolonne, navn, etag, forrige = oppføring
+        try:
+            if lenkekolonne == 'norskflora_url':
+                status, melding, avtrykk, ny_etag = self.sjekk_side(url, navn, etag)
+            else:
+                status, melding, avtrykk, ny_etag = self.sjekk_bilde(url)
+        except requests.exceptions.RequestException as e:
+            self.metrikker.feil(e)
+            status, melding, avtrykk, ny_etag = 'FEIL', str(e), None, None
+
+        self.status.registrer(url, status, melding, avtrykk, ny_etag)
+        self.metrikker.tell('status', status)
+        if forrige and forrige != status:
+            print(f"   🔁 {forrige} → {status}: {url} ({melding})")
+        return status
+
+    def kjør(self):
+        """Sjekker forfalte lenker til køen er tom eller budsjettet er brukt opp. Gir antall sjekket"""
+        kø = self.status.forfalte()
+        fremdrift = Fremdrift(len(kø))
+
+        def innenfor_budsjett():
+            # Forespørselen trekkes fra budsjettet før den sendes, ellers ville
+            # arbeiderne rekke å hente flere enn budsjettet før noen er ferdige
+            for oppføring in kø:
+                if not self.budsjett.igjen():
+                    return
+                self.budsjett.brukt()
+                yield oppføring
+
+        sjekket = 0
+        for _ in parallelt(self.sjekk, innenfor_budsjett(), self.antall_arbeidere):
+            sjekket += 1
+            fremdrift.steg()
+        return sjekket, len(kø)
+
+def lagre_feilende(status, sti):
+    with open(sti + '.tmp', 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['url', 'kolonne', 'navn', 'status', 'melding', 'sist_sjekket', 'feil_antall'])
+        for url, lenkekolonne, navn, st, melding, sist, feil_antall in status.feilende():
+            writer.writerow([url, lenkekolonne, navn, st, melding,
+                             time.strftime('%Y-%m-%d %H:%M', time.localtime(sist)), feil_antall])
+    os.replace(sti + '.tmp', sti)
+
+def main():
+    parser = argparse.ArgumentParser(description="Sjekker bare lenkene som er forfalt: feilende først, så de eldste")
+    parser.add_argument('csv_filer', nargs='*', default=['public/data/blomster.csv'])
+    parser.add_argument('--status', default='.sjekkstatus.sqlite3', help="Fil med tilstanden fra tidligere kjøringer")
+    parser.add_argument('--maks-tid', type=float, help="Stopp etter så mange sekunder")
+    parser.add_argument('--maks-foresporsler', type=int, help="Stopp etter så mange forespørsler")
+    parser.add_argument('--grunnintervall', type=float, default=1, help="Døgn mellom sjekker etter første OK")
+    parser.add_argument('--maks-intervall', type=float, default=30, help="Høyeste antall døgn mellom sjekker")
+    parser.add_argument('--arbeidere', type=int, default=4, help="Samtidige forespørsler")
+    parser.add_argument('--pause', type=float, default=0.5, help="Minste pause mellom forespørsler til samme vert")
+    parser.add_argument('--rapport', default='feilende_lenker.csv', help="Hvor feilende lenker skrives")
+    parser.add_argument('--metrikker', help="Skriv målingene hit: .prom gir Prometheus-textfile, ellers JSONL")
+    args = parser.parse_args()
+
+    for csv_fil in args.csv_filer:
+        if not os.path.exists(csv_fil):
+            print(f"❌ Finner ikke: {csv_fil}")
+            raise SystemExit(1)
+
+    status = Sjekkstatus(args.status, grunn=args.grunnintervall * DØGN, maks=args.maks_intervall * DØGN)
+    try:
+        nye, fjernet = status.oppdater_lenker(les_lenker(args.csv_filer))
+        print(f"🔗 {sum(status.telling().values())} lenker ({nye} nye, {fjernet} fjernet)")
+
+        sjekker = Lenkesjekker(status, antall_arbeidere=args.arbeidere, pause=args.pause,
+                               budsjett=Budsjett(args.maks_tid, args.maks_foresporsler))
+        sjekket, forfalt = sjekker.kjør()
+
+        print(f"\n{'=' * 60}")
+        print(f"✅ Sjekket {sjekket} av {forfalt} forfalte lenker ({sjekker.budsjett.forespørsler} forespørsler)")
+        if sjekket < forfalt:
+            print(f"⏳ Budsjettet ble brukt opp - {forfalt - sjekket} står først i køen neste gang")
+        telling = status.telling()
+        print("📊 " + ', '.join(f"{st}: {antall}" for st, antall in sorted(telling.items())))
+        print(sjekker.metrikker.sammendrag())
+        if args.metrikker:
+            sjekker.metrikker.skriv(args.metrikker)
+
+        lagre_feilende(status, args.rapport)
+        print(f"📁 {len(status.feilende())} feilende lenker i {args.rapport}")
+    finally:
+        status.lukk()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+De to CSV-skjemaene i repoet.
+
+'skript' er formatet skrapene leser og skriver (midlertidig.csv, Ny_1.csv):
+kolonnenavn med stor forbokstav og mellomrom. 'app' er formatet appen leser
+fra public/data: små bokstaver, understrek og Wikipedia-kolonnene.
+"""
+
+SKJEMAER = {
+    'skript': [
+        'Norsk navn',
+        'Latinsk navn',
+        'Familie',
+        'Type',
+        'bilde_url',
+        'norskflora_url',
+        'bilde_status',
+    ],
+    'app': [
+        'norsk_navn',
+        'latinsk_navn',
+        'familie',
+        'type',
+        'norskflora_url',
+        'bilde_url',
+        'bilde_status',
+        'wikipedia_url',
+        'wikipedia_image_url',
+        'wikipedia_image_file',
+        'wikipedia_status',
+    ],
+}
+
+# Navnekolonnene heter forskjellig i de to skjemaene, resten er like
+SKRIPT_TIL_APP = {
+    'Norsk navn': 'norsk_navn',
+    'Latinsk navn': 'latinsk_navn',
+    'Familie': 'familie',
+    'Type': 'type',
+}
+APP_TIL_SKRIPT = {app: skript for skript, app in SKRIPT_TIL_APP.items()}
+
+def finn_skjema(fieldnames):
+    """Gjetter skjema ut fra header-raden, eller None hvis ingen av dem passer"""
+    felter = set(fieldnames or [])
+    if 'norsk_navn' in felter or 'latinsk_navn' in felter:
+        return 'app'
+    if 'Norsk navn' in felter or 'Latinsk navn' in felter:
+        return 'skript'
+    return None
+
+def kolonne(skjema, felt):
+    """Slår opp kolonnenavnet for et felt i skriptskjemaet ('Latinsk navn') i valgt skjema"""
+    if skjema == 'app':
+        return SKRIPT_TIL_APP.get(felt, felt)
+    return felt
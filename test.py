@@ -1,142 +1,99 @@
-import csv
+import argparse
 import os
+import shutil
 
-def fikse_kolonner(input_fil, output_fil=None):
+from csvfil import les_rader, normaliser_rader, skriv_atomisk
+from skjema import SKJEMAER, finn_skjema
+
+def fikse_kolonner(input_fil, output_fil=None, skjema=None, backup=True):
     """
-    Reorganiserer CSV-kolonner til riktig rekkefølge
+    Reorganiserer CSV-kolonner til riktig rekkefølge.
+
+    Filen strømmes rad for rad, så minnebruken er den samme uansett størrelse.
+    Skjemaet ('skript' eller 'app', se skjema.py) gjettes fra header-raden hvis
+    det ikke er oppgitt. Uten output_fil skrives det tilbake til input_fil.
     """
     if not output_fil:
-        # Hvis ingen output-fil spesifisert, lag backup og overskrive original
-        backup_fil = input_fil.replace('.csv', '_backup.csv')
         output_fil = input_fil
-        print(f"📄 Lager backup: {backup_fil}")
-        # Kopier original til backup
-        import shutil
-        shutil.copy2(input_fil, backup_fil)
-    
-    # Ønsket kolonnerækkefølge
-    onsket_rekkefølge = [
-        'Norsk navn',
-        'Latinsk navn', 
-        'Familie',
-        'Type',
-        'bilde_url',
-        'norskflora_url',
-        'bilde_status'
-    ]
-    
+        if backup:
+            # Lag backup før originalen overskrives
+            backup_fil = input_fil.replace('.csv', '_backup.csv')
+            print(f"📄 Lager backup: {backup_fil}")
+            shutil.copy2(input_fil, backup_fil)
+
     print(f"📖 Leser: {input_fil}")
-    
-    # Les inn CSV
-    with open(input_fil, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        original_fieldnames = reader.fieldnames
-        rows = list(reader)
-    
-    print(f"📋 Original kolonnerækkefølge:")
-    for i, col in enumerate(original_fieldnames):
-        print(f"  {i+1}. {col}")
-    
-    print(f"\n🎯 Ønsket kolonnerækkefølge:")
-    for i, col in enumerate(onsket_rekkefølge):
-        print(f"  {i+1}. {col}")
-    
+
+    rader = les_rader(input_fil)
+    original_fieldnames = next(rader)
+
+    skjema = skjema or finn_skjema(original_fieldnames)
+    if skjema not in SKJEMAER:
+        print(f"❌ Kjenner ikke igjen kolonnene i {input_fil}: {original_fieldnames}")
+        rader.close()
+        return 0
+
+    # Ønsket kolonnerækkefølge
+    onsket_rekkefølge = SKJEMAER[skjema]
+    print(f"🎯 Skjema: {skjema}")
+
     # Sjekk at alle ønskede kolonner eksisterer
-    manglende = []
-    for col in onsket_rekkefølge:
-        if col not in original_fieldnames:
-            manglende.append(col)
-    
+    manglende = [col for col in onsket_rekkefølge if col not in original_fieldnames]
     if manglende:
-        print(f"\n⚠️ Manglende kolonner: {manglende}")
+        print(f"⚠️ Manglende kolonner: {manglende}")
         print("Legger til tomme kolonner...")
-    
+
     # Legg til eventuelle ekstra kolonner som ikke er i ønsket liste
     alle_kolonner = onsket_rekkefølge.copy()
     for col in original_fieldnames:
         if col not in alle_kolonner:
             alle_kolonner.append(col)
             print(f"➕ Beholder ekstra kolonne: {col}")
-    
+
     # Skriv ny CSV med riktig rekkefølge
-    print(f"\n💾 Skriver til: {output_fil}")
-    
-    with open(output_fil, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.DictWriter(f, fieldnames=alle_kolonner)
-        writer.writeheader()
-        
-        for row in rows:
-            # Sørg for at alle kolonner eksisterer (fyll inn tomme hvis de mangler)
-            for col in alle_kolonner:
-                if col not in row:
-                    row[col] = ''
-            writer.writerow(row)
-    
-    print(f"\n✅ Ferdig!")
-    print(f"📊 Prosesserte {len(rows)} rader")
+    print(f"💾 Skriver til: {output_fil}")
+    antall = skriv_atomisk(output_fil, alle_kolonner, normaliser_rader(rader, alle_kolonner))
+
+    print(f"✅ Prosesserte {antall} rader")
     print(f"🔄 Reorganiserte fra {len(original_fieldnames)} til {len(alle_kolonner)} kolonner")
-    
-    # Vis første rad som eksempel
-    if rows:
-        print(f"\n📋 Eksempel (første rad):")
-        for col in alle_kolonner:
-            value = rows[0].get(col, '')
-            if len(str(value)) > 50:
-                value = str(value)[:47] + "..."
-            print(f"  {col}: {value}")
+
+    return antall
 
 def main():
     """
     Hovedfunksjon - fikser CSV kolonnerækkefølge
     """
+    parser = argparse.ArgumentParser(description="Reorganiserer kolonnene i én eller flere CSV-filer")
+    parser.add_argument('filer', nargs='+', help="CSV-filer som skal fikses")
+    parser.add_argument('--skjema', choices=list(SKJEMAER), help="Tving skjema i stedet for å gjette fra header")
+    parser.add_argument('--output-mappe', help="Skriv fiksede filer hit i stedet for å overskrive originalene")
+    parser.add_argument('--ingen-backup', action='store_true', help="Ikke lag _backup.csv før en fil overskrives")
+    args = parser.parse_args()
+
     print("🔧 CSV KOLONNE-FIKSER")
     print("=" * 40)
     print("Reorganiserer kolonner til riktig rekkefølge")
     print()
-    
-    # Standard fil-stier
-    mulige_filer = [
-        "/Users/henrik/Desktop/mappe uten navn/norskflora_med_bilder_selenium.csv",
-        "/Users/henrik/Desktop/mappe uten navn/norskflora_database_med_bilder.csv",
-        "/Users/henrik/Desktop/mappe uten navn/midlertidig_med_urls.csv"
-    ]
-    
-    # Finn eksisterende filer
-    eksisterende_filer = []
-    for fil in mulige_filer:
-        if os.path.exists(fil):
-            eksisterende_filer.append(fil)
-    
-    if eksisterende_filer:
-        print("📁 Fant disse CSV-filene:")
-        for i, fil in enumerate(eksisterende_filer):
-            print(f"  {i+1}. {os.path.basename(fil)}")
-        
+
+    if args.output_mappe:
+        os.makedirs(args.output_mappe, exist_ok=True)
+
+    feil = 0
+    for input_fil in args.filer:
+        if not os.path.exists(input_fil):
+            print(f"❌ Finner ikke filen: {input_fil}")
+            feil += 1
+            continue
+
+        output_fil = None
+        if args.output_mappe:
+            output_fil = os.path.join(args.output_mappe, os.path.basename(input_fil))
+
+        # Kjør fiksing
+        fikse_kolonner(input_fil, output_fil, skjema=args.skjema, backup=not args.ingen_backup)
         print()
-        valg = input(f"Velg fil å fikse (1-{len(eksisterende_filer)}), eller skriv full sti: ").strip()
-        
-        if valg.isdigit() and 1 <= int(valg) <= len(eksisterende_filer):
-            input_fil = eksisterende_filer[int(valg) - 1]
-        else:
-            input_fil = valg
-    else:
-        input_fil = input("Skriv full sti til CSV-fil: ").strip()
-    
-    if not os.path.exists(input_fil):
-        print(f"❌ Finner ikke filen: {input_fil}")
-        return
-    
-    # Spør om output
-    output_valg = input("Overskrive original fil? (j/n, ENTER for ja): ").lower().strip()
-    
-    if output_valg == 'n':
-        output_fil = input_fil.replace('.csv', '_fikset.csv')
-        print(f"📝 Ny fil vil bli: {output_fil}")
-    else:
-        output_fil = None  # Dette trigger backup + overskrivning
-    
-    # Kjør fiksing
-    fikse_kolonner(input_fil, output_fil)
+
+    if feil:
+        raise SystemExit(1)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
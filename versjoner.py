@@ -0,0 +1,337 @@
+"""
+Versjoner av datasettet: nøkkelbasert diff, tre-veis fletting og et manifest.
+
+Hver versjon (blomster.csv, blomster_3.csv, 'blomster 2.csv', kastet/...)
+lastes inn i en hash-indeks {art-nøkkel: (hash, rad)} i ett pass, uansett
+hvilket av skjemaene den er skrevet i. Diff og fletting går så én gang over
+nøklene, og sammenligner bare feltene i rader der hashen er ulik.
+
+Manifestet (versjoner.json) husker hvilke filer som finnes, med hash, antall
+rader og skjema, og teller opp neste versjonsnummer for rapporter som
+Ny_Ny_<n>.csv - i stedet for å prøve filnavn til ett er ledig.
+"""
+import argparse
+import csv
+import hashlib
+import itertools
+import json
+import os
+import re
+import time
+
+from journal import art_nøkkel
+from skjema import SKJEMAER, SKRIPT_TIL_APP, finn_skjema
+
+MANIFEST = 'versjoner.json'
+
+# Det eldste formatet ('blomster 2.csv', kastet/gammelblomster.csv) oversatt til app-skjemaet
+GAMMEL_TIL_APP = {
+    'Art - Norsk': 'norsk_navn',
+    'Vitenskapelig navn': 'latinsk_navn',
+    'Familienavn': 'familie',
+    'Sjikt': 'type',
+}
+
+KOLONNER = SKJEMAER['app']
+
+def radhash(rad):
+    verdier = '\x1f'.join(rad.get(k, '') for k in KOLONNER)
+    return hashlib.sha1(verdier.encode('utf-8')).hexdigest()
+
+def til_app(row, skjema):
+    """Oversetter en rad fra hvilket som helst skjema til app-skjemaet, med tomme felter der det mangler"""
+    if skjema == 'skript':
+        oversettelse = SKRIPT_TIL_APP
+    elif skjema == 'gammel':
+        oversettelse = GAMMEL_TIL_APP
+    else:
+        oversettelse = {}
+    rad = {felt: '' for felt in KOLONNER}
+    for kolonne, verdi in row.items():
+        felt = oversettelse.get(kolonne, kolonne)
+        if felt in rad and verdi is not None:
+            rad[felt] = verdi.strip()
+    return rad
+
+def gjett_skjema(fieldnames):
+    skjema = finn_skjema(fieldnames)
+    if skjema:
+        return skjema
+    if 'Vitenskapelig navn' in (fieldnames or []):
+        return 'gammel'
+    return None
+
+class Versjon:
+    """
+    Én CSV-versjon som hash-indeks. `rader` er {nøkkel: rad} i filrekkefølge og
+    `hasher` {nøkkel: hash}. Samme latinske navn flere ganger får nøklene
+    'navn', 'navn#2', ...
+    """
+
+    def __init__(self, sti):
+        self.sti = sti
+        self.rader = {}
+        self.hasher = {}
+        self.duplikater = 0
+
+        with open(sti, 'r', encoding='utf-8', newline='') as f:
+            leser = csv.reader(f)
+            header = next(leser, [])
+            self.skjema = gjett_skjema(header)
+            if self.skjema is None and len(header) == len(KOLONNER):
+                # Filer uten header-rad (blomster_kastet.csv) er skrevet i app-skjemaet
+                self.skjema = 'app'
+                leser = itertools.chain([header], leser)
+                header = KOLONNER
+
+            for verdier in leser:
+                if any(v.strip() for v in verdier):
+                    self._legg_til(til_app(dict(zip(header, verdier)), self.skjema))
+
+    def _legg_til(self, rad):
+        grunn = art_nøkkel(rad['latinsk_navn']) or f"norsk:{art_nøkkel(rad['norsk_navn'])}"
+        nøkkel = grunn
+        nr = 1
+        while nøkkel in self.rader:
+            nr += 1
+            nøkkel = f"{grunn}#{nr}"
+        if nr > 1:
+            self.duplikater += 1
+        self.rader[nøkkel] = rad
+        self.hasher[nøkkel] = radhash(rad)
+
+    def __len__(self):
+        return len(self.rader)
+
+def diff(gammel, ny):
+    """
+    Gir (lagt_til, fjernet, endret): to lister med nøkler og {nøkkel: {felt: (fra, til)}}.
+    Rader med lik hash sammenlignes ikke felt for felt.
+    """
+    lagt_til = [n for n in ny.rader if n not in gammel.rader]
+    fjernet = [n for n in gammel.rader if n not in ny.rader]
+    endret = {}
+    for nøkkel, hash_ in ny.hasher.items():
+        gammel_hash = gammel.hasher.get(nøkkel)
+        if gammel_hash is None or gammel_hash == hash_:
+            continue
+        a, b = gammel.rader[nøkkel], ny.rader[nøkkel]
+        endret[nøkkel] = {felt: (a[felt], b[felt]) for felt in KOLONNER if a[felt] != b[felt]}
+    return lagt_til, fjernet, endret
+
+def flett(base, vår, deres):
+    """
+    Tre-veis fletting per felt. Gir (rader, konflikter), der rader er den
+    flettede listen i app-skjemaet og konflikter [(nøkkel, felt, vår, deres)].
+
+    Et felt som bare er endret på én side, får den endringen. Er det endret
+    ulikt på begge sider, vinner `vår` og det blir en konflikt. En rad som er
+    fjernet på én side og uendret på den andre, forsvinner; er den endret på
+    den andre siden, beholdes den endrede raden som en konflikt.
+    """
+    rader = []
+    konflikter = []
+    tom = {felt: '' for felt in KOLONNER}
+
+    # Vår rekkefølge først, deretter rader som bare finnes hos dem
+    nøkler = list(vår.rader) + [n for n in deres.rader if n not in vår.rader]
+    nøkler += [n for n in base.rader if n not in vår.rader and n not in deres.rader]
+
+    for nøkkel in nøkler:
+        b = base.hasher.get(nøkkel)
+        v = vår.hasher.get(nøkkel)
+        d = deres.hasher.get(nøkkel)
+
+        if v == d:
+            # Likt på begge sider (eller fjernet på begge)
+            if v is not None:
+                rader.append(vår.rader[nøkkel])
+            continue
+        if v == b:
+            if d is not None:
+                rader.append(deres.rader[nøkkel])
+            continue
+        if d == b:
+            if v is not None:
+                rader.append(vår.rader[nøkkel])
+            continue
+
+        # Endret ulikt på begge sider
+        if v is None or d is None:
+            beholdt = vår.rader.get(nøkkel) or deres.rader[nøkkel]
+            konflikter.append((nøkkel, '*', 'fjernet' if v is None else 'endret', 'fjernet' if d is None else 'endret'))
+            rader.append(beholdt)
+            continue
+
+        rb = base.rader.get(nøkkel, tom)
+        rv, rd = vår.rader[nøkkel], deres.rader[nøkkel]
+        flettet = {}
+        for felt in KOLONNER:
+            if rv[felt] == rd[felt] or rd[felt] == rb[felt]:
+                flettet[felt] = rv[felt]
+            elif rv[felt] == rb[felt]:
+                flettet[felt] = rd[felt]
+            else:
+                flettet[felt] = rv[felt]
+                konflikter.append((nøkkel, felt, rv[felt], rd[felt]))
+        rader.append(flettet)
+
+    return rader, konflikter
+
+def skriv_csv(sti, rader, kolonner=KOLONNER):
+    """Skriver via en midlertidig fil, så en halvskrevet fil aldri blir liggende"""
+    with open(sti + '.tmp', 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=kolonner, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(rader)
+    os.replace(sti + '.tmp', sti)
+
+def filhash(sti):
+    h = hashlib.sha256()
+    with open(sti, 'rb') as f:
+        for bit in iter(lambda: f.read(1 << 16), b''):
+            h.update(bit)
+    return h.hexdigest()
+
+class Versjonsmanifest:
+    """
+    versjoner.json i en mappe: {'filer': {navn: {...}}, 'neste': {base_navn: n}}.
+    Telleren for en base startes fra de eksisterende <base>_<n>.csv-filene
+    første gang den brukes, og går bare oppover etter det.
+    """
+
+    def __init__(self, mappe):
+        self.mappe = mappe
+        self.sti = os.path.join(mappe, MANIFEST)
+        self.data = {'filer': {}, 'neste': {}}
+        if os.path.exists(self.sti):
+            with open(self.sti, 'r', encoding='utf-8') as f:
+                self.data = json.load(f)
+
+    def lagre(self):
+        os.makedirs(self.mappe or '.', exist_ok=True)
+        with open(self.sti + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(self.data, f, ensure_ascii=False, indent=2, sort_keys=True)
+        os.replace(self.sti + '.tmp', self.sti)
+
+    def neste_versjon(self, base_navn):
+        """Reserverer neste versjonsnummer for base_navn og gir (sti, nummer)"""
+        neste = self.data['neste']
+        if base_navn not in neste:
+            mønster = re.compile(rf"^{re.escape(base_navn)}_(\d+)\.csv$")
+            funnet = [int(m.group(1)) for m in map(mønster.match, os.listdir(self.mappe or '.')) if m]
+            neste[base_navn] = max(funnet, default=0) + 1
+
+        versjon = neste[base_navn]
+        neste[base_navn] = versjon + 1
+        self.lagre()
+        return os.path.join(self.mappe, f"{base_navn}_{versjon}.csv"), versjon
+
+    def registrer(self, sti, forelder=None, versjon=None):
+        """Legger filen inn i manifestet med hash, antall rader og skjema"""
+        versjon = versjon or Versjon(sti)
+        navn = os.path.relpath(sti, self.mappe or '.')
+        self.data['filer'][navn] = {
+            'sha256': filhash(sti),
+            'rader': len(versjon),
+            'skjema': versjon.skjema,
+            'registrert': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'forelder': forelder,
+        }
+        self.lagre()
+        return self.data['filer'][navn]
+
+    def status(self):
+        """Gir [(navn, oppføring, 'ok' | 'endret' | 'mangler')]"""
+        resultat = []
+        for navn, oppføring in sorted(self.data['filer'].items()):
+            sti = os.path.join(self.mappe, navn)
+            if not os.path.exists(sti):
+                tilstand = 'mangler'
+            elif filhash(sti) != oppføring['sha256']:
+                tilstand = 'endret'
+            else:
+                tilstand = 'ok'
+            resultat.append((navn, oppføring, tilstand))
+        return resultat
+
+def vis_diff(gammel, ny, vis=20):
+    lagt_til, fjernet, endret = diff(gammel, ny)
+    print(f"🔍 {gammel.sti} ({len(gammel)} rader, {gammel.skjema}) → {ny.sti} ({len(ny)} rader, {ny.skjema})")
+    print(f"   ➕ {len(lagt_til)} lagt til")
+    print(f"   ➖ {len(fjernet)} fjernet")
+    print(f"   ✏️ {len(endret)} endret")
+
+    for nøkkel in lagt_til[:vis]:
+        print(f"   + {nøkkel}")
+    for nøkkel in fjernet[:vis]:
+        print(f"   - {nøkkel}")
+    for nøkkel, felter in list(endret.items())[:vis]:
+        for felt, (fra, til) in felter.items():
+            print(f"   ~ {nøkkel}.{felt}: '{fra}' → '{til}'")
+    return lagt_til, fjernet, endret
+
+def main():
+    parser = argparse.ArgumentParser(description="Diff, tre-veis fletting og manifest for datasett-versjonene")
+    under = parser.add_subparsers(dest='kommando', required=True)
+
+    p = under.add_parser('diff', help="Hva er lagt til, fjernet og endret fra GAMMEL til NY")
+    p.add_argument('gammel')
+    p.add_argument('ny')
+    p.add_argument('--vis', type=int, default=20)
+    p.add_argument('--rapport', help="Skriv alle endringer til denne CSV-filen")
+
+    p = under.add_parser('flett', help="Tre-veis fletting av VÅR og DERES mot felles BASE")
+    p.add_argument('base')
+    p.add_argument('vaar')
+    p.add_argument('deres')
+    p.add_argument('-o', '--output', required=True)
+
+    p = under.add_parser('registrer', help="Legg filer inn i manifestet")
+    p.add_argument('filer', nargs='+')
+    p.add_argument('--mappe', default='public/data')
+
+    p = under.add_parser('status', help="Vis filene i manifestet og om de er endret siden")
+    p.add_argument('--mappe', default='public/data')
+
+    args = parser.parse_args()
+
+    if args.kommando == 'diff':
+        gammel, ny = Versjon(args.gammel), Versjon(args.ny)
+        lagt_til, fjernet, endret = vis_diff(gammel, ny, args.vis)
+        if args.rapport:
+            rader = [{'nøkkel': n, 'endring': 'lagt_til'} for n in lagt_til]
+            rader += [{'nøkkel': n, 'endring': 'fjernet'} for n in fjernet]
+            rader += [
+                {'nøkkel': n, 'endring': 'endret', 'felt': felt, 'fra': fra, 'til': til}
+                for n, felter in endret.items() for felt, (fra, til) in felter.items()
+            ]
+            skriv_csv(args.rapport, rader, ['nøkkel', 'endring', 'felt', 'fra', 'til'])
+            print(f"📁 Rapport: {args.rapport}")
+
+    elif args.kommando == 'flett':
+        base, vår, deres = Versjon(args.base), Versjon(args.vaar), Versjon(args.deres)
+        rader, konflikter = flett(base, vår, deres)
+        skriv_csv(args.output, rader)
+        print(f"🔀 {len(rader)} rader flettet til {args.output}")
+        if konflikter:
+            print(f"⚠️ {len(konflikter)} konflikter (vår verdi, eller den endrede raden, er beholdt):")
+            for nøkkel, felt, v, d in konflikter[:20]:
+                print(f"   {nøkkel}.{felt}: vår '{v}' / deres '{d}'")
+
+        mappe = os.path.dirname(os.path.abspath(args.output))
+        Versjonsmanifest(mappe).registrer(args.output, forelder=[args.base, args.vaar, args.deres])
+
+    elif args.kommando == 'registrer':
+        manifest = Versjonsmanifest(args.mappe)
+        for sti in args.filer:
+            oppføring = manifest.registrer(sti)
+            print(f"📝 {sti}: {oppføring['rader']} rader, {oppføring['skjema']}")
+
+    elif args.kommando == 'status':
+        for navn, oppføring, tilstand in Versjonsmanifest(args.mappe).status():
+            ikon = {'ok': '✅', 'endret': '✏️', 'mangler': '❌'}[tilstand]
+            print(f"{ikon} {navn}: {oppføring['rader']} rader, {oppføring['skjema']} ({tilstand})")
+
+if __name__ == "__main__":
+    main()
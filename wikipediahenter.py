@@ -0,0 +1,286 @@
+import argparse
+import json
+import os
+import threading
+import urllib.parse
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from arter import Artstabell
+from nettcache import NettCache
+from nettverk import Vertspause, hent_med_forsøk, lag_sesjon
+from skjema import kolonne
+
+# Wikimedia ber om en User-Agent som sier hvem som spør, ikke en nettleser-streng
+API_HEADERS = {
+    'User-Agent': 'blomsterapp/1.0 (https://github.com/HenrikWo/blomsterapp)',
+    'Accept': 'application/json',
+}
+
+# Så mange titler godtar MediaWiki per spørring for vanlige brukere
+MAKS_TITLER = 50
+
+RESULTAT_FELTER = ['wikipedia_url', 'wikipedia_image_url', 'wikipedia_image_file', 'wikipedia_status']
+
+def kandidater(latinsk_navn, slekt=False):
+    """
+    Titlene vi prøver for en art, i rekkefølge: fullt navn, binomen og, med
+    `slekt`, slekten. Mange arter har ingen egen engelsk artikkel, og da er
+    slektsartikkelen det nærmeste.
+    """
+    deler = (latinsk_navn or '').split()
+    if len(deler) < 2:
+        return []
+
+    # norskflora skriver "ssp"/"var", Wikipedia "subsp."/"var."
+    fullt = ' '.join({'ssp': 'subsp.', 'ssp.': 'subsp.', 'var': 'var.'}.get(d, d) for d in deler)
+    titler = [fullt, ' '.join(deler[:2])] + ([deler[0]] if slekt else [])
+    return list(dict.fromkeys(titler))
+
+class WikipediaHenter:
+    """
+    Fyller Wikipedia-kolonnene med batchede oppslag mot MediaWiki-API-et.
+
+    Hver spørring slår opp opptil 50 titler på en gang og gir tilbake
+    normaliserte titler, redirects, artikkel-URL og hovedbilde. Sesjon,
+    Vertspause og NettCache kan deles med NorskFloraSeleniumHenter.
+    """
+
+    def __init__(self, basis_url="https://en.wikipedia.org", antall_arbeidere=4, pause=0.5,
+                 cache=None, sesjon=None, vertspause=None, forsøk=3):
+        self.api_url = f"{basis_url.rstrip('/')}/w/api.php"
+        self.antall_arbeidere = antall_arbeidere
+        self.cache = cache
+        self.sesjon = sesjon or lag_sesjon(antall_arbeidere)
+        self.vertspause = vertspause or Vertspause(pause)
+        self.forsøk = forsøk
+        self.forespørsler = 0
+        self._lås = threading.Lock()
+
+    def _spør(self, params):
+        """Én GET mot API-et, via cachen hvis vi har en. Parametrene sorteres så cache-nøkkelen blir stabil"""
+        url = f"{self.api_url}?{urllib.parse.urlencode(sorted(params.items()))}"
+
+        def nett(ekstra_headers):
+            self.vertspause.vent(url)
+            with self._lås:
+                self.forespørsler += 1
+            return hent_med_forsøk(self.sesjon, url, forsøk=self.forsøk, vertspause=self.vertspause,
+                                   headers={**API_HEADERS, **ekstra_headers}, timeout=30)
+
+        response = self.cache.hent(url, nett) if self.cache else nett({})
+        response.raise_for_status()
+        return json.loads(response.content)
+
+    def slå_opp_batch(self, titler):
+        """
+        Slår opp opptil MAKS_TITLER titler i én spørring (pluss eventuelle fortsettelser).
+        Gir {tittel: {'url', 'bilde_url', 'bildefil'} eller None hvis siden ikke finnes}
+        """
+        params = {
+            'action': 'query',
+            'format': 'json',
+            'formatversion': '2',
+            'redirects': '1',
+            'prop': 'info|pageimages',
+            'inprop': 'url',
+            'piprop': 'original|name',
+            'pilimit': str(MAKS_TITLER),
+            'titles': '|'.join(titler),
+        }
+
+        omdøpt = {}
+        sider = {}
+        while True:
+            data = self._spør(params)
+            query = data.get('query', {})
+
+            for par in query.get('normalized', []) + query.get('redirects', []):
+                omdøpt[par['from']] = par['to']
+
+            for side in query.get('pages', []):
+                side_nå = sider.setdefault(side['title'], {})
+                if side.get('missing') or side.get('invalid'):
+                    side_nå['mangler'] = True
+                    continue
+                if side.get('fullurl'):
+                    side_nå['url'] = side['fullurl']
+                if side.get('original'):
+                    side_nå['bilde_url'] = side['original']['source']
+                if side.get('pageimage'):
+                    side_nå['bildefil'] = side['pageimage']
+
+            # pageimages kan dele svaret opp, og da må vi spørre videre
+            if 'continue' not in data:
+                break
+            params = {**params, **data['continue']}
+
+        resultat = {}
+        for tittel in titler:
+            endelig = tittel
+            sett = set()
+            while endelig in omdøpt and endelig not in sett:
+                sett.add(endelig)
+                endelig = omdøpt[endelig]
+
+            side = sider.get(endelig)
+            resultat[tittel] = None if not side or side.get('mangler') or not side.get('url') else side
+        return resultat
+
+    def slå_opp(self, titler):
+        """Slår opp alle titlene i batcher, fordelt på arbeidere"""
+        titler = list(dict.fromkeys(titler))
+        batcher = [titler[i:i + MAKS_TITLER] for i in range(0, len(titler), MAKS_TITLER)]
+
+        resultat = {}
+        with ThreadPoolExecutor(max_workers=self.antall_arbeidere) as executor:
+            for svar in executor.map(self.slå_opp_batch, batcher):
+                resultat.update(svar)
+        return resultat
+
+    def finn_artikler(self, latinske_navn, slekt=False):
+        """
+        Gir {latinsk navn: side eller None}. Tar én runde per kandidattittel, og
+        bare artene som ikke har en side med bilde ennå blir med i neste runde.
+        En side uten bilde brukes bare hvis ingen av kandidatene har bilde, og
+        en slektsartikkel (med `slekt`) bare hvis arten ikke har noen egen side.
+        Den er merket med 'slekt'.
+        """
+        gjenstår = {navn: kandidater(navn, slekt) for navn in dict.fromkeys(latinske_navn)}
+        funnet = {}
+        uten_bilde = {}
+        slektsider = {}
+        runde = 0
+
+        while True:
+            aktuelle = {navn: titler[runde] for navn, titler in gjenstår.items() if runde < len(titler)}
+            if not aktuelle:
+                break
+
+            print(f"   🔎 Runde {runde + 1}: {len(aktuelle)} titler")
+            sider = self.slå_opp(aktuelle.values())
+
+            for navn, tittel in aktuelle.items():
+                side = sider.get(tittel)
+                if side and ' ' not in tittel:
+                    slektsider[navn] = {**side, 'slekt': True}
+                elif side and side.get('bilde_url'):
+                    funnet[navn] = side
+                    del gjenstår[navn]
+                elif side:
+                    uten_bilde.setdefault(navn, side)
+            runde += 1
+
+        for navn in gjenstår:
+            funnet[navn] = uten_bilde.get(navn) or slektsider.get(navn)
+        return funnet
+
+    def fyll_rader(self, rows, latin_kolonne, alle=False, slekt=False):
+        """
+        Fyller Wikipedia-kolonnene i radene og gir antall per status. Uten `alle`
+        slås bare rader uten wikipedia_status opp. Med `slekt` får arter uten egen
+        artikkel lenke til slektsartikkelen og status SLEKT, men ikke bildet
+        derfra, siden det sjelden er av arten og ellers ville gått igjen på flere
+        rader. Feil fra API-et kastes videre før noen rad er endret.
+        """
+        def trenger_oppslag(row):
+            return kandidater(row.get(latin_kolonne)) and (alle or not (row.get('wikipedia_status') or '').strip())
+
+        navn = [row[latin_kolonne].strip() for row in rows if trenger_oppslag(row)]
+        print(f"📋 {len(rows)} rader, {len(set(navn))} arter skal slås opp")
+        artikler = self.finn_artikler(navn, slekt)
+
+        telling = Counter()
+        for row in rows:
+            latinsk = (row.get(latin_kolonne) or '').strip()
+            if not kandidater(latinsk):
+                if not (row.get('wikipedia_status') or '').strip():
+                    row['wikipedia_status'] = 'MANGLER_LATINSK'
+                telling['MANGLER_LATINSK'] += 1
+                continue
+            if latinsk not in artikler:
+                telling['uendret'] += 1
+                continue
+
+            side = artikler[latinsk]
+            bilde = side if side and not side.get('slekt') else {}
+            row['wikipedia_url'] = side['url'] if side else ''
+            row['wikipedia_image_url'] = bilde.get('bilde_url', '')
+            row['wikipedia_image_file'] = bilde.get('bildefil', '')
+            if not side:
+                row['wikipedia_status'] = 'IKKE_FUNNET'
+            else:
+                row['wikipedia_status'] = 'SLEKT' if side.get('slekt') else 'FUNNET'
+            telling[row['wikipedia_status']] += 1
+        return telling
+
+    def behandle_csv(self, input_csv, output_csv, alle=False, slekt=False):
+        """
+        Fyller wikipedia_url, wikipedia_image_url, wikipedia_image_file og
+        wikipedia_status (se fyll_rader). Feiler en spørring, skrives ingenting
+        og output-filen står som før.
+        """
+        print(f"📖 Leser CSV: {input_csv}")
+
+        rows = Artstabell.les(input_csv)
+        latin_kolonne = kolonne(rows.skjema, 'Latinsk navn')
+        rows.legg_til_kolonner(RESULTAT_FELTER)
+
+        try:
+            telling = self.fyll_rader(rows, latin_kolonne, alle, slekt)
+        except (requests.exceptions.RequestException, ValueError) as e:
+            print(f"❌ Wikipedia-oppslaget feilet: {e}")
+            return Counter()
+
+        # Skrives atomisk, så input-filen kan være samme fil som output
+        rows.skriv(output_csv)
+
+        print(f"\n{'='*60}")
+        print(f"✅ {telling['FUNNET']} funnet på Wikipedia")
+        if slekt:
+            print(f"🌿 {telling['SLEKT']} bare med slektsartikkel")
+        print(f"❌ {telling['IKKE_FUNNET']} ikke funnet")
+        print(f"⚠️ {telling['MANGLER_LATINSK']} mangler latinsk")
+        print(f"⏭️ {telling['uendret']} hadde resultat fra før")
+        print(f"📡 {self.forespørsler} API-forespørsler")
+        print(self.vertspause.sammendrag())
+        if self.cache:
+            print(self.cache.sammendrag())
+        print(f"📁 Lagret: {output_csv}")
+
+        return telling
+
+def main():
+    parser = argparse.ArgumentParser(description="Fyller Wikipedia-kolonnene med batchede MediaWiki-oppslag")
+    parser.add_argument('input', nargs='?', default='public/data/blomster.csv')
+    parser.add_argument('output', nargs='?', default=None, help="Standard: skriv tilbake til input")
+    parser.add_argument('--alle', action='store_true', help="Slå opp alle rader, ikke bare de uten wikipedia_status")
+    parser.add_argument('--slekt', action='store_true',
+                        help="Lenk til slektsartikkelen (status SLEKT, uten bilde) når arten ikke har egen artikkel")
+    parser.add_argument('--basis-url', default='https://en.wikipedia.org')
+    parser.add_argument('--arbeidere', type=int, default=4, help="Samtidige API-spørringer")
+    parser.add_argument('--pause', type=float, default=0.5, help="Minste pause mellom spørringer")
+    parser.add_argument('--cache', default='.nettcache.sqlite3', help="Fil for HTTP-cachen")
+    parser.add_argument('--ingen-cache', action='store_true')
+    parser.add_argument('--cache-ttl', type=float, default=24, help="Timer før et svar i cachen revalideres")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.input):
+        print(f"❌ Finner ikke: {args.input}")
+        raise SystemExit(1)
+
+    cache = None if args.ingen_cache else NettCache(args.cache, ttl=args.cache_ttl * 3600)
+    henter = WikipediaHenter(args.basis_url, antall_arbeidere=args.arbeidere, pause=args.pause, cache=cache)
+
+    print("📚 Wikipedia-beriking")
+    print("=" * 50)
+    try:
+        henter.behandle_csv(args.input, args.output or args.input, alle=args.alle, slekt=args.slekt)
+    finally:
+        if cache:
+            cache.lukk()
+
+if __name__ == "__main__":
+    main()